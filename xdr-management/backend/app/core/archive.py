@@ -0,0 +1,294 @@
+import asyncio
+import json
+import os
+import shutil
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db_models import AuditLog, SecurityEvent
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # The archive endpoints report 503 without pyarrow
+    pa = None
+
+
+class ArchiveUnavailableError(Exception):
+    """pyarrow is not installed"""
+
+
+class ArchiveTable(NamedTuple):
+    model: Any
+    # Columns in archive order; JSON columns appear in list_columns or json_columns
+    columns: List[str]
+    list_columns: List[str]
+    json_columns: List[str]
+    # Columns accepted as equality filters and group-by keys
+    filter_columns: List[str]
+
+
+ARCHIVE_TABLES: Dict[str, ArchiveTable] = {
+    "security_events": ArchiveTable(
+        model=SecurityEvent,
+        columns=[
+            "id", "timestamp", "severity", "type", "source", "description", "status",
+            "affected_assets", "iocs", "mitre", "created_at", "updated_at"
+        ],
+        list_columns=["affected_assets", "iocs", "mitre"],
+        json_columns=[],
+        filter_columns=["severity", "type", "source", "status"]
+    ),
+    "audit_logs": ArchiveTable(
+        model=AuditLog,
+        columns=[
+            "id", "user_id", "username", "action", "resource_type", "resource_id",
+            "details", "ip_address", "timestamp"
+        ],
+        list_columns=[],
+        json_columns=["details"],
+        filter_columns=["username", "action", "resource_type", "resource_id"]
+    ),
+}
+
+PARTITION_FILE = "data.parquet"
+
+
+def _arrow_type(spec: ArchiveTable, name: str):
+    column = spec.model.__table__.c[name]
+    if name in spec.list_columns:
+        return pa.list_(pa.string())
+    if name in spec.json_columns:
+        return pa.string()
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return pa.timestamp("us")
+    if python_type is int:
+        return pa.int64()
+    if python_type is bool:
+        return pa.bool_()
+    return pa.string()
+
+
+def _schema(spec: ArchiveTable):
+    return pa.schema([(name, _arrow_type(spec, name)) for name in spec.columns])
+
+
+class ColdArchive:
+    """
+    Date-partitioned Parquet archive for rows that have left the hot tables.
+
+    Files live at `<root>/<table>/date=YYYY-MM-DD/data.parquet` (hive
+    partitioning), one file per day, so range scans only open the days they
+    cover and read only the requested columns. Archiving a day merges into
+    its file by primary key, so re-running after an interrupted run does
+    not duplicate rows.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    def _require(self):
+        if pa is None:
+            raise ArchiveUnavailableError("The archive requires pyarrow")
+
+    def partition_path(self, table: str, day: date) -> str:
+        return os.path.join(self.root, table, f"date={day.isoformat()}", PARTITION_FILE)
+
+    # ---- Writing ----
+
+    async def archive(self, db: AsyncSession, older_than: datetime) -> Dict[str, int]:
+        """
+        Move rows timestamped before `older_than` into the archive, one day
+        per transaction. Returns the number of rows moved per table.
+        """
+        self._require()
+        moved = {}
+        for table, spec in ARCHIVE_TABLES.items():
+            moved[table] = 0
+            ts = spec.model.timestamp
+            days = (await db.execute(
+                select(func.date(ts)).where(ts < older_than).distinct().order_by(func.date(ts))
+            )).scalars().all()
+
+            for day in days:
+                day = date.fromisoformat(str(day))
+                start = datetime.combine(day, time.min)
+                end = min(start + timedelta(days=1), older_than)
+                rows = (await db.execute(
+                    select(*[spec.model.__table__.c[c] for c in spec.columns])
+                    .where(ts >= start, ts < end)
+                )).mappings().all()
+                if not rows:
+                    continue
+
+                await asyncio.to_thread(self._merge_partition, table, day, [dict(r) for r in rows])
+                ids = [row["id"] for row in rows]
+                for i in range(0, len(ids), 500):
+                    await db.execute(delete(spec.model).where(spec.model.id.in_(ids[i:i + 500])))
+                await db.commit()
+                moved[table] += len(rows)
+        return moved
+
+    def _merge_partition(self, table: str, day: date, records: List[dict]):
+        spec = ARCHIVE_TABLES[table]
+        for record in records:
+            for name in spec.json_columns:
+                if record[name] is not None:
+                    record[name] = json.dumps(record[name])
+        incoming = pa.Table.from_pylist(records, schema=_schema(spec))
+
+        path = self.partition_path(table, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            existing = pq.read_table(path, schema=_schema(spec))
+            keep = pc.invert(pc.is_in(existing["id"], value_set=incoming["id"]))
+            incoming = pa.concat_tables([existing.filter(keep), incoming])
+        incoming = incoming.sort_by([("timestamp", "ascending"), ("id", "ascending")])
+
+        # Write next to the target and swap, so readers never see a partial file
+        tmp_path = path + ".tmp"
+        pq.write_table(incoming, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+    def drop_partitions_before(self, table: str, day: date) -> int:
+        """Delete archived days older than `day`; returns how many were removed"""
+        dropped = 0
+        for partition in self.partitions(table):
+            if partition["date"] < day.isoformat():
+                shutil.rmtree(os.path.dirname(self.partition_path(table, date.fromisoformat(partition["date"]))))
+                dropped += 1
+        return dropped
+
+    # ---- Reading ----
+
+    def _days(self, table: str) -> List[str]:
+        # Archived days (YYYY-MM-DD) of a table, oldest first
+        base = os.path.join(self.root, table)
+        if not os.path.isdir(base):
+            return []
+        return [
+            name[len("date="):] for name in sorted(os.listdir(base))
+            if name.startswith("date=") and os.path.exists(os.path.join(base, name, PARTITION_FILE))
+        ]
+
+    def partitions(self, table: str) -> List[dict]:
+        """Archived days of a table with their row counts and file sizes"""
+        self._require()
+        result = []
+        for day in self._days(table):
+            path = self.partition_path(table, date.fromisoformat(day))
+            result.append({
+                "date": day,
+                "rows": pq.ParquetFile(path).metadata.num_rows,
+                "bytes": os.path.getsize(path)
+            })
+        return result
+
+    def _dataset(self, table: str):
+        return ds.dataset(
+            os.path.join(self.root, table),
+            schema=_schema(ARCHIVE_TABLES[table]).append(pa.field("date", pa.string())),
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+            exclude_invalid_files=True
+        )
+
+    def _filter(self, table: str, start: Optional[date], end: Optional[date], filters: Dict[str, str]):
+        expression = None
+
+        def both(current, clause):
+            return clause if current is None else current & clause
+
+        # Partition pruning: these only compare directory names
+        if start is not None:
+            expression = both(expression, ds.field("date") >= start.isoformat())
+        if end is not None:
+            expression = both(expression, ds.field("date") <= end.isoformat())
+        for name, value in filters.items():
+            expression = both(expression, ds.field(name) == value)
+        return expression
+
+    def scan(
+        self,
+        table: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        filters: Optional[Dict[str, str]] = None,
+        columns: Optional[List[str]] = None,
+        limit: int = 1000
+    ) -> List[dict]:
+        """
+        Archived rows in a date range, newest first.
+
+        Days are read newest first, one partition at a time, and reading
+        stops once `limit` rows are collected, so a small page of a long
+        range only opens the most recent days.
+        """
+        self._require()
+        spec = ARCHIVE_TABLES[table]
+        columns = columns or spec.columns
+        loaded = list(dict.fromkeys(["timestamp", "id", *columns]))
+        row_filter = self._filter(table, None, None, filters or {})
+
+        collected = []
+        for day in reversed(self._days(table)):
+            if len(collected) >= limit:
+                break
+            if (start is not None and day < start.isoformat()) or (end is not None and day > end.isoformat()):
+                continue
+            path = self.partition_path(table, date.fromisoformat(day))
+            rows = ds.dataset(path, schema=_schema(spec), format="parquet").to_table(
+                columns=loaded, filter=row_filter
+            )
+            rows = rows.sort_by([("timestamp", "descending"), ("id", "descending")])
+            collected.extend(rows.slice(0, limit - len(collected)).to_pylist())
+        return [_serialize(spec, record, columns) for record in collected]
+
+    def summarize(
+        self,
+        table: str,
+        by: List[str],
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        filters: Optional[Dict[str, str]] = None
+    ) -> List[dict]:
+        """Row counts grouped by `by` (archive columns or `date`)"""
+        self._require()
+        if not os.path.isdir(os.path.join(self.root, table)):
+            return []
+        rows = self._dataset(table).to_table(
+            columns=list(dict.fromkeys([*by, "id"])),
+            filter=self._filter(table, start, end, filters or {})
+        )
+        groups = rows.group_by(by).aggregate([("id", "count")]).to_pylist()
+        counts = [{**{k: g[k] for k in by}, "count": g["id_count"]} for g in groups]
+        return sorted(counts, key=lambda r: tuple(str(r[k]) for k in by))
+
+
+def _serialize(spec: ArchiveTable, record: dict, columns: List[str]) -> dict:
+    data = {}
+    for name in columns:
+        value = record[name]
+        if isinstance(value, datetime):
+            value = value.isoformat() + "Z"
+        elif name in spec.json_columns and value is not None:
+            value = json.loads(value)
+        elif name in spec.list_columns:
+            value = value or []
+        data[name] = value
+    return data
+
+
+# Global cold archive
+cold_archive = ColdArchive(settings.ARCHIVE_DIR)
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.db_models import AuditLog
+
+
+def client_ip(request: Optional[Request]) -> Optional[str]:
+    """
+    Address of the client that made the request. Behind a reverse proxy,
+    run uvicorn with --proxy-headers so this is the forwarded address.
+    """
+    if request is None or request.client is None:
+        return None
+    return request.client.host
+
+
+class AuditWriter:
+    """
+    Batched audit log writer.
+
+    `record` queues the row and returns; a background task inserts queued
+    rows in one transaction once `batch_size` have accumulated or
+    `flush_seconds` after the first of them arrived, whichever comes first.
+    `stop` drains the queue, so a graceful shutdown loses nothing. Actions
+    in `durable_actions` (and calls with durable=True) are committed before
+    `record` returns, as are rows recorded while the writer is not running.
+
+    A batch that fails to insert is retried `max_retries` times with
+    growing delays; if it still fails it is appended to `fallback_path`
+    (JSON lines), which `start` loads back into the table.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_seconds: float = 1.0,
+        queue_size: int = 10000,
+        durable_actions: Iterable[str] = (),
+        max_retries: int = 3,
+        retry_seconds: float = 0.5,
+        fallback_path: Optional[str] = None
+    ):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue_size = queue_size
+        self.durable_actions = set(durable_actions)
+        self.max_retries = max_retries
+        self.retry_seconds = retry_seconds
+        self.fallback_path = fallback_path
+        # Created in start(), on the event loop that serves requests
+        self.queue: Optional["asyncio.Queue[Optional[dict]]"] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        await self.recover()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def recover(self) -> int:
+        """Insert rows left in the fallback file by failed flushes; returns how many"""
+        if not self.fallback_path or not os.path.exists(self.fallback_path):
+            return 0
+        with open(self.fallback_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for row in rows:
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+        try:
+            if rows:
+                await self.write(rows)
+        except Exception as e:
+            logger.error(f"Failed to recover {len(rows)} audit log rows from {self.fallback_path}: {e}")
+            return 0
+        os.remove(self.fallback_path)
+        logger.info(f"Recovered {len(rows)} audit log rows from {self.fallback_path}")
+        return len(rows)
+
+    async def stop(self):
+        """Flush everything queued and stop the background task"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        # The sentinel is queued behind every pending row
+        await self.queue.put(None)
+        await task
+
+    async def record(
+        self,
+        user: dict,
+        action: str,
+        resource_type: str,
+        resource_id: Optional[str] = None,
+        details: Optional[dict] = None,
+        ip_address: Optional[str] = None,
+        durable: Optional[bool] = None
+    ):
+        """Record an audit row; waits for the commit only when durable"""
+        row = {
+            "user_id": user["id"],
+            "username": user["username"],
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": ip_address,
+            "timestamp": datetime.utcnow()
+        }
+        if durable is None:
+            durable = action in self.durable_actions
+        if durable or self._task is None:
+            await self.write([row])
+        else:
+            # Blocks only when the queue is full, pushing back on writers
+            await self.queue.put(row)
+
+    @staticmethod
+    async def write(rows: List[dict]):
+        async with AsyncSessionLocal() as db:
+            await db.execute(AuditLog.__table__.insert(), rows)
+            await db.commit()
+
+    async def _flush(self, batch: List[dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.write(batch)
+                return
+            except Exception as e:
+                error = e
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.retry_seconds * 2 ** attempt)
+
+        if not self.fallback_path:
+            logger.error(f"Dropped {len(batch)} audit log rows: {error}")
+            return
+        try:
+            with open(self.fallback_path, "a", encoding="utf-8") as f:
+                for row in batch:
+                    f.write(json.dumps(row, default=datetime.isoformat) + "\n")
+            logger.error(f"Failed to write {len(batch)} audit log rows, saved to {self.fallback_path}: {error}")
+        except OSError as e:
+            logger.error(f"Dropped {len(batch)} audit log rows: {error}; fallback file failed: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            row = await self.queue.get()
+            if row is None:
+                return
+            batch = [row]
+            deadline = loop.time() + self.flush_seconds
+            stopping = False
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+
+# Global audit log writer
+audit_writer = AuditWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+    durable_actions=settings.AUDIT_DURABLE_ACTIONS,
+    max_retries=settings.AUDIT_FLUSH_RETRIES,
+    retry_seconds=settings.AUDIT_RETRY_SECONDS,
+    fallback_path=settings.AUDIT_FALLBACK_PATH or None
+)
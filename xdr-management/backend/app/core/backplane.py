@@ -0,0 +1,178 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+Deliver = Callable[[dict], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """
+    Pub/sub transport between workers for WebSocket broadcasts.
+
+    `publish` assigns the message a sequence number and hands it to every
+    subscribed worker, including the publishing one, in sequence order.
+    Sequence numbers increase by one per message across all workers, so a
+    client that sees a jump knows it missed messages. An external broker
+    (Redis, NATS, ...) can be plugged in by implementing these methods; it
+    must provide the same global ordering.
+    """
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def subscribe(self, deliver: Deliver):
+        """Register the callback that fans messages out to local clients"""
+        self._deliver = deliver
+
+    @abstractmethod
+    async def start(self):
+        ...
+
+    @abstractmethod
+    async def stop(self):
+        ...
+
+    @abstractmethod
+    async def publish(self, message: dict) -> int:
+        """Publish a message; returns its sequence number"""
+        ...
+
+
+class MemoryBackplane(Backplane):
+    """Single-process backplane: delivers directly to the local manager"""
+
+    def __init__(self):
+        super().__init__()
+        self.seq = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, message: dict) -> int:
+        self.seq += 1
+        seq = self.seq
+        if self._deliver is not None:
+            await self._deliver({**message, "seq": seq})
+        return seq
+
+
+class SQLiteBackplane(Backplane):
+    """
+    Backplane for several workers on one host, through a shared SQLite file.
+
+    Publishing appends to `broadcast_log`, whose autoincrement key is the
+    global sequence number. Every worker polls the log for rows past the
+    last one it delivered. Only the most recent `retain` rows are kept.
+    Each worker keeps one connection open (WAL, autocommit) until `stop`.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05, retain: int = 10000):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retain = retain
+        self.last_seq = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        with self._lock:
+            self._connection().execute(
+                "CREATE TABLE IF NOT EXISTS broadcast_log ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the worker's connection, opening it if needed; hold `_lock`"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    def _close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _append(self, payload: str) -> int:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                seq = conn.execute(
+                    "INSERT INTO broadcast_log (payload) VALUES (?)", (payload,)
+                ).lastrowid
+                if seq % 1000 == 0:
+                    conn.execute("DELETE FROM broadcast_log WHERE seq <= ?", (seq - self.retain,))
+            return seq
+
+    def _read_after(self, seq: int) -> List[Tuple[int, str]]:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT seq, payload FROM broadcast_log WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+
+    def _latest(self) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM broadcast_log"
+            ).fetchone()[0]
+
+    async def start(self):
+        # Only deliver what is published from now on
+        self.last_seq = await asyncio.to_thread(self._latest)
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self._close)
+
+    async def publish(self, message: dict) -> int:
+        payload = json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+        return await asyncio.to_thread(self._append, payload)
+
+    async def poll_once(self):
+        """Deliver every message published since the last poll"""
+        for seq, payload in await asyncio.to_thread(self._read_after, self.last_seq):
+            if seq <= self.last_seq:
+                # Delivered by a concurrent poll
+                continue
+            self.last_seq = seq
+            if self._deliver is not None:
+                await self._deliver({**json.loads(payload), "seq": seq})
+
+    async def _poll(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Broadcast backplane poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+
+def create_backplane() -> Backplane:
+    """Create the backplane selected by BROADCAST_BACKPLANE"""
+    if settings.BROADCAST_BACKPLANE == "sqlite":
+        return SQLiteBackplane(
+            settings.BROADCAST_SQLITE_PATH,
+            poll_interval=settings.BROADCAST_POLL_SECONDS
+        )
+    return MemoryBackplane()
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+
+# A cached response: (body, headers, etag)
+CacheEntry = Tuple[bytes, Dict[str, str], str]
+
+
+class CacheBackend(ABC):
+    """
+    Storage interface for the response cache.
+
+    Besides entries, a backend stores one version counter per resource.
+    Sharing a backend between workers shares both, so a write on one worker
+    invalidates cached lists on all of them. An external store such as Redis
+    can be plugged in by implementing these methods; backends whose entry
+    reads and writes do I/O set `blocking` so they run off the event loop.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry, ttl: float):
+        ...
+
+    @abstractmethod
+    def get_version(self, resource: str) -> int:
+        ...
+
+    @abstractmethod
+    def bump_version(self, resource: str) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, resource: str) -> int:
+        return self._versions.get(resource, 0)
+
+    def bump_version(self, resource: str) -> int:
+        with self._lock:
+            version = self._versions.get(resource, 0) + 1
+            self._versions[resource] = version
+            return version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache shared by all workers on one host through a local SQLite file.
+
+    Stands in for an external shared cache in single-host deployments. Each
+    worker keeps one connection open (WAL, autocommit), and remembers
+    resource versions for `version_ttl` seconds, so versions bumped by other
+    workers are seen at most that late; bumps made by this worker are seen
+    immediately.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, version_ttl: float = 1.0):
+        self.path = path
+        self.version_ttl = version_ttl
+        self._versions: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, body BLOB, headers TEXT, etag TEXT, expires_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_versions ("
+                "resource TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, headers, etag FROM cache_entries WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def set(self, key: str, entry: CacheEntry, ttl: float):
+        body, headers, etag = entry
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                (key, body, json.dumps(headers), etag, now + ttl)
+            )
+
+    def get_version(self, resource: str) -> int:
+        now = time.monotonic()
+        cached = self._versions.get(resource)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM cache_versions WHERE resource = ?", (resource,)
+            ).fetchone()
+        version = row[0] if row else 0
+        self._versions[resource] = (now + self.version_ttl, version)
+        return version
+
+    def bump_version(self, resource: str) -> int:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO cache_versions VALUES (?, 1) "
+                "ON CONFLICT(resource) DO UPDATE SET version = version + 1",
+                (resource,)
+            )
+            version = self._conn.execute(
+                "SELECT version FROM cache_versions WHERE resource = ?", (resource,)
+            ).fetchone()[0]
+        self._versions[resource] = (time.monotonic() + self.version_ttl, version)
+        return version
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.execute("DELETE FROM cache_versions")
+        self._versions.clear()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
+
+
+class ResponseCache:
+    """
+    Caches serialized GET responses keyed by path, query parameters, role
+    and the versions of the resources the response depends on.
+
+    Write handlers call `invalidate` to bump resource versions, which makes
+    every cached key for that resource unreachable. Responses carry an ETag,
+    and a matching If-None-Match on a cached key returns 304 without
+    touching the database.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 30):
+        self.backend = backend
+        self.ttl = ttl
+
+    def invalidate(self, *resources: str):
+        for resource in resources:
+            self.backend.bump_version(resource)
+
+    def version(self, resource: str) -> int:
+        return self.backend.get_version(resource)
+
+    def clear(self):
+        self.backend.clear()
+
+    async def _call(self, method: Callable, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _key(self, request: Request, resources: Iterable[str], role: str) -> str:
+        versions = ",".join(f"{r}:{self.backend.get_version(r)}" for r in resources)
+        params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        raw = f"{request.url.path}?{params}|{role}|{versions}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=20).hexdigest()
+
+    async def respond(
+        self,
+        request: Request,
+        resources: Iterable[str],
+        role: Any,
+        build: Callable[[], Any]
+    ) -> Response:
+        """
+        Return the cached response for this request, or call `build` and cache
+        its result. `build` may return response data, a Response, or an
+        awaitable of either.
+        """
+        role = getattr(role, "value", role)
+        key = self._key(request, resources, role)
+        if_none_match = request.headers.get("if-none-match")
+
+        entry = await self._call(self.backend.get, key)
+        cache_status = "HIT"
+        if entry is None:
+            cache_status = "MISS"
+            result = build()
+            if inspect.isawaitable(result):
+                result = await result
+            if isinstance(result, Response):
+                body = result.body
+                headers = {
+                    k: v for k, v in result.headers.items()
+                    if k.lower() not in ("content-length", "content-type")
+                }
+            else:
+                body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode("utf-8")
+                headers = {}
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            entry = (body, headers, etag)
+            await self._call(self.backend.set, key, entry, self.ttl)
+
+        body, headers, etag = entry
+        headers = {
+            **headers,
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "X-Cache": cache_status
+        }
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def create_cache_backend() -> CacheBackend:
+    """Create the backend selected by CACHE_BACKEND"""
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(settings.CACHE_SQLITE_PATH, settings.CACHE_VERSION_TTL_SECONDS)
+    return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+
+
+# Global response cache
+response_cache = ResponseCache(create_cache_backend(), ttl=settings.CACHE_TTL_SECONDS)
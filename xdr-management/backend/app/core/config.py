@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -9,6 +9,128 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Password hashing: bcrypt runs on PASSWORD_HASH_WORKERS threads, and
+    # logins beyond PASSWORD_HASH_MAX_PENDING queued hashes are refused
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Users are cached per worker for USER_CACHE_TTL_SECONDS; changes made
+    # through the API invalidate every worker sharing the cache backend
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Request metrics: with METRICS_MULTIPROC_DIR set, each worker writes its
+    # metrics there every METRICS_FLUSH_SECONDS and reports the sum of all
+    # workers; /metrics requires METRICS_SCRAPE_TOKEN as a Bearer token, or
+    # an admin login token when METRICS_SCRAPE_TOKEN is empty.
+    # Latency is tracked per route template, for at most
+    # METRICS_MAX_ENDPOINTS templates (the rest share an overflow bucket)
+    METRICS_MULTIPROC_DIR: str = ""
+    METRICS_FLUSH_SECONDS: float = 5
+    METRICS_SCRAPE_TOKEN: str = ""
+    METRICS_MAX_ENDPOINTS: int = 500
+
+    # Fraction of requests that also log a line when they start (every
+    # request logs on completion)
+    REQUEST_START_LOG_SAMPLE_RATE: float = 0.01
+
+    # ID allocation (values reserved per database round trip)
+    ID_BLOCK_SIZE: int = 50
+
+    # Background generator of simulated security events
+    EVENT_GENERATOR_ENABLED: bool = True
+
+    # Dashboard stats reconciliation interval
+    STATS_RECONCILE_SECONDS: int = 300
+
+    # Response cache ("memory" or "sqlite" to share entries between workers).
+    # With "sqlite", each worker reuses resource versions for
+    # CACHE_VERSION_TTL_SECONDS, so other workers' writes show up that late
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 30
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_SQLITE_PATH: str = "./xdr_cache.db"
+    CACHE_VERSION_TTL_SECONDS: float = 1.0
+
+    # WebSocket fan-out: per-client send queue length and what to do when it
+    # fills up ("drop_oldest" or "disconnect")
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SLOW_CLIENT_POLICY: str = "drop_oldest"
+    # Recent broadcasts kept for replay to reconnecting clients (`/ws?since=<seq>`)
+    WS_REPLAY_BUFFER_SIZE: int = 1000
+
+    # Cross-worker broadcast backplane ("memory" for a single worker, or
+    # "sqlite" to share broadcasts between workers on one host)
+    BROADCAST_BACKPLANE: str = "memory"
+    BROADCAST_SQLITE_PATH: str = "./xdr_broadcast.db"
+    BROADCAST_POLL_SECONDS: float = 0.05
+
+    # Bulk ingestion
+    BULK_INGEST_MAX_EVENTS: int = 10000
+
+    # IOC lookups: indicators accepted per bulk lookup, and event IDs
+    # returned per matching indicator
+    IOC_LOOKUP_MAX_INDICATORS: int = 10000
+    IOC_LOOKUP_EVENTS_PER_INDICATOR: int = 100
+
+    # Windowed event counts for threshold rules: tracked keys per window,
+    # and where / how often the counts are snapshotted to survive restarts
+    WINDOW_MAX_KEYS: int = 10000
+    WINDOW_SNAPSHOT_PATH: str = "./xdr_windows.json"
+    WINDOW_SNAPSHOT_SECONDS: int = 60
+
+    # Alert rule actions run on a background queue of RULE_ACTION_QUEUE_SIZE;
+    # a rule fires at most once per RULE_ACTION_COOLDOWN_SECONDS per event source
+    RULE_ACTION_COOLDOWN_SECONDS: int = 300
+    RULE_ACTION_QUEUE_SIZE: int = 10000
+
+    # Event correlation: asset/IOC links last CORRELATION_WINDOW_SECONDS,
+    # MITRE technique links CORRELATION_MITRE_WINDOW_SECONDS; clusters with
+    # CORRELATION_MIN_EVENTS events are offered as candidate incidents. A
+    # cluster stops growing at CORRELATION_MAX_CLUSTER_EVENTS events or
+    # CORRELATION_MAX_CLUSTER_SPAN_SECONDS, and related events open a new one
+    CORRELATION_WINDOW_SECONDS: int = 3600
+    CORRELATION_MITRE_WINDOW_SECONDS: int = 300
+    CORRELATION_MAX_CLUSTERS: int = 5000
+    CORRELATION_MIN_EVENTS: int = 2
+    CORRELATION_MAX_CLUSTER_EVENTS: int = 500
+    CORRELATION_MAX_CLUSTER_SPAN_SECONDS: int = 86400
+
+    # Audit log writer: rows are inserted in batches of AUDIT_BATCH_SIZE or
+    # AUDIT_FLUSH_SECONDS after queueing; durable actions commit before the
+    # request returns. A failed batch is retried AUDIT_FLUSH_RETRIES times,
+    # then saved to AUDIT_FALLBACK_PATH and inserted again on the next start
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_FLUSH_SECONDS: float = 1.0
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_DURABLE_ACTIONS: List[str] = ["delete", "archive"]
+    AUDIT_FLUSH_RETRIES: int = 3
+    AUDIT_RETRY_SECONDS: float = 0.5
+    AUDIT_FALLBACK_PATH: str = "./xdr_audit_fallback.jsonl"
+
+    # Rows fetched per round trip by the streaming event export
+    EXPORT_CHUNK_SIZE: int = 500
+
+    # Cold archive: events and audit logs older than ARCHIVE_AFTER_DAYS move
+    # to date-partitioned Parquet files under ARCHIVE_DIR
+    ARCHIVE_DIR: str = "./archive"
+    ARCHIVE_AFTER_DAYS: int = 90
+
+    # Retention: rows older than their TTL (days, 0 = forever) are deleted in
+    # batches by a background task. Event TTLs are per severity. Off unless
+    # RETENTION_ENABLED is set, since enabling it deletes existing rows.
+    RETENTION_ENABLED: bool = False
+    RETENTION_INTERVAL_SECONDS: int = 3600
+    RETENTION_EVENT_DAYS: Dict[str, int] = {"critical": 365, "high": 180, "medium": 90, "low": 30}
+    RETENTION_AUDIT_DAYS: int = 365
+    RETENTION_BATCH_SIZE: int = 1000
+    # SQLite pages returned to the filesystem per incremental vacuum step
+    RETENTION_VACUUM_PAGES: int = 1000
+    # Archive rows older than ARCHIVE_AFTER_DAYS before purging, and drop
+    # archived days older than RETENTION_ARCHIVE_DAYS (0 = keep forever)
+    RETENTION_ARCHIVE: bool = False
+    RETENTION_ARCHIVE_DAYS: int = 0
+
     # CORS
     CORS_ORIGINS: List[str] = [
         "http://localhost:5173",
@@ -0,0 +1,240 @@
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+def event_keys(event: dict) -> List[str]:
+    """Correlation keys of an event: its assets (including the source host), IOCs and MITRE techniques"""
+    assets = set(event.get("affectedAssets") or [])
+    if event.get("source"):
+        assets.add(event["source"])
+    keys = [f"asset:{asset}" for asset in sorted(assets)]
+    keys += [f"ioc:{ioc.strip().lower()}" for ioc in event.get("iocs") or [] if ioc.strip()]
+    keys += [f"mitre:{technique}" for technique in event.get("mitre") or []]
+    return keys
+
+
+class Cluster:
+    """Events correlated into one candidate incident"""
+
+    def __init__(self, cluster_id: str, now: float):
+        self.id = cluster_id
+        self.event_ids: List[str] = []
+        self.assets: Set[str] = set()
+        self.iocs: Set[str] = set()
+        # Techniques in the order they were first seen: the observed chain
+        self.techniques: List[str] = []
+        self.severity = "low"
+        self.first_seen = now
+        self.last_seen = now
+        # Correlation keys currently pointing at this cluster
+        self.keys: Set[str] = set()
+        self.incident_id: Optional[str] = None
+        # Set while a promote is opening the incident, so a concurrent one is refused
+        self.promoting = False
+
+    def add(self, event: dict, now: float):
+        self.event_ids.append(event["id"])
+        self.assets.update(event.get("affectedAssets") or [])
+        if event.get("source"):
+            self.assets.add(event["source"])
+        self.iocs.update(ioc.strip().lower() for ioc in event.get("iocs") or [] if ioc.strip())
+        for technique in event.get("mitre") or []:
+            if technique not in self.techniques:
+                self.techniques.append(technique)
+        if SEVERITY_RANK.get(event.get("severity"), 0) > SEVERITY_RANK[self.severity]:
+            self.severity = event["severity"]
+        self.last_seen = now
+
+    def absorb(self, other: "Cluster"):
+        self.event_ids.extend(other.event_ids)
+        self.assets |= other.assets
+        self.iocs |= other.iocs
+        self.techniques.extend(t for t in other.techniques if t not in self.techniques)
+        if SEVERITY_RANK[other.severity] > SEVERITY_RANK[self.severity]:
+            self.severity = other.severity
+        self.first_seen = min(self.first_seen, other.first_seen)
+        self.last_seen = max(self.last_seen, other.last_seen)
+        self.incident_id = self.incident_id or other.incident_id
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "eventIds": list(self.event_ids),
+            "eventCount": len(self.event_ids),
+            "severity": self.severity,
+            "assets": sorted(self.assets),
+            "iocs": sorted(self.iocs),
+            "techniques": list(self.techniques),
+            "firstSeen": datetime.utcfromtimestamp(self.first_seen).isoformat() + "Z",
+            "lastSeen": datetime.utcfromtimestamp(self.last_seen).isoformat() + "Z",
+            "incidentId": self.incident_id
+        }
+
+
+class Correlator:
+    """
+    Groups incoming events into clusters of related activity.
+
+    An inverted index maps every correlation key (asset, IOC, MITRE
+    technique) to the open cluster that last saw it, so correlating an
+    event costs one lookup per key rather than a scan of recent events.
+    An event joins the cluster its keys point to; when its keys point to
+    several, they are merged into the largest, re-pointing only the
+    smaller clusters' keys. Asset and IOC links last `window_seconds`
+    since the key was last seen; MITRE links only `mitre_window_seconds`,
+    since a technique is shared by unrelated hosts far more often than an
+    IOC is. Clusters idle for a whole window are closed, and at most
+    `max_clusters` are kept (least recently updated evicted first).
+
+    A cluster stops growing once it holds `max_cluster_events` events or
+    spans `max_cluster_span_seconds`: further related events start a new
+    cluster, and clusters are only merged while the result stays within
+    both limits. This keeps a continuously active asset from chaining
+    unrelated activity into one ever-growing cluster. A full cluster stays
+    listed until it goes idle.
+
+    Clusters live in memory per worker and start empty after a restart.
+    Their IDs carry a random per-worker prefix, so a request reaching
+    another worker gets a 404 rather than a different cluster.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 3600,
+        mitre_window_seconds: int = 300,
+        max_clusters: int = 5000,
+        min_events: int = 2,
+        max_cluster_events: int = 500,
+        max_cluster_span_seconds: int = 86400,
+        clock: Callable[[], float] = time.time
+    ):
+        self.window_seconds = window_seconds
+        self.mitre_window_seconds = mitre_window_seconds
+        self.max_clusters = max_clusters
+        self.min_events = min_events
+        self.max_cluster_events = max_cluster_events
+        self.max_cluster_span_seconds = max_cluster_span_seconds
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.clusters: "OrderedDict[str, Cluster]" = OrderedDict()
+        # key -> (cluster id, when the key was last seen)
+        self.index: Dict[str, Tuple[str, float]] = {}
+        self._prefix = secrets.token_hex(4)
+        self._sequence = 0
+        self._observed = 0
+
+    def _full(self, cluster: Cluster, now: float, extra_events: int = 0, first_seen: Optional[float] = None) -> bool:
+        """Whether the cluster, with `extra_events` more events, would exceed a limit"""
+        first_seen = cluster.first_seen if first_seen is None else min(first_seen, cluster.first_seen)
+        return (
+            len(cluster.event_ids) + extra_events >= self.max_cluster_events
+            or now - first_seen >= self.max_cluster_span_seconds
+        )
+
+    def _open_cluster(self, key: str, now: float) -> Optional[Cluster]:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        cluster_id, seen = entry
+        limit = self.mitre_window_seconds if key.startswith("mitre:") else self.window_seconds
+        if now - seen > limit:
+            return None
+        cluster = self.clusters.get(cluster_id)
+        if cluster is None or now - cluster.last_seen > self.window_seconds or self._full(cluster, now):
+            return None
+        return cluster
+
+    def observe(self, event: dict) -> Cluster:
+        """Correlate an event; returns the cluster it joined"""
+        now = self.clock()
+        keys = event_keys(event)
+        found: Dict[str, Cluster] = {}
+        for key in keys:
+            cluster = self._open_cluster(key, now)
+            if cluster is not None:
+                found[cluster.id] = cluster
+
+        if found:
+            target = max(found.values(), key=lambda c: len(c.event_ids))
+            for cluster in sorted(found.values(), key=lambda c: len(c.event_ids), reverse=True):
+                if cluster is not target and not self._full(
+                    target, now, len(cluster.event_ids), cluster.first_seen
+                ):
+                    self._merge(target, cluster)
+        else:
+            self._sequence += 1
+            target = Cluster(f"CL-{self._prefix}-{self._sequence:06d}", now)
+            self.clusters[target.id] = target
+
+        target.add(event, now)
+        for key in keys:
+            self.index[key] = (target.id, now)
+            target.keys.add(key)
+        self.clusters.move_to_end(target.id)
+        while len(self.clusters) > self.max_clusters:
+            self._drop(next(iter(self.clusters.values())))
+
+        self._observed += 1
+        if self._observed % 1000 == 0:
+            self.expire()
+        return target
+
+    def observe_many(self, events: Iterable[dict]) -> List[Cluster]:
+        return [self.observe(event) for event in events]
+
+    def _merge(self, target: Cluster, other: Cluster):
+        target.absorb(other)
+        for key in other.keys:
+            entry = self.index.get(key)
+            if entry is not None and entry[0] == other.id:
+                self.index[key] = (target.id, entry[1])
+                target.keys.add(key)
+        del self.clusters[other.id]
+
+    def _drop(self, cluster: Cluster):
+        for key in cluster.keys:
+            entry = self.index.get(key)
+            if entry is not None and entry[0] == cluster.id:
+                del self.index[key]
+        del self.clusters[cluster.id]
+
+    def expire(self) -> int:
+        """Close clusters idle for a whole window; returns how many"""
+        now = self.clock()
+        idle = [c for c in self.clusters.values() if now - c.last_seen > self.window_seconds]
+        for cluster in idle:
+            self._drop(cluster)
+        return len(idle)
+
+    def get(self, cluster_id: str) -> Optional[Cluster]:
+        return self.clusters.get(cluster_id)
+
+    def candidates(self, min_events: Optional[int] = None) -> List[Cluster]:
+        """Open clusters large enough to be incidents, most severe and largest first"""
+        min_events = self.min_events if min_events is None else min_events
+        now = self.clock()
+        found = [
+            c for c in self.clusters.values()
+            if len(c.event_ids) >= min_events and now - c.last_seen <= self.window_seconds
+        ]
+        return sorted(found, key=lambda c: (SEVERITY_RANK[c.severity], len(c.event_ids)), reverse=True)
+
+
+# Global event correlator
+correlator = Correlator(
+    window_seconds=settings.CORRELATION_WINDOW_SECONDS,
+    mitre_window_seconds=settings.CORRELATION_MITRE_WINDOW_SECONDS,
+    max_clusters=settings.CORRELATION_MAX_CLUSTERS,
+    min_events=settings.CORRELATION_MIN_EVENTS,
+    max_cluster_events=settings.CORRELATION_MAX_CLUSTER_EVENTS,
+    max_cluster_span_seconds=settings.CORRELATION_MAX_CLUSTER_SPAN_SECONDS
+)
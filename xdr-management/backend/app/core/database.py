@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -6,28 +8,82 @@ import os
 # Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./xdr_management.db")
 
-# Create engine
+# asyncio drivers for the sync URLs accepted in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or "+" in parsed.drivername:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Sync engine, used for schema creation, migrations and seeding at startup
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
-# Session factory
+# Async engine, used by request handlers and background tasks
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # Must precede the first table; lets retention return freed pages in steps
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets readers proceed while another connection is writing
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite" and make_url(DATABASE_URL).database not in (None, "", ":memory:"):
+    event.listen(engine, "connect", _configure_sqlite)
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    # Handlers serialize objects after committing; keep them loaded
+    expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def connect_async_db():
+    """
+    Open the async engine's first connection before serving requests.
+
+    SQLAlchemy initializes the dialect on an engine's first connection while
+    holding a thread lock; coroutines racing to connect first on the event
+    loop thread would deadlock on it.
+    """
+    async with async_engine.connect():
+        pass
 
 
 def init_db():
-    """Initialize database tables"""
+    """Initialize database tables and apply pending schema migrations"""
+    from app.core.migrations import run_migrations
+
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
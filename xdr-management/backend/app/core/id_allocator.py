@@ -0,0 +1,112 @@
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Tuple
+
+from sqlalchemy import Integer, cast, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.db_models import IdSequence, SecurityEvent, Incident, User
+
+
+class IdAllocator:
+    """
+    Allocates human-readable sequential IDs (EVT-001, INC-2026-001, USR-004, ...).
+
+    Each process reserves a block of values with a single atomic UPDATE on
+    the `id_sequences` table and then hands IDs out from memory, so the cost
+    of an ID does not depend on table size. Blocks never overlap between
+    workers and sequences never move backwards, so deleted IDs are not
+    reused. Unused values of a block are skipped when a worker restarts.
+
+    Allocation runs on the event loop without a lock: handing out values
+    never awaits, and coroutines that find the pool empty at the same time
+    each reserve a block and queue it for later use.
+    """
+
+    def __init__(self, block_size: int = settings.ID_BLOCK_SIZE):
+        self.block_size = block_size
+        # (database url, sequence name) -> reserved [next value, end exclusive] ranges
+        self._blocks: Dict[Tuple[str, str], Deque[List[int]]] = {}
+
+    async def next_event_ids(self, db: AsyncSession, count: int = 1) -> List[str]:
+        """Allocate `count` security event IDs"""
+        values = await self._take(db, "event", "EVT-", SecurityEvent, count)
+        return [f"EVT-{str(n).zfill(3)}" for n in values]
+
+    async def next_event_id(self, db: AsyncSession) -> str:
+        """Allocate a single security event ID"""
+        return (await self.next_event_ids(db))[0]
+
+    async def next_incident_id(self, db: AsyncSession) -> str:
+        """Allocate an incident ID; numbering restarts every year"""
+        year = datetime.utcnow().year
+        prefix = f"INC-{year}-"
+        value = (await self._take(db, f"incident-{year}", prefix, Incident, 1))[0]
+        return f"{prefix}{str(value).zfill(3)}"
+
+    async def next_user_id(self, db: AsyncSession) -> str:
+        """Allocate a user ID"""
+        value = (await self._take(db, "user", "USR-", User, 1))[0]
+        return f"USR-{str(value).zfill(3)}"
+
+    def reset(self):
+        """Forget all reserved blocks"""
+        self._blocks.clear()
+
+    async def _take(self, db: AsyncSession, name: str, prefix: str, model, count: int) -> List[int]:
+        engine: AsyncEngine = db.bind
+        key = (str(engine.url), name)
+        values: List[int] = []
+
+        while len(values) < count:
+            ranges = self._blocks.setdefault(key, deque())
+            if not ranges:
+                needed = max(self.block_size, count - len(values))
+                ranges.append(list(await self._reserve(engine, name, prefix, model, needed)))
+                continue
+            block = ranges[0]
+            take = min(block[1] - block[0], count - len(values))
+            values.extend(range(block[0], block[0] + take))
+            block[0] += take
+            if block[0] >= block[1]:
+                ranges.popleft()
+
+        return values
+
+    async def _reserve(self, engine: AsyncEngine, name: str, prefix: str, model, size: int) -> Tuple[int, int]:
+        """Reserve `size` values in their own transaction, independent of the caller's"""
+        table = IdSequence.__table__
+        try:
+            async with engine.begin() as conn:
+                updated = await conn.execute(
+                    update(table)
+                    .where(table.c.name == name)
+                    .values(next_value=table.c.next_value + size)
+                )
+                if updated.rowcount:
+                    end = (await conn.execute(
+                        select(table.c.next_value).where(table.c.name == name)
+                    )).scalar_one()
+                    return end - size, end
+
+                # First use of this sequence: continue after the highest existing ID
+                start = await self._current_max(conn, prefix, model) + 1
+                await conn.execute(insert(table).values(name=name, next_value=start + size))
+                return start, start + size
+        except IntegrityError:
+            # Another worker created the sequence row concurrently
+            return await self._reserve(engine, name, prefix, model, size)
+
+    @staticmethod
+    async def _current_max(conn: AsyncConnection, prefix: str, model) -> int:
+        id_column = model.__table__.c.id
+        suffix = cast(func.substr(id_column, len(prefix) + 1), Integer)
+        return await conn.scalar(
+            select(func.max(suffix)).where(id_column.like(f"{prefix}%"))
+        ) or 0
+
+
+# Global ID allocator
+id_allocator = IdAllocator()
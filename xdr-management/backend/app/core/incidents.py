@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.id_allocator import id_allocator
+from app.core.stats import dashboard_stats
+from app.core.websocket import manager
+from app.db_models import Incident
+
+
+async def open_incident(
+    db: AsyncSession,
+    title: str,
+    severity: str,
+    actor: str,
+    description: str = "",
+    related_events: Optional[List[str]] = None,
+    assignee: Optional[str] = None,
+    affected_systems: int = 0,
+    created_action: str = "Incident created"
+) -> Incident:
+    """
+    Create an incident, commit it, and update the dashboard counters,
+    incident cache and connected clients
+    """
+    now = datetime.utcnow()
+    incident = Incident(
+        id=await id_allocator.next_incident_id(db),
+        title=title,
+        severity=severity,
+        status="in_progress",
+        assignee=assignee,
+        description=description,
+        affected_systems=affected_systems,
+        related_events=related_events or [],
+        timeline=[{
+            "time": now.strftime("%H:%M"),
+            "action": created_action,
+            "user": actor
+        }],
+        created_at=now,
+        updated_at=now
+    )
+
+    db.add(incident)
+    await db.commit()
+    await db.refresh(incident)
+    dashboard_stats.incident_created(incident.id, incident.status, incident.timeline)
+    response_cache.invalidate("incidents")
+
+    await manager.broadcast({
+        "type": "new_incident",
+        "data": {
+            "id": incident.id,
+            "title": incident.title,
+            "severity": incident.severity,
+            "status": incident.status
+        }
+    })
+    return incident
@@ -1,12 +1,10 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 import random
 
+from app.core.security import SEED_PASSWORD_HASHES
 from app.db_models import User, SecurityEvent, Incident, Asset, AlertRule
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def init_users(db: Session):
     """Initialize default users"""
@@ -16,7 +14,7 @@ def init_users(db: Session):
             "username": "admin",
             "email": "admin@xdr.local",
             "full_name": "System Administrator",
-            "hashed_password": pwd_context.hash("admin123"),
+            "hashed_password": SEED_PASSWORD_HASHES["admin"],
             "role": "admin",
             "is_active": True
         },
@@ -25,7 +23,7 @@ def init_users(db: Session):
             "username": "analyst",
             "email": "analyst@xdr.local",
             "full_name": "Security Analyst",
-            "hashed_password": pwd_context.hash("analyst123"),
+            "hashed_password": SEED_PASSWORD_HASHES["analyst"],
             "role": "analyst",
             "is_active": True
         },
@@ -34,7 +32,7 @@ def init_users(db: Session):
             "username": "viewer",
             "email": "viewer@xdr.local",
             "full_name": "Security Viewer",
-            "hashed_password": pwd_context.hash("viewer123"),
+            "hashed_password": SEED_PASSWORD_HASHES["viewer"],
             "role": "viewer",
             "is_active": True
         }
@@ -268,7 +266,7 @@ def init_alert_rules(db: Session):
             "name": "Brute Force Attack",
             "severity": "high",
             "enabled": True,
-            "conditions": "failed_logins > 5 AND time_window < 5min",
+            "conditions": "failed_logins > 5",
             "actions": ["notify_soc", "block_ip"]
         },
         {
@@ -0,0 +1,245 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, event, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db_models import SecurityEvent
+
+
+IOC_TABLE = "event_iocs"
+
+# Indicator types, checked in order; the first pattern that matches wins
+IOC_TYPES: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("ip", re.compile(r"^(\d{1,3}\.){3}\d{1,3}$|^[0-9a-f]{0,4}(:[0-9a-f]{0,4}){2,7}$")),
+    ("hash", re.compile(r"^([0-9a-f]{32}|[0-9a-f]{40}|[0-9a-f]{64})$")),
+    ("url", re.compile(r"^[a-z][a-z0-9+.-]*://")),
+    ("email", re.compile(r"^[^@\s/]+@[^@\s/]+\.[a-z]{2,}$")),
+    ("file", re.compile(r"\.(exe|dll|sys|scr|msi|bat|cmd|ps1|vbs|js|jar|sh|py|bin|elf|docm|xlsm)$")),
+    ("domain", re.compile(r"^([a-z0-9_-]+\.)+[a-z]{2,}$")),
+]
+IOC_TYPE_NAMES = frozenset(name for name, _ in IOC_TYPES) | {"other"}
+
+# Inverted index from normalized IOC value to the events mentioning it, kept
+# in sync by triggers so every write path (ORM, bulk executemany, archive and
+# retention deletes) updates it. The primary key serves value lookups.
+# Values are normalized like lookups (see parse_indicator): trimmed,
+# lowercased, and with a known "type:" prefix removed.
+_PREFIXES = ", ".join(f"'{name}'" for name in sorted(IOC_TYPE_NAMES))
+_INDEX_ROWS = (
+    "SELECT CASE WHEN instr(v, ':') > 1 "
+    f"AND trim(substr(v, 1, instr(v, ':') - 1)) IN ({_PREFIXES}) "
+    "AND trim(substr(v, instr(v, ':') + 1)) <> '' "
+    "THEN trim(substr(v, instr(v, ':') + 1)) ELSE v END, id "
+    "FROM (SELECT lower(trim(j.value)) AS v, {event}.id AS id "
+    "FROM {tables}json_each({event}.iocs) AS j "
+    "WHERE j.type = 'text' AND trim(j.value) <> '')"
+)
+
+_SQLITE_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {IOC_TABLE} (
+        value TEXT NOT NULL,
+        event_id TEXT NOT NULL,
+        PRIMARY KEY (value, event_id)
+    ) WITHOUT ROWID""",
+    f"CREATE INDEX IF NOT EXISTS ix_{IOC_TABLE}_event_id ON {IOC_TABLE} (event_id)",
+    f"""CREATE TRIGGER IF NOT EXISTS {IOC_TABLE}_ai AFTER INSERT ON security_events BEGIN
+        INSERT OR IGNORE INTO {IOC_TABLE}(value, event_id) {_INDEX_ROWS.format(event="new", tables="")};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {IOC_TABLE}_ad AFTER DELETE ON security_events BEGIN
+        DELETE FROM {IOC_TABLE} WHERE event_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {IOC_TABLE}_au AFTER UPDATE OF id, iocs ON security_events BEGIN
+        DELETE FROM {IOC_TABLE} WHERE event_id = old.id;
+        INSERT OR IGNORE INTO {IOC_TABLE}(value, event_id) {_INDEX_ROWS.format(event="new", tables="")};
+    END""",
+]
+
+# PostgreSQL indexes the lowercased IOC array itself; GIN answers ?| directly
+_POSTGRES_IOCS = "(lower(iocs::text)::jsonb)"
+
+_POSTGRES_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_security_events_iocs "
+    f"ON security_events USING gin ({_POSTGRES_IOCS})",
+]
+
+# Values per IN (...) / ?| query, well under SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# Database URL (without driver) -> whether an IOC index is installed
+_installed: Dict[str, bool] = {}
+
+
+class IocMatch(NamedTuple):
+    # Events mentioning the indicator
+    count: int
+    # The newest of them, newest first
+    event_ids: List[str]
+
+
+def normalize_ioc(value: str) -> str:
+    return value.strip().lower()
+
+
+def classify_ioc(value: str) -> str:
+    """Indicator type of a normalized IOC value, "other" when unrecognized"""
+    for ioc_type, pattern in IOC_TYPES:
+        if pattern.search(value):
+            return ioc_type
+    return "other"
+
+
+def parse_indicator(indicator: str) -> Tuple[Optional[str], str]:
+    """
+    Split an optional "type:" prefix (e.g. "ip:185.220.101.45") from an
+    indicator and normalize the value. Prefixes that are not IOC types are
+    part of the value, so URLs parse unchanged.
+    """
+    prefix, sep, rest = indicator.partition(":")
+    prefix = prefix.strip().lower()
+    if sep and prefix in IOC_TYPE_NAMES and rest.strip():
+        return prefix, normalize_ioc(rest)
+    return None, normalize_ioc(indicator)
+
+
+def _database_key(engine) -> str:
+    # Sync and asyncio engines for one database share an entry
+    url = engine.url
+    return str(url.set(drivername=url.get_backend_name()))
+
+
+def _json1_available(conn: Connection) -> bool:
+    try:
+        conn.exec_driver_sql("SELECT json_valid('[]')")
+    except DBAPIError:
+        return False
+    return True
+
+
+def install_ioc_index(conn: Connection) -> bool:
+    """
+    Create the IOC index for security events if the database supports one,
+    indexing any existing rows. Safe to run repeatedly.
+    """
+    dialect = conn.dialect.name
+    installed = False
+
+    if dialect == "sqlite" and _json1_available(conn):
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (IOC_TABLE,)
+        ).first()
+        for ddl in _SQLITE_DDL:
+            conn.exec_driver_sql(ddl)
+        if not exists:
+            conn.exec_driver_sql(
+                f"INSERT OR IGNORE INTO {IOC_TABLE}(value, event_id) "
+                + _INDEX_ROWS.format(event="e", tables="security_events AS e, ")
+            )
+        installed = True
+    elif dialect == "postgresql":
+        for ddl in _POSTGRES_DDL:
+            conn.exec_driver_sql(ddl)
+        installed = True
+
+    _installed[_database_key(conn.engine)] = installed
+    return installed
+
+
+def rebuild_ioc_index(conn: Connection) -> bool:
+    """Recreate the IOC index and its triggers, re-indexing every event"""
+    drop_ioc_index(conn)
+    return install_ioc_index(conn)
+
+
+def drop_ioc_index(conn: Connection):
+    """Drop the SQLite IOC table and the triggers that write to it"""
+    if conn.dialect.name == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {IOC_TABLE}_{suffix}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {IOC_TABLE}")
+    _installed.pop(_database_key(conn.engine), None)
+
+
+@event.listens_for(SecurityEvent.__table__, "after_create")
+def _after_create(target, connection, **kw):
+    install_ioc_index(connection)
+
+
+@event.listens_for(SecurityEvent.__table__, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_ioc_index(connection)
+
+
+async def ioc_index_enabled(db: AsyncSession) -> bool:
+    """Whether the session's database has an IOC index"""
+    bind = db.get_bind()
+    url = _database_key(bind)
+    if url not in _installed:
+        if bind.dialect.name == "sqlite":
+            _installed[url] = (await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": IOC_TABLE}
+            )).first() is not None
+        else:
+            _installed[url] = bind.dialect.name == "postgresql"
+    return _installed[url]
+
+
+def _group(rows, wanted: set, limit: int) -> Dict[str, IocMatch]:
+    """Matches from (id, timestamp, iocs) rows, for indexes that return whole events"""
+    found: Dict[str, List[Tuple]] = {}
+    for row in rows:
+        for value in {parse_indicator(ioc)[1] for ioc in row.iocs or [] if isinstance(ioc, str)}:
+            if value in wanted:
+                found.setdefault(value, []).append((row.timestamp, row.id))
+    matches = {}
+    for value, events in found.items():
+        events.sort(reverse=True)
+        matches[value] = IocMatch(len(events), [event_id for _, event_id in events[:limit]])
+    return matches
+
+
+async def lookup_iocs(db: AsyncSession, values: Iterable[str], limit: int = 100) -> Dict[str, IocMatch]:
+    """
+    Events mentioning each of the normalized IOC `values`.
+
+    Returns only the values that matched. Uses the IOC index when installed
+    (queried in chunks of LOOKUP_CHUNK_SIZE values), otherwise one scan of
+    every event's IOCs.
+    """
+    wanted = sorted(set(values))
+    if not wanted:
+        return {}
+
+    if not await ioc_index_enabled(db):
+        rows = await db.execute(select(SecurityEvent.id, SecurityEvent.timestamp, SecurityEvent.iocs))
+        return _group(rows, set(wanted), limit)
+
+    matches: Dict[str, IocMatch] = {}
+    postgres = db.get_bind().dialect.name == "postgresql"
+    for start in range(0, len(wanted), LOOKUP_CHUNK_SIZE):
+        chunk = wanted[start:start + LOOKUP_CHUNK_SIZE]
+        if postgres:
+            # The array holds IOCs as written, so also look for their prefixed forms
+            forms = chunk + [f"{name}:{value}" for name in sorted(IOC_TYPE_NAMES) for value in chunk]
+            rows = await db.execute(text(
+                f"SELECT id, timestamp, {_POSTGRES_IOCS} AS iocs FROM security_events "
+                f"WHERE {_POSTGRES_IOCS} ?| CAST(:values AS text[])"
+            ), {"values": forms})
+            matches.update(_group(rows, set(chunk), limit))
+            continue
+
+        rows = await db.execute(text(
+            f"SELECT value, event_id, total FROM ("
+            f"SELECT i.value, i.event_id, COUNT(*) OVER w AS total, "
+            f"ROW_NUMBER() OVER (w ORDER BY e.timestamp DESC, e.id DESC) AS n "
+            f"FROM {IOC_TABLE} i JOIN security_events e ON e.id = i.event_id "
+            f"WHERE i.value IN :values WINDOW w AS (PARTITION BY i.value)"
+            f") WHERE n <= :limit ORDER BY value, n"
+        ).bindparams(bindparam("values", expanding=True)), {"values": chunk, "limit": limit})
+        for row in rows:
+            match = matches.setdefault(row.value, IocMatch(row.total, []))
+            match.event_ids.append(row.event_id)
+
+    return matches
@@ -1,11 +1,15 @@
 import logging
 import json
+import os
 import sys
+from bisect import bisect_left
 from datetime import datetime
-from typing import Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from functools import wraps
 import time
 
+from app.core.config import settings
+
 
 class JSONFormatter(logging.Formatter):
     """JSON formatter for structured logging"""
@@ -166,73 +170,272 @@ def log_security_event(
 
 
 # Performance metrics
-class MetricsCollector:
-    """Simple metrics collector"""
-
-    def __init__(self):
-        self.metrics = {
-            "requests_total": 0,
-            "requests_by_endpoint": {},
-            "requests_by_status": {},
-            "response_times": [],
-            "errors_total": 0,
-            "websocket_connections": 0
+
+# Endpoint label of requests beyond the endpoint cardinality limit
+OVERFLOW_ENDPOINT = "<other>"
+
+# Upper bounds (ms) of the latency histogram buckets; one more bucket holds
+# everything slower. Shared by every histogram so they can be merged.
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram: constant memory, O(log buckets) to record"""
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, counts: Optional[List[int]] = None, total: float = 0.0):
+        self.counts = list(counts) if counts else [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.sum = total
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, value)] += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile by linear interpolation inside its bucket,
+        as Prometheus' histogram_quantile does. Values in the overflow
+        bucket are reported as the largest bound.
+        """
+        total = self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(LATENCY_BUCKETS_MS):
+                    return float(LATENCY_BUCKETS_MS[-1])
+                lower = LATENCY_BUCKETS_MS[i - 1] if i else 0.0
+                upper = LATENCY_BUCKETS_MS[i]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return float(LATENCY_BUCKETS_MS[-1])
+
+    def summary(self) -> dict:
+        count = self.count
+        return {
+            "count": count,
+            "avg_ms": round(self.sum / count, 2) if count else 0.0,
+            "p50_ms": round(self.quantile(0.50), 2),
+            "p95_ms": round(self.quantile(0.95), 2),
+            "p99_ms": round(self.quantile(0.99), 2)
         }
 
-    def record_request(self, endpoint: str, status: int, duration_ms: float):
-        """Record a request"""
-        self.metrics["requests_total"] += 1
 
-        if endpoint not in self.metrics["requests_by_endpoint"]:
-            self.metrics["requests_by_endpoint"][endpoint] = 0
-        self.metrics["requests_by_endpoint"][endpoint] += 1
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
 
-        status_group = f"{status // 100}xx"
-        if status_group not in self.metrics["requests_by_status"]:
-            self.metrics["requests_by_status"][status_group] = 0
-        self.metrics["requests_by_status"][status_group] += 1
 
-        # Keep last 1000 response times
-        self.metrics["response_times"].append(duration_ms)
-        if len(self.metrics["response_times"]) > 1000:
-            self.metrics["response_times"] = self.metrics["response_times"][-1000:]
+class MetricsCollector:
+    """
+    Request and WebSocket metrics with per-endpoint latency histograms.
+
+    Recording is one bucket increment per request with no locking: requests
+    are recorded on the event loop thread only. Each worker keeps its own
+    metrics; with `multiproc_dir` set, `flush` writes this worker's
+    snapshot to a file there and `collect` adds up the snapshots of every
+    worker, so any worker can report the whole deployment. Counters of
+    exited workers are kept; their open WebSocket counts are not.
+
+    Endpoints are expected to be route templates. At most `max_endpoints`
+    get their own histogram; requests to any further endpoint are counted
+    under OVERFLOW_ENDPOINT, so memory stays bounded whatever the labels.
+    """
+
+    def __init__(self, multiproc_dir: str = "", max_endpoints: int = 500):
+        self.multiproc_dir = multiproc_dir
+        self.max_endpoints = max_endpoints
+        self.websocket_connections = 0
+        self.reset()
+
+    def record_request(self, endpoint: str, status: int, duration_ms: float):
+        """Record a request"""
+        histogram = self.endpoints.get(endpoint)
+        if histogram is None:
+            if len(self.endpoints) >= self.max_endpoints:
+                endpoint = OVERFLOW_ENDPOINT
+                histogram = self.endpoints.get(endpoint)
+            if histogram is None:
+                histogram = self.endpoints[endpoint] = Histogram()
+        histogram.observe(duration_ms)
 
+        status_group = f"{status // 100}xx"
+        self.requests_by_status[status_group] = self.requests_by_status.get(status_group, 0) + 1
         if status >= 500:
-            self.metrics["errors_total"] += 1
+            self.errors_total += 1
 
     def record_websocket_connect(self):
         """Record WebSocket connection"""
-        self.metrics["websocket_connections"] += 1
+        self.websocket_connections += 1
 
     def record_websocket_disconnect(self):
         """Record WebSocket disconnection"""
-        self.metrics["websocket_connections"] = max(0, self.metrics["websocket_connections"] - 1)
+        self.websocket_connections = max(0, self.websocket_connections - 1)
+
+    # ---- Snapshots and multiprocess aggregation ----
+
+    def snapshot(self) -> dict:
+        """This worker's metrics as plain JSON-serializable data"""
+        return {
+            "pid": os.getpid(),
+            "requests_by_status": dict(self.requests_by_status),
+            "errors_total": self.errors_total,
+            "websocket_connections": self.websocket_connections,
+            "endpoints": {
+                endpoint: {"counts": list(h.counts), "sum": h.sum}
+                for endpoint, h in self.endpoints.items()
+            }
+        }
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics_{pid}.json")
+
+    def write_snapshot(self, snapshot: dict):
+        """Write a snapshot for the other workers to aggregate (multiprocess mode only)"""
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = self._snapshot_path(snapshot["pid"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        self.write_snapshot(self.snapshot())
+
+    def _worker_snapshots(self) -> List[dict]:
+        own = self.snapshot()
+        snapshots = [own]
+        if not self.multiproc_dir or not os.path.isdir(self.multiproc_dir):
+            return snapshots
+        for name in os.listdir(self.multiproc_dir):
+            if not (name.startswith("metrics_") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get("pid") == own["pid"]:
+                # This worker's live metrics are newer than its file
+                continue
+            if not _pid_alive(snapshot.get("pid", 0)):
+                snapshot["websocket_connections"] = 0
+            snapshots.append(snapshot)
+        return snapshots
+
+    def collect(self) -> Tuple[Dict[str, int], int, int, Dict[str, Histogram], int]:
+        """
+        Metrics of every worker added up: (requests by status, errors,
+        WebSocket connections, histogram per endpoint, number of workers)
+        """
+        by_status: Dict[str, int] = {}
+        errors = connections = 0
+        endpoints: Dict[str, Histogram] = {}
+        snapshots = self._worker_snapshots()
+        for snapshot in snapshots:
+            for group, count in snapshot["requests_by_status"].items():
+                by_status[group] = by_status.get(group, 0) + count
+            errors += snapshot["errors_total"]
+            connections += snapshot["websocket_connections"]
+            for endpoint, data in snapshot["endpoints"].items():
+                histogram = endpoints.get(endpoint)
+                if histogram is None:
+                    histogram = endpoints[endpoint] = Histogram()
+                histogram.merge(Histogram(data["counts"], data["sum"]))
+        return by_status, errors, connections, endpoints, len(snapshots)
 
     def get_metrics(self) -> dict:
-        """Get current metrics"""
-        response_times = self.metrics["response_times"]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
+        """Get current metrics, across all workers in multiprocess mode"""
+        by_status, errors, connections, endpoints, workers = self.collect()
+        overall = Histogram()
+        for histogram in endpoints.values():
+            overall.merge(histogram)
+        summary = overall.summary()
 
         return {
-            "requests_total": self.metrics["requests_total"],
-            "requests_by_endpoint": self.metrics["requests_by_endpoint"],
-            "requests_by_status": self.metrics["requests_by_status"],
-            "avg_response_time_ms": round(avg_response_time, 2),
-            "errors_total": self.metrics["errors_total"],
-            "websocket_connections": self.metrics["websocket_connections"]
+            "requests_total": summary["count"],
+            "requests_by_endpoint": {e: h.count for e, h in endpoints.items()},
+            "requests_by_status": by_status,
+            "avg_response_time_ms": summary["avg_ms"],
+            "p50_response_time_ms": summary["p50_ms"],
+            "p95_response_time_ms": summary["p95_ms"],
+            "p99_response_time_ms": summary["p99_ms"],
+            "latency_by_endpoint": {e: h.summary() for e, h in endpoints.items()},
+            "errors_total": errors,
+            "websocket_connections": connections,
+            "workers": workers
         }
 
+    def render_prometheus(self) -> str:
+        """Current metrics in the Prometheus text exposition format"""
+        by_status, errors, connections, endpoints, _ = self.collect()
+        lines = [
+            "# HELP xdr_http_requests_total HTTP requests by status class.",
+            "# TYPE xdr_http_requests_total counter",
+        ]
+        for group, count in sorted(by_status.items()):
+            lines.append(f'xdr_http_requests_total{{status="{group}"}} {count}')
+
+        lines += [
+            "# HELP xdr_http_request_duration_seconds HTTP request latency by endpoint.",
+            "# TYPE xdr_http_request_duration_seconds histogram",
+        ]
+        for endpoint, histogram in sorted(endpoints.items()):
+            label = _escape_label(endpoint)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'xdr_http_request_duration_seconds_bucket{{endpoint="{label}",le="{bound / 1000:g}"}} {cumulative}'
+                )
+            lines.append(
+                f'xdr_http_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f'xdr_http_request_duration_seconds_sum{{endpoint="{label}"}} {histogram.sum / 1000:.6f}')
+            lines.append(f'xdr_http_request_duration_seconds_count{{endpoint="{label}"}} {histogram.count}')
+
+        lines += [
+            "# HELP xdr_http_errors_total HTTP requests that failed with a 5xx status.",
+            "# TYPE xdr_http_errors_total counter",
+            f"xdr_http_errors_total {errors}",
+            "# HELP xdr_websocket_connections Open WebSocket connections.",
+            "# TYPE xdr_websocket_connections gauge",
+            f"xdr_websocket_connections {connections}",
+        ]
+        return "\n".join(lines) + "\n"
+
     def reset(self):
-        """Reset metrics"""
-        self.metrics = {
-            "requests_total": 0,
-            "requests_by_endpoint": {},
-            "requests_by_status": {},
-            "response_times": [],
-            "errors_total": 0,
-            "websocket_connections": self.metrics["websocket_connections"]  # Keep current connections
-        }
+        """Reset this worker's metrics, keeping current WebSocket connections"""
+        self.endpoints: Dict[str, Histogram] = {}
+        self.requests_by_status: Dict[str, int] = {}
+        self.errors_total = 0
 
 
 # Global metrics collector
-metrics = MetricsCollector()
+metrics = MetricsCollector(
+    multiproc_dir=settings.METRICS_MULTIPROC_DIR,
+    max_endpoints=settings.METRICS_MAX_ENDPOINTS
+)
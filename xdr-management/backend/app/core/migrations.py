@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.core.iocs import install_ioc_index, rebuild_ioc_index
+from app.core.search import install_search_index
+from app.db_models import SchemaMigration
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _add_hot_filter_indexes(conn: Connection):
+    # Matches the filters and sort orders used by the list and dashboard endpoints
+    statements = [
+        "CREATE INDEX IF NOT EXISTS ix_security_events_timestamp_id "
+        "ON security_events (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS ix_security_events_severity_timestamp "
+        "ON security_events (severity, timestamp DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_security_events_status_timestamp "
+        "ON security_events (status, timestamp DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_security_events_status_updated_at "
+        "ON security_events (status, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_incidents_created_at ON incidents (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_incidents_status_created_at "
+        "ON incidents (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_assets_status ON assets (status)",
+        "CREATE INDEX IF NOT EXISTS ix_audit_logs_timestamp ON audit_logs (timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_audit_logs_resource "
+        "ON audit_logs (resource_type, resource_id)",
+    ]
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+
+def _add_search_index(conn: Connection):
+    install_search_index(conn)
+
+
+def _add_ioc_index(conn: Connection):
+    install_ioc_index(conn)
+
+
+def _rebuild_ioc_index(conn: Connection):
+    rebuild_ioc_index(conn)
+
+
+# Ordered schema changes. Never edit an applied migration; append a new one.
+# Upgrades must be idempotent, since create_all already builds the current
+# schema for new databases.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Composite indexes for hot filter and sort columns", _add_hot_filter_indexes),
+    Migration(2, "Full-text search index for security events", _add_search_index),
+    Migration(3, "IOC inverted index for security events", _add_ioc_index),
+    Migration(4, "Key the full-text index on stable integer keys", _add_search_index),
+    Migration(5, "Strip type prefixes from indexed IOC values", _rebuild_ioc_index),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Versions already recorded in schema_migrations"""
+    table = SchemaMigration.__table__
+    table.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return list(conn.execute(select(table.c.version).order_by(table.c.version)).scalars())
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply pending migrations in order, each in its own transaction"""
+    table = SchemaMigration.__table__
+    done = set(applied_versions(engine))
+    applied = []
+
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(insert(table).values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another worker applied it concurrently
+            continue
+        applied.append(migration.version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from app.core.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    newly_applied = run_migrations(engine)
+    print(f"Applied migrations: {newly_applied or 'none'}")
+    print(f"Schema version: {max(applied_versions(engine), default=0)}")
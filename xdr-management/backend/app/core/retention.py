@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.archive import ARCHIVE_TABLES, cold_archive
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.stats import dashboard_stats
+from app.db_models import AuditLog, SecurityEvent
+
+# SQLite auto_vacuum mode that lets freed pages be returned in steps
+INCREMENTAL_VACUUM = 2
+
+
+class RetentionPolicy(NamedTuple):
+    table: str
+    model: Any
+    ttl_days: int
+    # Extra WHERE clauses selecting the rows this TTL applies to
+    criteria: tuple = ()
+
+
+class RetentionManager:
+    """
+    Deletes rows whose TTL has passed, in small batches.
+
+    Each batch deletes at most `batch_size` rows in its own short
+    transaction and yields to the event loop, so the write lock is never
+    held for long and requests interleave with a large purge. Event TTLs
+    are per severity; severities without a TTL, and TTLs of 0, keep rows
+    forever. After purging, SQLite databases in incremental auto_vacuum
+    mode return the freed pages to the filesystem a step at a time
+    (databases created before that mode was enabled need a one-off
+    `PRAGMA auto_vacuum=INCREMENTAL; VACUUM;` first).
+
+    With RETENTION_ARCHIVE enabled, a run first moves rows older than
+    ARCHIVE_AFTER_DAYS to the date-partitioned Parquet archive, and drops
+    whole archived days once they are older than RETENTION_ARCHIVE_DAYS.
+    """
+
+    def __init__(
+        self,
+        event_days: Dict[str, int],
+        audit_days: int,
+        batch_size: int = 1000,
+        vacuum_pages: int = 1000
+    ):
+        self.event_days = event_days
+        self.audit_days = audit_days
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+
+    def policies(self) -> List[RetentionPolicy]:
+        policies = [
+            RetentionPolicy("security_events", SecurityEvent, days, (SecurityEvent.severity == severity,))
+            for severity, days in self.event_days.items()
+        ]
+        policies.append(RetentionPolicy("audit_logs", AuditLog, self.audit_days))
+        return [policy for policy in policies if policy.ttl_days > 0]
+
+    async def purge(self, db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Delete expired rows; returns the number deleted per table"""
+        now = now or datetime.utcnow()
+        deleted = {"security_events": 0, "audit_logs": 0}
+        for policy in self.policies():
+            cutoff = now - timedelta(days=policy.ttl_days)
+            deleted[policy.table] += await self._delete_expired(db, policy, cutoff)
+        return deleted
+
+    async def _delete_expired(self, db: AsyncSession, policy: RetentionPolicy, cutoff: datetime) -> int:
+        model = policy.model
+        total = 0
+        while True:
+            # Served by the (severity, timestamp) and timestamp indexes
+            batch = (
+                select(model.id)
+                .where(*policy.criteria, model.timestamp < cutoff)
+                .limit(self.batch_size)
+            )
+            result = await db.execute(delete(model).where(model.id.in_(batch)))
+            await db.commit()
+            total += result.rowcount
+            if result.rowcount < self.batch_size:
+                return total
+            await asyncio.sleep(0)
+
+    async def vacuum(self, db: AsyncSession) -> int:
+        """Return free pages to the filesystem (SQLite in incremental auto_vacuum mode); returns pages freed"""
+        if db.bind.dialect.name != "sqlite":
+            return 0
+        mode = (await db.execute(text("PRAGMA auto_vacuum"))).scalar()
+        if mode != INCREMENTAL_VACUUM:
+            return 0
+
+        freed = 0
+        while True:
+            free = (await db.execute(text("PRAGMA freelist_count"))).scalar()
+            if not free:
+                return freed
+            await db.execute(text(f"PRAGMA incremental_vacuum({min(free, self.vacuum_pages)})"))
+            await db.commit()
+            freed += min(free, self.vacuum_pages)
+            await asyncio.sleep(0)
+
+    async def run(self, db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """One full retention pass: archive, purge, prune archived days, vacuum"""
+        now = now or datetime.utcnow()
+        report: Dict[str, Any] = {"archived": {}, "deleted": {}, "partitions_dropped": {}, "pages_freed": 0}
+
+        if settings.RETENTION_ARCHIVE and cold_archive.available:
+            report["archived"] = await cold_archive.archive(
+                db, now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+            )
+            if settings.RETENTION_ARCHIVE_DAYS > 0:
+                oldest = (now - timedelta(days=settings.RETENTION_ARCHIVE_DAYS)).date()
+                for table in ARCHIVE_TABLES:
+                    report["partitions_dropped"][table] = await asyncio.to_thread(
+                        cold_archive.drop_partitions_before, table, oldest
+                    )
+
+        report["deleted"] = await self.purge(db, now)
+        report["pages_freed"] = await self.vacuum(db)
+
+        if report["deleted"]["security_events"] or report["archived"].get("security_events"):
+            response_cache.invalidate("events")
+            await dashboard_stats.reconcile(db)
+        return report
+
+
+# Global retention manager
+retention = RetentionManager(
+    settings.RETENTION_EVENT_DAYS,
+    settings.RETENTION_AUDIT_DAYS,
+    batch_size=settings.RETENTION_BATCH_SIZE,
+    vacuum_pages=settings.RETENTION_VACUUM_PAGES
+)
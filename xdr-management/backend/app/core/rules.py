@@ -0,0 +1,584 @@
+import asyncio
+import operator
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.incidents import open_incident
+from app.core.logging import log_security_event, logger
+from app.core.websocket import manager
+from app.core.windows import WindowAggregator, window_aggregator
+from app.db_models import AlertRule
+
+
+class RuleSyntaxError(ValueError):
+    """An alert rule condition that cannot be parsed"""
+
+
+# ---- Condition language ----
+#
+#   condition := or
+#   or        := and ("OR" and)*
+#   and       := not ("AND" not)*
+#   not       := "NOT" not | "(" or ")" | atom
+#   atom      := field [op value]          (a bare field tests that it is truthy)
+#   op        := = != > >= < <=
+#   value     := number[unit] | word | "quoted string"
+#
+# Numbers may carry a duration (s, min, h, d -> seconds) or size
+# (B, KB, MB, GB, TB -> bytes) unit, so `time_window < 5min` compares
+# against 300 and `data_transfer > 1GB` against 1073741824. Keywords and
+# string comparisons are case-insensitive.
+
+TOKEN_RE = re.compile(
+    r"""\s*(?:(?P<op>!=|>=|<=|=|>|<)|(?P<paren>[()])|(?P<string>"[^"]*"|'[^']*')|(?P<word>[^\s()!=<>"']+))\s*"""
+)
+NUMBER_RE = re.compile(r"^(-?\d+(?:\.\d+)?)([a-zA-Z]*)$")
+
+UNITS = {
+    "": 1, "s": 1, "sec": 1, "min": 60, "h": 3600, "hr": 3600, "d": 86400,
+    "b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4,
+}
+
+COMPARATORS = {
+    "=": operator.eq, "!=": operator.ne,
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+}
+
+KEYWORDS = ("AND", "OR", "NOT")
+
+
+class Atom(NamedTuple):
+    field: str
+    # None for a bare field (truthiness test)
+    op: Optional[str] = None
+    value: Union[str, float, None] = None
+
+
+# Parsed conditions: ("atom", Atom) | ("not", node) | ("and", [nodes]) | ("or", [nodes])
+Node = Tuple[str, object]
+
+
+def parse_number(text: str) -> Optional[float]:
+    """`5min` -> 300.0, `1GB` -> 1073741824.0, `7` -> 7.0; None if not a number"""
+    match = NUMBER_RE.match(text.strip())
+    if not match or match.group(2).lower() not in UNITS:
+        return None
+    return float(match.group(1)) * UNITS[match.group(2).lower()]
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    text = text.strip()
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match:
+            raise RuleSyntaxError(f"Unexpected input at {pos}: {text[pos:]!r}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise RuleSyntaxError("Empty condition")
+        node = self._or()
+        if self.pos < len(self.tokens):
+            raise RuleSyntaxError(f"Unexpected {self.tokens[self.pos][1]!r} in {self.text!r}")
+        return node
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise RuleSyntaxError(f"Unexpected end of {self.text!r}")
+        self.pos += 1
+        return token
+
+    def _keyword(self, keyword: str) -> bool:
+        token = self._peek()
+        if token is not None and token[0] == "word" and token[1].upper() == keyword:
+            self.pos += 1
+            return True
+        return False
+
+    def _or(self) -> Node:
+        parts = [self._and()]
+        while self._keyword("OR"):
+            parts.append(self._and())
+        return parts[0] if len(parts) == 1 else ("or", parts)
+
+    def _and(self) -> Node:
+        parts = [self._not()]
+        while self._keyword("AND"):
+            parts.append(self._not())
+        return parts[0] if len(parts) == 1 else ("and", parts)
+
+    def _not(self) -> Node:
+        if self._keyword("NOT"):
+            return ("not", self._not())
+        kind, text = self._next()
+        if (kind, text) == ("paren", "("):
+            node = self._or()
+            if self._next() != ("paren", ")"):
+                raise RuleSyntaxError(f"Missing ')' in {self.text!r}")
+            return node
+        if kind != "word" or text.upper() in KEYWORDS:
+            raise RuleSyntaxError(f"Expected a field, got {text!r} in {self.text!r}")
+
+        token = self._peek()
+        if token is None or token[0] != "op":
+            return ("atom", Atom(text))
+        op = self._next()[1]
+        kind, raw = self._next()
+        if kind == "string":
+            value: Union[str, float] = raw[1:-1]
+        elif kind == "word":
+            number = parse_number(raw)
+            value = raw if number is None else number
+        else:
+            raise RuleSyntaxError(f"Expected a value after {text} {op} in {self.text!r}")
+        if isinstance(value, str) and op not in ("=", "!="):
+            raise RuleSyntaxError(f"{text} {op} needs a numeric value in {self.text!r}")
+        return ("atom", Atom(text, op, value))
+
+
+def parse_condition(text: str) -> Node:
+    return _Parser(text).parse()
+
+
+def _as_number(value) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_number(str(value))
+
+
+def atom_test(atom: Atom) -> Callable[[dict], bool]:
+    """Compile one atom into a test over an event's facts; a missing fact never matches"""
+    field = atom.field
+    if atom.op is None:
+        return lambda facts: bool(facts.get(field))
+
+    compare = COMPARATORS[atom.op]
+    if isinstance(atom.value, float):
+        expected_number = atom.value
+
+        def test_number(facts: dict) -> bool:
+            actual = _as_number(facts.get(field))
+            return actual is not None and compare(actual, expected_number)
+        return test_number
+
+    expected = atom.value.lower()
+
+    def test_string(facts: dict) -> bool:
+        actual = facts.get(field)
+        return actual is not None and compare(str(actual).lower(), expected)
+    return test_string
+
+
+# A compiled condition takes the event facts and a per-event memo of atom results
+Predicate = Callable[[dict, dict], bool]
+
+
+class RuleCompiler:
+    """
+    Compiles conditions into closures. Atoms are interned across every rule
+    compiled by one compiler, and each is evaluated at most once per event
+    (its result is memoized), so rules sharing a test share its cost.
+    """
+
+    def __init__(self):
+        self.atoms: Dict[Atom, int] = {}
+        self.tests: List[Callable[[dict], bool]] = []
+
+    def compile(self, node: Node) -> Predicate:
+        kind = node[0]
+        if kind == "atom":
+            return self._compile_atom(node[1])
+        if kind == "not":
+            inner = self.compile(node[1])
+            return lambda facts, memo: not inner(facts, memo)
+        parts = [self.compile(part) for part in node[1]]
+        if kind == "and":
+            return lambda facts, memo: all(part(facts, memo) for part in parts)
+        return lambda facts, memo: any(part(facts, memo) for part in parts)
+
+    def _compile_atom(self, atom: Atom) -> Predicate:
+        index = self.atoms.get(atom)
+        if index is None:
+            index = self.atoms[atom] = len(self.tests)
+            self.tests.append(atom_test(atom))
+        test = self.tests[index]
+
+        def evaluate(facts: dict, memo: dict) -> bool:
+            result = memo.get(index)
+            if result is None:
+                result = memo[index] = test(facts)
+            return result
+        return evaluate
+
+
+def index_key(node: Node) -> Optional[Atom]:
+    """
+    A conjunct every match must satisfy that can be looked up from the
+    event: a string equality (preferred) or a bare flag. None if the
+    condition has no such conjunct.
+    """
+    conjuncts = node[1] if node[0] == "and" else [node]
+    atoms = [part[1] for part in conjuncts if part[0] == "atom"]
+    for atom in atoms:
+        if atom.op == "=" and isinstance(atom.value, str):
+            return atom
+    for atom in atoms:
+        if atom.op is None:
+            return atom
+    return None
+
+
+# ---- Event facts ----
+
+# Boolean facts set from the event type, as referenced by rule conditions
+EVENT_TYPE_FLAGS = {
+    "Malware Detection": "malware_detected",
+    "Port Scan": "port_scan_detected",
+    "Brute Force Attack": "brute_force_detected",
+    "Data Exfiltration": "data_exfiltration_detected",
+    "Suspicious Login": "suspicious_login",
+    "Privilege Escalation": "privilege_change",
+}
+
+
+def event_facts(event: dict, window_facts: Optional[dict] = None) -> dict:
+    """
+    Facts a condition can reference: the event's fields, its type flag and
+    the windowed counts for its keys (see app.core.windows)
+    """
+    facts = dict(event)
+    flag = EVENT_TYPE_FLAGS.get(event.get("type"))
+    if flag:
+        facts[flag] = True
+    if window_facts:
+        facts.update(window_facts)
+    return facts
+
+
+# ---- Actions ----
+
+class CompiledRule(NamedTuple):
+    id: str
+    name: str
+    severity: str
+    conditions: str
+    actions: List[str]
+    predicate: Predicate
+
+
+class ActionContext(NamedTuple):
+    db: AsyncSession
+    rule: CompiledRule
+    event: dict
+
+
+ActionHandler = Callable[[ActionContext], Awaitable[None]]
+
+# Rule actions by name, as listed in AlertRule.actions
+ACTIONS: Dict[str, ActionHandler] = {}
+
+
+def register_action(name: str):
+    """Register an action handler: `@register_action("block_ip")`"""
+    def decorator(handler: ActionHandler) -> ActionHandler:
+        ACTIONS[name] = handler
+        return handler
+    return decorator
+
+
+def alert_payload(context: ActionContext) -> dict:
+    return {
+        "ruleId": context.rule.id,
+        "ruleName": context.rule.name,
+        "severity": context.rule.severity,
+        "eventId": context.event.get("id"),
+        "source": context.event.get("source"),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+@register_action("notify_soc")
+async def notify_soc(context: ActionContext):
+    await manager.broadcast({"type": "alert", "data": alert_payload(context)})
+
+
+@register_action("create_incident")
+async def create_incident(context: ActionContext):
+    await open_incident(
+        context.db,
+        title=f"{context.rule.name}: {context.event.get('source')}",
+        severity=context.rule.severity,
+        actor="rule-engine",
+        description=context.event.get("description") or "",
+        related_events=[context.event.get("id")],
+        affected_systems=1,
+        created_action=f"Incident created by rule {context.rule.id}"
+    )
+
+
+@register_action("log_event")
+@register_action("create_alert")
+async def log_alert(context: ActionContext):
+    log_security_event(
+        f"Alert rule {context.rule.id}",
+        context.rule.severity,
+        context.rule.name,
+        alert_payload(context)
+    )
+
+
+# Response actions need an EDR / firewall integration; until one is
+# configured they are recorded in the security log
+@register_action("isolate_host")
+@register_action("block_ip")
+@register_action("block_transfer")
+async def request_response(context: ActionContext):
+    log_security_event(
+        f"Response action requested by rule {context.rule.id}",
+        context.rule.severity,
+        f"{context.rule.name}: no responder configured",
+        alert_payload(context)
+    )
+
+
+# ---- Engine ----
+
+class RuleMatch(NamedTuple):
+    rule: CompiledRule
+    event: dict
+
+
+class RuleEngine:
+    """
+    Evaluates enabled alert rules against ingested events and runs their
+    actions.
+
+    Rules are indexed by a conjunct each match requires (e.g.
+    `severity=critical` or `malware_detected`), so an event is only
+    evaluated against rules whose indexed conjunct it satisfies, plus
+    the rules that have none. Rules are reloaded when the "alerts" cache
+    version changes, which every alert rule update bumps; with the SQLite
+    cache backend this reaches every worker.
+
+    A rule fires at most once per `cooldown_seconds` for one event source;
+    later matches in that time are counted as suppressed. While the engine
+    is running, fired actions are queued for a background task with its
+    own database session, so ingestion does not wait on them; otherwise
+    they run before `process` returns.
+    """
+
+    def __init__(
+        self,
+        windows: Optional[WindowAggregator] = None,
+        cooldown_seconds: float = 0,
+        queue_size: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        # Every processed event is counted here, feeding threshold facts
+        self.windows = windows
+        self.cooldown_seconds = cooldown_seconds
+        self.queue_size = queue_size
+        self.clock = clock
+        # Created in start(), on the event loop that serves requests
+        self.queue: Optional["asyncio.Queue[Optional[RuleMatch]]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self):
+        """Forget the loaded rules and their cooldowns"""
+        self.rules: List[CompiledRule] = []
+        self.errors: Dict[str, str] = {}
+        self._version: Optional[int] = None
+        self._equals: Dict[str, Dict[str, List[int]]] = {}
+        self._flags: Dict[str, List[int]] = {}
+        self._unindexed: List[int] = []
+        # (rule ID, event source) -> when the rule last fired for it, oldest first
+        self._fired: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.suppressed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Run every queued action and stop the background task"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self.queue.put(None)
+        await task
+
+    async def join(self):
+        """Wait until every queued action has run"""
+        if self.queue is not None:
+            await self.queue.join()
+
+    def load(self, rules: Iterable[AlertRule]):
+        """
+        Compile and index enabled rules, replacing the loaded set. Cooldowns
+        of rules that are no longer loaded are dropped, so a re-enabled rule
+        starts without one.
+        """
+        fired, suppressed = self._fired, self.suppressed
+        self.reset()
+        compiler = RuleCompiler()
+        for rule in rules:
+            if not rule.enabled:
+                continue
+            try:
+                node = parse_condition(rule.conditions or "")
+            except RuleSyntaxError as e:
+                self.errors[rule.id] = str(e)
+                logger.warning(f"Alert rule {rule.id} skipped: {e}")
+                continue
+
+            unknown = [action for action in rule.actions or [] if action not in ACTIONS]
+            if unknown:
+                logger.warning(f"Alert rule {rule.id} has unknown actions: {', '.join(unknown)}")
+
+            position = len(self.rules)
+            self.rules.append(CompiledRule(
+                rule.id, rule.name, rule.severity, rule.conditions,
+                list(rule.actions or []), compiler.compile(node)
+            ))
+            key = index_key(node)
+            if key is None:
+                self._unindexed.append(position)
+            elif key.op is None:
+                self._flags.setdefault(key.field, []).append(position)
+            else:
+                self._equals.setdefault(key.field, {}).setdefault(key.value.lower(), []).append(position)
+
+        loaded = {rule.id for rule in self.rules}
+        self._fired = OrderedDict((key, at) for key, at in fired.items() if key[0] in loaded)
+        self.suppressed = suppressed
+
+    async def refresh(self, db: AsyncSession):
+        """Reload rules if they changed since the last load"""
+        version = response_cache.version("alerts")
+        if version == self._version:
+            return
+        rules = (await db.execute(select(AlertRule).where(AlertRule.enabled.is_(True)).order_by(AlertRule.id))).scalars().all()
+        self.load(rules)
+        self._version = version
+
+    def candidates(self, facts: dict) -> List[int]:
+        """Positions of the rules that can match, in rule order"""
+        positions: Set[int] = set(self._unindexed)
+        for field, by_value in self._equals.items():
+            value = facts.get(field)
+            if value is not None:
+                positions.update(by_value.get(str(value).lower(), ()))
+        for field, rule_positions in self._flags.items():
+            if facts.get(field):
+                positions.update(rule_positions)
+        return sorted(positions)
+
+    def match(self, event: dict, window_facts: Optional[dict] = None) -> List[CompiledRule]:
+        """Rules whose condition the event satisfies"""
+        facts = event_facts(event, window_facts)
+        memo: dict = {}
+        return [
+            self.rules[i] for i in self.candidates(facts)
+            if self.rules[i].predicate(facts, memo)
+        ]
+
+    def cooling_down(self, rule: CompiledRule, event: dict) -> bool:
+        """Whether `rule` fired for the event's source within the cooldown; records a firing if not"""
+        if self.cooldown_seconds <= 0:
+            return False
+        now = self.clock()
+        while self._fired and next(iter(self._fired.values())) <= now - self.cooldown_seconds:
+            self._fired.popitem(last=False)
+        key = (rule.id, str(event.get("source") or ""))
+        if key in self._fired:
+            return True
+        self._fired[key] = now
+        return False
+
+    async def process(self, db: AsyncSession, events: Iterable[dict]) -> List[RuleMatch]:
+        """
+        Evaluate ingested events and run (or queue) the actions of every
+        matching rule that is not cooling down; returns the matches that fired
+        """
+        await self.refresh(db)
+        fired = []
+        for event in events:
+            for rule in self.match(event, self.windows.observe(event) if self.windows else None):
+                if self.cooling_down(rule, event):
+                    self.suppressed += 1
+                else:
+                    fired.append(RuleMatch(rule, event))
+
+        if self._task is None:
+            for match in fired:
+                await self.run_actions(db, match)
+        else:
+            for match in fired:
+                # Blocks only when the queue is full, pushing back on ingestion
+                await self.queue.put(match)
+        return fired
+
+    @staticmethod
+    async def run_actions(db: AsyncSession, match: RuleMatch):
+        context = ActionContext(db, match.rule, match.event)
+        for name in match.rule.actions:
+            handler = ACTIONS.get(name)
+            if handler is None:
+                continue
+            try:
+                await handler(context)
+            except Exception as e:
+                logger.error(f"Alert rule {match.rule.id} action {name} failed: {e}")
+
+    async def _run(self):
+        while True:
+            match = await self.queue.get()
+            try:
+                if match is None:
+                    return
+                async with AsyncSessionLocal() as db:
+                    await self.run_actions(db, match)
+            except Exception as e:
+                logger.error(f"Alert rule {match.rule.id} actions failed: {e}")
+            finally:
+                self.queue.task_done()
+
+
+# Global alert rule engine
+rule_engine = RuleEngine(
+    window_aggregator,
+    cooldown_seconds=settings.RULE_ACTION_COOLDOWN_SECONDS,
+    queue_size=settings.RULE_ACTION_QUEUE_SIZE
+)
+
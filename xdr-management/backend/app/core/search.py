@@ -0,0 +1,261 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, false, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db_models import SecurityEvent
+
+
+FTS_TABLE = "security_events_fts"
+# Stable integer key of each indexed event. security_events has a TEXT
+# primary key, so its implicit rowids may be renumbered by VACUUM; an
+# INTEGER PRIMARY KEY is preserved, so the index is keyed on this table.
+FTS_KEYS_TABLE = "security_event_search_keys"
+
+_KEY_OF = "(SELECT rowid FROM " + FTS_KEYS_TABLE + " WHERE event_id = {row}.id)"
+
+# Contentless FTS5 index over security_events, kept in sync by triggers so
+# every write path (ORM, bulk executemany, raw SQL) updates it. Deletes pass
+# the old column values, which contentless tables need to remove a row.
+_SQLITE_DDL = [
+    f"CREATE TABLE IF NOT EXISTS {FTS_KEYS_TABLE} ("
+    "rowid INTEGER PRIMARY KEY, event_id TEXT NOT NULL UNIQUE)",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "type, source, description, content='', prefix='2 3')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON security_events BEGIN
+        INSERT INTO {FTS_KEYS_TABLE}(event_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, type, source, description)
+        VALUES ({_KEY_OF.format(row="new")}, new.type, new.source, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON security_events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, type, source, description)
+        VALUES ('delete', {_KEY_OF.format(row="old")}, old.type, old.source, old.description);
+        DELETE FROM {FTS_KEYS_TABLE} WHERE event_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF id, type, source, description ON security_events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, type, source, description)
+        VALUES ('delete', {_KEY_OF.format(row="old")}, old.type, old.source, old.description);
+        UPDATE {FTS_KEYS_TABLE} SET event_id = new.id WHERE event_id = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, type, source, description)
+        VALUES ({_KEY_OF.format(row="new")}, new.type, new.source, new.description);
+    END""",
+]
+
+_SQLITE_TRIGGERS = [f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au"]
+
+_SQLITE_BACKFILL = [
+    f"INSERT OR IGNORE INTO {FTS_KEYS_TABLE}(event_id) SELECT id FROM security_events",
+    f"INSERT INTO {FTS_TABLE}(rowid, type, source, description) "
+    f"SELECT k.rowid, e.type, e.source, e.description "
+    f"FROM security_events AS e JOIN {FTS_KEYS_TABLE} AS k ON k.event_id = e.id",
+]
+
+_POSTGRES_DOCUMENT = (
+    "to_tsvector('simple', coalesce(type, '') || ' ' || "
+    "coalesce(source, '') || ' ' || coalesce(description, ''))"
+)
+
+_POSTGRES_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_security_events_fts "
+    f"ON security_events USING gin ({_POSTGRES_DOCUMENT})",
+]
+
+# Database URL (without driver) -> whether a full-text index is installed
+_installed: Dict[str, bool] = {}
+
+_QUERY_TOKEN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def _database_key(engine) -> str:
+    # Sync and asyncio engines for one database share an entry
+    url = engine.url
+    return str(url.set(drivername=url.get_backend_name()))
+
+
+def _fts5_available(conn: Connection) -> bool:
+    options = conn.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+def install_search_index(conn: Connection) -> bool:
+    """
+    Create the full-text index for security events if the database supports
+    one, indexing any existing rows. Safe to run repeatedly.
+    """
+    dialect = conn.dialect.name
+    installed = False
+
+    if dialect == "sqlite" and _fts5_available(conn):
+        existing = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE name = ?", (FTS_TABLE,)
+        ).scalar()
+        if existing is not None and "content=''" not in existing:
+            # Earlier versions indexed the rowids of security_events directly
+            _drop_sqlite_index(conn)
+            existing = None
+        for ddl in _SQLITE_DDL:
+            conn.exec_driver_sql(ddl)
+        if existing is None:
+            for statement in _SQLITE_BACKFILL:
+                conn.exec_driver_sql(statement)
+        installed = True
+    elif dialect == "postgresql":
+        for ddl in _POSTGRES_DDL:
+            conn.exec_driver_sql(ddl)
+        installed = True
+
+    _installed[_database_key(conn.engine)] = installed
+    return installed
+
+
+def _drop_sqlite_index(conn: Connection):
+    for trigger in _SQLITE_TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_KEYS_TABLE}")
+
+
+def drop_search_index(conn: Connection):
+    """Drop the SQLite full-text index, its triggers and key table"""
+    if conn.dialect.name == "sqlite":
+        _drop_sqlite_index(conn)
+    _installed.pop(_database_key(conn.engine), None)
+
+
+@event.listens_for(SecurityEvent.__table__, "after_create")
+def _after_create(target, connection, **kw):
+    install_search_index(connection)
+
+
+@event.listens_for(SecurityEvent.__table__, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+
+async def search_enabled(db: AsyncSession) -> bool:
+    """Whether the session's database has a full-text index"""
+    bind = db.get_bind()
+    url = _database_key(bind)
+    if url not in _installed:
+        if bind.dialect.name == "sqlite":
+            _installed[url] = (await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+            )).first() is not None
+        else:
+            _installed[url] = bind.dialect.name == "postgresql"
+    return _installed[url]
+
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Translate user input into an FTS5 MATCH expression.
+
+    Quoted text becomes a phrase query; every other word is a prefix query.
+    All parts must match. Returns None when the input has no searchable text.
+    """
+    parts = []
+    for phrase, word in _QUERY_TOKEN.findall(search):
+        if phrase:
+            parts.append('"' + phrase.replace('"', '""') + '"')
+        else:
+            word = word.replace('"', "")
+            if word:
+                parts.append('"' + word + '"*')
+    return " AND ".join(parts) or None
+
+
+def _build_tsquery(search: str) -> Optional[str]:
+    """Translate user input into a PostgreSQL tsquery (phrases and prefixes)"""
+    parts = []
+    for phrase, word in _QUERY_TOKEN.findall(search):
+        words = re.findall(r"\w+", phrase or word)
+        if not words:
+            continue
+        if phrase:
+            parts.append("(" + " <-> ".join(words) + ")")
+        else:
+            parts.append(" & ".join(f"{w}:*" for w in words))
+    return " & ".join(parts) or None
+
+
+async def search_filter(db: AsyncSession, search: str):
+    """
+    WHERE clause restricting security events to those matching `search`.
+
+    Uses the full-text index when installed, otherwise substring matching.
+    Input without searchable text (e.g. a lone quote) matches nothing.
+    """
+    if await search_enabled(db):
+        if db.get_bind().dialect.name == "postgresql":
+            tsquery = _build_tsquery(search)
+            if tsquery is None:
+                return false()
+            return text(
+                f"{_POSTGRES_DOCUMENT} @@ to_tsquery('simple', :fts_query)"
+            ).bindparams(fts_query=tsquery)
+
+        match = build_match_query(search)
+        if match is None:
+            return false()
+        return text(
+            f"security_events.id IN (SELECT event_id FROM {FTS_KEYS_TABLE} WHERE rowid IN "
+            f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query))"
+        ).bindparams(fts_query=match)
+
+    search_lower = f"%{search.lower()}%"
+    return (
+        (SecurityEvent.type.ilike(search_lower)) |
+        (SecurityEvent.source.ilike(search_lower)) |
+        (SecurityEvent.description.ilike(search_lower))
+    )
+
+
+async def search_events(
+    db: AsyncSession, search: str, limit: int = 50
+) -> List[Tuple[SecurityEvent, float]]:
+    """
+    Rank security events by relevance to `search`, best match first.
+
+    Scores are BM25 on SQLite and ts_rank on PostgreSQL. Without a
+    full-text index, matches are returned newest first with a score of 0.
+    """
+    if not await search_enabled(db):
+        clause = await search_filter(db, search)
+        events = (await db.execute(
+            select(SecurityEvent).where(clause)
+            .order_by(SecurityEvent.timestamp.desc())
+            .limit(limit)
+        )).scalars().all()
+        return [(e, 0.0) for e in events]
+
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = _build_tsquery(search)
+        if tsquery is None:
+            return []
+        ranked = (await db.execute(text(
+            f"SELECT id, ts_rank({_POSTGRES_DOCUMENT}, to_tsquery('simple', :q)) AS score "
+            f"FROM security_events WHERE {_POSTGRES_DOCUMENT} @@ to_tsquery('simple', :q) "
+            f"ORDER BY score DESC LIMIT :limit"
+        ), {"q": tsquery, "limit": limit})).all()
+    else:
+        match = build_match_query(search)
+        if match is None:
+            return []
+        # bm25() is lower-is-better; negate so higher scores rank first
+        ranked = (await db.execute(text(
+            f"SELECT k.event_id AS id, -bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+            f"JOIN {FTS_KEYS_TABLE} k ON k.rowid = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :q ORDER BY bm25({FTS_TABLE}) LIMIT :limit"
+        ), {"q": match, "limit": limit})).all()
+
+    if not ranked:
+        return []
+    events = {
+        e.id: e for e in (await db.execute(
+            select(SecurityEvent).where(SecurityEvent.id.in_([r.id for r in ranked]))
+        )).scalars()
+    }
+    return [(events[r.id], float(r.score)) for r in ranked if r.id in events]
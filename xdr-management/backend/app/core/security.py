@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, TypeVar
+import asyncio
+import threading
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -8,11 +11,88 @@ from pydantic import BaseModel
 from enum import Enum
 
 from .config import settings
+from .users import user_store
 
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt hashes of the default accounts' passwords, computed ahead of time
+# so seeding the database does not spend a second of CPU on them
+SEED_PASSWORD_HASHES = {
+    "admin": "$2b$12$v/cgy7miQZiBz2vAaJWTrOGYZhhGD31J/SVvAUcuOZwitPlyOPOXu",
+    "analyst": "$2b$12$UdF1ZPB.GzyHY2/jkplimOXOBgesXCwsiIi3YTl6Bl6C0/6bKB5T6",
+    "viewer": "$2b$12$wwVgbNuIP2QRP088M/gucunJm0M0uP8ymeaA.kaj/3pDep022gqa6",
+}
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusyError(Exception):
+    """Too many password hashes are already queued or running"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool.
+
+    bcrypt releases the GIL while it works, so up to `workers` hashes run
+    in parallel on separate cores while the event loop keeps serving
+    other requests. At most `max_pending` calls may be queued or running
+    at once; beyond that PasswordHasherBusyError is raised immediately
+    instead of queueing a login storm behind seconds of work.
+    """
+
+    def __init__(self, context: CryptContext, workers: int = 4, max_pending: int = 64):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+            return self._executor
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusyError()
+        try:
+            future = self._pool().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Free the slot when the work finishes, not when the caller stops
+        # waiting: a cancelled caller leaves its hash running on the pool
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    def shutdown(self):
+        """Stop the worker threads; the pool is recreated on next use"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Global password hasher
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -57,49 +137,6 @@ class UserResponse(UserBase):
     is_active: bool
 
 
-# Mock user database (will be replaced with real DB later)
-users_db = {
-    "admin": {
-        "id": "USR-001",
-        "username": "admin",
-        "email": "admin@xdr.local",
-        "full_name": "System Administrator",
-        "hashed_password": pwd_context.hash("admin123"),
-        "role": UserRole.ADMIN,
-        "is_active": True,
-        "created_at": "2026-01-01T00:00:00Z"
-    },
-    "analyst": {
-        "id": "USR-002",
-        "username": "analyst",
-        "email": "analyst@xdr.local",
-        "full_name": "Security Analyst",
-        "hashed_password": pwd_context.hash("analyst123"),
-        "role": UserRole.ANALYST,
-        "is_active": True,
-        "created_at": "2026-01-01T00:00:00Z"
-    },
-    "viewer": {
-        "id": "USR-003",
-        "username": "viewer",
-        "email": "viewer@xdr.local",
-        "full_name": "Security Viewer",
-        "hashed_password": pwd_context.hash("viewer123"),
-        "role": UserRole.VIEWER,
-        "is_active": True,
-        "created_at": "2026-01-01T00:00:00Z"
-    }
-}
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -111,17 +148,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def get_user(username: str) -> Optional[dict]:
-    if username in users_db:
-        return users_db[username]
-    return None
+async def get_user(username: str) -> Optional[dict]:
+    return await user_store.get(username)
 
 
-def authenticate_user(username: str, password: str) -> Optional[dict]:
-    user = get_user(username)
+async def authenticate_user(username: str, password: str) -> Optional[dict]:
+    user = await get_user(username)
     if not user:
         return None
-    if not verify_password(password, user["hashed_password"]):
+    try:
+        verified = await password_hasher.verify(password, user["hashed_password"])
+    except PasswordHasherBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    if not verified:
         return None
     return user
 
@@ -142,7 +185,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     except JWTError:
         raise credentials_exception
 
-    user = get_user(username=token_data.username)
+    user = await get_user(username=token_data.username)
     if user is None:
         raise credentials_exception
     return user
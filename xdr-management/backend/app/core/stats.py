@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db_models import SecurityEvent, Incident, Asset
+
+
+def incident_response_minutes(timeline: Optional[List[dict]]) -> Optional[float]:
+    """
+    Minutes between the first timeline entry (detection or creation) and the
+    first action recorded after it. Timeline times are HH:MM, so a response
+    that crosses midnight wraps around.
+    """
+    if not timeline or len(timeline) < 2:
+        return None
+    try:
+        first = datetime.strptime(timeline[0]["time"], "%H:%M")
+        second = datetime.strptime(timeline[1]["time"], "%H:%M")
+    except (KeyError, TypeError, ValueError):
+        return None
+    return ((second - first).total_seconds() / 60) % (24 * 60)
+
+
+class DashboardStatsStore:
+    """
+    Incrementally maintained dashboard counters.
+
+    Write paths report changes through the hook methods after committing, so
+    reading the stats costs no queries. `reconcile` recomputes everything from
+    the database; it runs on first use and periodically in the background to
+    correct drift, e.g. from writes made by other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._reconciled_at: Optional[float] = None
+        self._today = datetime.utcnow().date()
+        self.total_events = 0
+        self.events_by_severity: Counter = Counter()
+        self.resolved_today = 0
+        self.active_incidents = 0
+        self.assets_monitored = 0
+        self.compromised_assets = 0
+        self._response_minutes: Dict[str, float] = {}
+        self._response_total = 0.0
+
+    @property
+    def initialized(self) -> bool:
+        return self._reconciled_at is not None
+
+    def reset(self):
+        """Drop all counters; the next read reconciles from the database"""
+        with self._lock:
+            self._clear()
+
+    async def reconcile(self, db: AsyncSession):
+        """Recompute all counters from the database"""
+        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        def count(model, *criteria):
+            return db.scalar(select(func.count()).select_from(model).where(*criteria))
+
+        total_events = await count(SecurityEvent)
+        events_by_severity = Counter(dict((await db.execute(
+            select(SecurityEvent.severity, func.count(SecurityEvent.id))
+            .group_by(SecurityEvent.severity)
+        )).all()))
+        resolved_today = await count(
+            SecurityEvent,
+            SecurityEvent.status == "resolved",
+            SecurityEvent.updated_at >= today_start
+        )
+        active_incidents = await count(Incident, Incident.status == "in_progress")
+        assets_monitored = await count(Asset)
+        compromised_assets = await count(Asset, Asset.status == "compromised")
+
+        response_minutes = {}
+        for incident_id, timeline in await db.execute(select(Incident.id, Incident.timeline)):
+            minutes = incident_response_minutes(timeline)
+            if minutes is not None:
+                response_minutes[incident_id] = minutes
+
+        with self._lock:
+            self._today = today_start.date()
+            self.total_events = total_events
+            self.events_by_severity = events_by_severity
+            self.resolved_today = resolved_today
+            self.active_incidents = active_incidents
+            self.assets_monitored = assets_monitored
+            self.compromised_assets = compromised_assets
+            self._response_minutes = response_minutes
+            self._response_total = sum(response_minutes.values())
+            self._reconciled_at = time.monotonic()
+
+    # ---- Event hooks ----
+
+    def event_created(self, severity: str, count: int = 1):
+        with self._lock:
+            self.total_events += count
+            self.events_by_severity[severity] += count
+
+    def event_updated(
+        self,
+        old_status: str,
+        old_updated_at: Optional[datetime],
+        new_status: str,
+        new_updated_at: Optional[datetime]
+    ):
+        with self._lock:
+            self._roll_day()
+            self.resolved_today += (
+                self._resolved_today(new_status, new_updated_at)
+                - self._resolved_today(old_status, old_updated_at)
+            )
+
+    def event_deleted(self, severity: str, status: str, updated_at: Optional[datetime]):
+        with self._lock:
+            self._roll_day()
+            self.total_events -= 1
+            self.events_by_severity[severity] -= 1
+            self.resolved_today -= self._resolved_today(status, updated_at)
+
+    # ---- Incident hooks ----
+
+    def incident_created(self, incident_id: str, status: str, timeline: Optional[List[dict]]):
+        self.incident_updated(incident_id, None, status, timeline)
+
+    def incident_updated(
+        self,
+        incident_id: str,
+        old_status: Optional[str],
+        new_status: str,
+        timeline: Optional[List[dict]]
+    ):
+        minutes = incident_response_minutes(timeline)
+        with self._lock:
+            self.active_incidents += (
+                (new_status == "in_progress") - (old_status == "in_progress")
+            )
+            self._response_total -= self._response_minutes.pop(incident_id, 0.0)
+            if minutes is not None:
+                self._response_minutes[incident_id] = minutes
+                self._response_total += minutes
+
+    # ---- Reads ----
+
+    def snapshot(self) -> dict:
+        """Current counters; O(1) regardless of table sizes"""
+        with self._lock:
+            self._roll_day()
+            responded = len(self._response_minutes)
+            average = (
+                f"{round(self._response_total / responded)} min"
+                if responded else "N/A"
+            )
+            return {
+                "total_events": self.total_events,
+                "critical_events": self.events_by_severity["critical"],
+                "active_incidents": self.active_incidents,
+                "resolved_today": self.resolved_today,
+                "assets_monitored": self.assets_monitored,
+                "compromised_assets": self.compromised_assets,
+                "average_response_time": average
+            }
+
+    def _roll_day(self):
+        # Everything counted as resolved today was resolved before midnight
+        today = datetime.utcnow().date()
+        if today != self._today:
+            self._today = today
+            self.resolved_today = 0
+
+    def _resolved_today(self, status: str, updated_at: Optional[datetime]) -> int:
+        return int(
+            status == "resolved"
+            and updated_at is not None
+            and updated_at.date() == self._today
+        )
+
+
+# Global dashboard stats store
+dashboard_stats = DashboardStatsStore()
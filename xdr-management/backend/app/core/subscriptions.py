@@ -0,0 +1,105 @@
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Hashable, Iterable, Optional, Set
+
+
+# Filter dimension -> field of the broadcast payload it matches
+FILTER_FIELDS = {
+    "severity": "severity",
+    "type": "type",
+    "source": "source",
+    "asset": "affectedAssets",
+    "status": "status",
+}
+
+
+class SubscriptionIndex:
+    """
+    Inverted index of WebSocket subscription filters.
+
+    A filter maps dimensions to accepted values; a payload matches when every
+    filtered dimension has an accepted value (a payload without the field
+    does not match). Clients without filters receive everything. Matching
+    only visits the posting lists for the payload's own values, so its cost
+    depends on how many clients accept those values, not on how many
+    subscriptions exist.
+    """
+
+    def __init__(self):
+        self._unfiltered: Set[Hashable] = set()
+        # Client -> number of dimensions it filters on
+        self._required: Dict[Hashable, int] = {}
+        self._filters: Dict[Hashable, Dict[str, FrozenSet[str]]] = {}
+        # Dimension -> value -> clients accepting it
+        self._postings: Dict[str, Dict[str, Set[Hashable]]] = {
+            dimension: defaultdict(set) for dimension in FILTER_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self._unfiltered) + len(self._required)
+
+    def add(self, client: Hashable, filters: Optional[Dict[str, Iterable[str]]] = None):
+        """Register or replace a client's filters; empty filters accept everything"""
+        self.remove(client)
+        compiled = {
+            dimension: frozenset(values)
+            for dimension, values in (filters or {}).items()
+            if values is not None
+        }
+        unknown = set(compiled) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown filter dimensions: {', '.join(sorted(unknown))}")
+
+        if not compiled:
+            self._unfiltered.add(client)
+            return
+        self._filters[client] = compiled
+        self._required[client] = len(compiled)
+        for dimension, values in compiled.items():
+            for value in values:
+                self._postings[dimension][value].add(client)
+
+    def remove(self, client: Hashable):
+        self._unfiltered.discard(client)
+        self._required.pop(client, None)
+        for dimension, values in self._filters.pop(client, {}).items():
+            postings = self._postings[dimension]
+            for value in values:
+                postings[value].discard(client)
+                if not postings[value]:
+                    del postings[value]
+
+    def filters(self, client: Hashable) -> Dict[str, FrozenSet[str]]:
+        return self._filters.get(client, {})
+
+    @property
+    def unfiltered(self) -> Set[Hashable]:
+        """Clients that receive everything"""
+        return self._unfiltered
+
+    def accepts(self, client: Hashable, payload: dict) -> bool:
+        """Whether one client's filters accept `payload`"""
+        if client in self._unfiltered:
+            return True
+        filters = self._filters.get(client)
+        if filters is None:
+            return False
+        for dimension, values in filters.items():
+            value = payload.get(FILTER_FIELDS[dimension])
+            if value is None or values.isdisjoint(value if isinstance(value, list) else [value]):
+                return False
+        return True
+
+    def match(self, payload: dict, include_unfiltered: bool = True) -> Set[Hashable]:
+        """Clients whose filters accept `payload`"""
+        hits: Counter = Counter()
+        for dimension, field in FILTER_FIELDS.items():
+            value = payload.get(field)
+            if value is None:
+                continue
+            postings = self._postings[dimension]
+            values = value if isinstance(value, list) else [value]
+            # A client accepting several of the values still counts once per dimension
+            hits.update(set().union(*(postings.get(v, ()) for v in values)))
+
+        matched = {client for client, count in hits.items() if count == self._required[client]}
+        return self._unfiltered | matched if include_unfiltered else matched
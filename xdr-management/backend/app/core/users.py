@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.db_models import User
+
+
+def user_to_dict(user: User) -> dict:
+    """The principal dict handed to route handlers"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "hashed_password": user.hashed_password,
+        "role": user.role,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat() + "Z" if user.created_at else None
+    }
+
+
+class UserStore:
+    """
+    Read-through cache of users from the `users` table.
+
+    Authenticated requests look up their user by username on every call, so
+    users (and unknown usernames) are kept in memory for `ttl_seconds`.
+    Writes to users call `invalidate`, which bumps the "users" version in
+    the response cache backend; with a shared backend every worker sees the
+    new version on its next lookup and drops its cached users, so a change
+    made on one worker is visible on all of them at once. The TTL bounds
+    staleness for changes made outside the API.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # username -> (expires at, user dict or None when not found)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        self._version: Optional[int] = None
+
+    def _cached(self, username: str, version: int) -> Tuple[bool, Optional[dict]]:
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+                return False, None
+            item = self._entries.get(username)
+            if item is None:
+                return False, None
+            expires_at, user = item
+            if expires_at < self.clock():
+                del self._entries[username]
+                return False, None
+            self._entries.move_to_end(username)
+            return True, user
+
+    def _store(self, username: str, user: Optional[dict], version: int):
+        with self._lock:
+            if version != self._version:
+                # Invalidated while the row was being read
+                return
+            self._entries[username] = (self.clock() + self.ttl_seconds, user)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, username: str) -> Optional[dict]:
+        """The user named `username`, or None if there is none"""
+        version = response_cache.version("users")
+        hit, user = self._cached(username, version)
+        if hit:
+            return user
+
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
+        user = user_to_dict(row) if row is not None else None
+        self._store(username, user, version)
+        return user
+
+    def invalidate(self):
+        """Drop cached users on every worker sharing the cache backend"""
+        response_cache.invalidate("users")
+        with self._lock:
+            self._entries.clear()
+
+
+# Global user store
+user_store = UserStore(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,261 @@
+import asyncio
+import json
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from starlette import status
+
+from app.core.backplane import Backplane, MemoryBackplane, create_backplane
+from app.core.config import settings
+from app.core.logging import logger, metrics
+from app.core.subscriptions import SubscriptionIndex
+
+
+SLOW_CLIENT_POLICIES = ("drop_oldest", "disconnect")
+
+# Message types delivered only to clients whose subscription filters match the data
+FILTERED_MESSAGES = ("new_event", "new_incident")
+
+
+class ClientConnection:
+    """A connected client with a bounded outbound queue drained by its own writer task"""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+
+class ConnectionManager:
+    """
+    WebSocket fan-out.
+
+    `broadcast` publishes through the backplane, which numbers the message
+    and hands it to `deliver` on every worker. `deliver` serializes it once
+    and only enqueues the text for each client, so it never waits on a
+    socket. Event and incident messages only go to clients whose
+    subscription filters match them. Every client has a writer
+    task that sends from its queue; a client whose queue is full is handled
+    by the slow client policy: `drop_oldest` discards its oldest pending
+    message, `disconnect` closes it so it can reconnect and resync.
+
+    The most recent sequenced broadcasts are kept in a ring buffer. A client
+    reconnecting with the last sequence number it saw gets only the missed
+    messages replayed, or `resync_required` when they have left the buffer.
+    Filters given when connecting apply to the replay as well.
+    """
+
+    def __init__(
+        self,
+        backplane: Optional[Backplane] = None,
+        queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        slow_client_policy: str = settings.WS_SLOW_CLIENT_POLICY,
+        replay_size: int = settings.WS_REPLAY_BUFFER_SIZE
+    ):
+        if slow_client_policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow client policy: {slow_client_policy}")
+        self.queue_size = queue_size
+        self.slow_client_policy = slow_client_policy
+        self.connections: Dict[WebSocket, ClientConnection] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self.subscriptions = SubscriptionIndex()
+        # (seq, message, serialized message) of recent broadcasts, oldest first
+        self.replay_buffer: Deque[Tuple[int, dict, str]] = deque(maxlen=replay_size)
+        self.backplane = backplane or MemoryBackplane()
+        self.backplane.subscribe(self.deliver)
+
+    async def start(self):
+        await self.backplane.start()
+
+    async def stop(self):
+        await self.backplane.stop()
+        await self.close_all()
+
+    @property
+    def active_connections(self) -> int:
+        return len(self.connections)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        since: Optional[int] = None,
+        filters: Optional[Dict[str, Iterable[str]]] = None
+    ):
+        """
+        Accept a client; `since` is the last sequence number it received
+        before reconnecting, and `filters` its initial subscription
+        """
+        await websocket.accept()
+        client = ClientConnection(websocket, self.queue_size)
+        self.subscriptions.add(websocket, filters)
+        if since is not None:
+            # Queued before registering, so nothing is missed or sent twice
+            missed = self.replay(since, websocket)
+            if missed is None:
+                self._enqueue(client, self.serialize({"type": "resync_required", "seq": self.last_seq}))
+            else:
+                for text in missed:
+                    self._enqueue(client, text)
+        client.writer = asyncio.create_task(self._write(client))
+        self.connections[websocket] = client
+        metrics.record_websocket_connect()
+        logger.info(f"WebSocket client connected. Total: {len(self.connections)}")
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.connections.pop(websocket, None)
+        if client is None:
+            return
+        self.subscriptions.remove(websocket)
+        if client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        metrics.record_websocket_disconnect()
+        logger.info(f"WebSocket client disconnected. Total: {len(self.connections)}")
+
+    def subscribe(self, websocket: WebSocket, filters: Optional[Dict[str, Iterable[str]]] = None):
+        """Replace a client's subscription filters; no filters means everything"""
+        if websocket in self.connections:
+            self.subscriptions.add(websocket, filters)
+
+    @property
+    def last_seq(self) -> int:
+        return self.replay_buffer[-1][0] if self.replay_buffer else 0
+
+    def replay(self, since: int, websocket: Optional[WebSocket] = None) -> Optional[List[str]]:
+        """
+        Serialized broadcasts after sequence number `since`, oldest first,
+        or None when some of them are no longer buffered. With `websocket`,
+        only what its subscription filters accept.
+        """
+        if since == self.last_seq:
+            return []
+        if since > self.last_seq or not self.replay_buffer or since < self.replay_buffer[0][0] - 1:
+            # Missed messages left the buffer, or the sequence restarted
+            return None
+        missed = []
+        for seq, message, text in reversed(self.replay_buffer):
+            if seq <= since:
+                break
+            if websocket is not None:
+                text = self._select(websocket, message, text)
+            if text is not None:
+                missed.append(text)
+        missed.reverse()
+        return missed
+
+    def _select(self, websocket: WebSocket, message: dict, text: str) -> Optional[str]:
+        # What one client receives of a broadcast, or None if nothing
+        if message.get("type") == "new_events":
+            events = message.get("data") or []
+            selected = [event for event in events if self.subscriptions.accepts(websocket, event)]
+            if len(selected) == len(events):
+                return text
+            return self.serialize({**message, "data": selected}) if selected else None
+        if message.get("type") in FILTERED_MESSAGES:
+            return text if self.subscriptions.accepts(websocket, message.get("data") or {}) else None
+        return text
+
+    async def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one client, behind anything already queued for it"""
+        client = self.connections.get(websocket)
+        if client is not None:
+            self._enqueue(client, self.serialize(message))
+
+    async def broadcast(self, message: dict) -> int:
+        """Publish a message to the clients of every worker; returns its sequence number"""
+        return await self.backplane.publish(message)
+
+    async def deliver(self, message: dict) -> int:
+        """Queue a published message for every matching local client; returns how many it was queued for"""
+        text = self.serialize(message)
+        if "seq" in message:
+            self.replay_buffer.append((message["seq"], message, text))
+        if message.get("type") == "new_events":
+            return self._deliver_batch(message, text)
+        if message.get("type") in FILTERED_MESSAGES:
+            recipients = self.subscriptions.match(message.get("data") or {})
+        else:
+            recipients = list(self.connections)
+
+        delivered = 0
+        for websocket in recipients:
+            client = self.connections.get(websocket)
+            if client is not None:
+                delivered += self._enqueue(client, text)
+        return delivered
+
+    def _deliver_batch(self, message: dict, full_text: str) -> int:
+        # Unfiltered clients share the full batch; filtered clients get the
+        # events they match, serialized once per distinct selection
+        events = message.get("data") or []
+        selections: Dict[WebSocket, List[int]] = defaultdict(list)
+        for i, event in enumerate(events):
+            for websocket in self.subscriptions.match(event, include_unfiltered=False):
+                selections[websocket].append(i)
+
+        outbox = [(websocket, full_text) for websocket in self.subscriptions.unfiltered]
+        texts: Dict[Tuple[int, ...], str] = {}
+        for websocket, indices in selections.items():
+            selected = tuple(indices)
+            if selected not in texts:
+                texts[selected] = self.serialize({**message, "data": [events[i] for i in selected]})
+            outbox.append((websocket, texts[selected]))
+
+        delivered = 0
+        for websocket, text in outbox:
+            client = self.connections.get(websocket)
+            if client is not None:
+                delivered += self._enqueue(client, text)
+        return delivered
+
+    async def close_all(self, code: int = status.WS_1001_GOING_AWAY):
+        """Close every connection, e.g. on shutdown"""
+        for websocket in list(self.connections):
+            self.disconnect(websocket)
+            await self._close(websocket, code)
+
+    @staticmethod
+    def serialize(message: dict) -> str:
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+    def _enqueue(self, client: ClientConnection, text: str) -> bool:
+        try:
+            client.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.slow_client_policy == "disconnect":
+            logger.warning("Disconnecting slow WebSocket client: send queue full")
+            self.disconnect(client.websocket)
+            task = asyncio.create_task(self._close(client.websocket, status.WS_1013_TRY_AGAIN_LATER))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+            return False
+
+        client.queue.get_nowait()
+        client.dropped += 1
+        client.queue.put_nowait(text)
+        return True
+
+    async def _write(self, client: ClientConnection):
+        try:
+            while True:
+                text = await client.queue.get()
+                await client.websocket.send_text(text)
+        except Exception as e:
+            logger.warning(f"Error sending to WebSocket client: {e}")
+            self.disconnect(client.websocket)
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            # Already closed by the client
+            pass
+
+
+# Global WebSocket connection manager
+manager = ConnectionManager(create_backplane())
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+class WindowSpec(NamedTuple):
+    # Fact name the count is published under, e.g. "failed_logins"
+    name: str
+    # Event field the counts are keyed by; list fields count once per value
+    key_field: str
+    window_seconds: int
+    bucket_seconds: int = 10
+    # "sliding": the last window_seconds; "tumbling": since the current
+    # window_seconds-aligned boundary
+    kind: str = "sliding"
+    # Event types counted; None counts every event
+    event_types: Optional[frozenset] = None
+    # Optional fact holding the seconds between the oldest counted bucket and now
+    span_fact: Optional[str] = None
+
+
+# Windowed facts available to alert rule conditions. failed_logins is a
+# trailing 5-minute count, so the seeded brute force rule `failed_logins > 5`
+# means more than 5 attempts within 5 minutes; time_window never exceeds it.
+DEFAULT_WINDOWS = [
+    WindowSpec(
+        "failed_logins", "source", window_seconds=300, bucket_seconds=10,
+        event_types=frozenset({"Suspicious Login", "Brute Force Attack"}),
+        span_fact="time_window"
+    ),
+    WindowSpec("source_events_5min", "source", window_seconds=300, bucket_seconds=10),
+    WindowSpec("asset_events_hour", "affectedAssets", window_seconds=3600, bucket_seconds=60, kind="tumbling"),
+]
+
+
+# Per key: [bucket index, count] pairs, oldest first
+Buckets = Deque[List[int]]
+
+
+class WindowCounter:
+    """
+    Bucketed counts per key over one window.
+
+    Time is split into `bucket_seconds` buckets numbered from the epoch, so
+    a count costs one bucket increment and reading sums at most
+    window/bucket buckets. Keys are kept in least-recently-updated order;
+    beyond `max_keys` the least recently updated key is evicted, and keys
+    whose buckets have all expired are dropped by `evict_idle`.
+    """
+
+    def __init__(self, spec: WindowSpec, max_keys: int = 10000):
+        if spec.kind not in ("sliding", "tumbling"):
+            raise ValueError(f"Unknown window kind: {spec.kind}")
+        self.spec = spec
+        self.max_keys = max_keys
+        self.keys: "OrderedDict[str, Buckets]" = OrderedDict()
+
+    def _first_bucket(self, now: float) -> int:
+        """Oldest bucket index still inside the window"""
+        spec = self.spec
+        if spec.kind == "tumbling":
+            return int(now // spec.window_seconds * spec.window_seconds // spec.bucket_seconds)
+        return int(now // spec.bucket_seconds) - spec.window_seconds // spec.bucket_seconds + 1
+
+    @staticmethod
+    def _trim(buckets: Buckets, first: int):
+        while buckets and buckets[0][0] < first:
+            buckets.popleft()
+
+    def add(self, key: str, now: float, amount: int = 1):
+        bucket = int(now // self.spec.bucket_seconds)
+        buckets = self.keys.get(key)
+        if buckets is None:
+            buckets = self.keys[key] = deque()
+            if len(self.keys) > self.max_keys:
+                self.keys.popitem(last=False)
+        else:
+            self.keys.move_to_end(key)
+
+        self._trim(buckets, self._first_bucket(now))
+        if buckets and buckets[-1][0] == bucket:
+            buckets[-1][1] += amount
+        else:
+            buckets.append([bucket, amount])
+
+    def count(self, key: str, now: float) -> Tuple[int, float]:
+        """(count in the window, seconds since the oldest counted bucket began)"""
+        buckets = self.keys.get(key)
+        if not buckets:
+            return 0, 0.0
+        self._trim(buckets, self._first_bucket(now))
+        if not buckets:
+            return 0, 0.0
+        span = now - buckets[0][0] * self.spec.bucket_seconds
+        return sum(count for _, count in buckets), span
+
+    def evict_idle(self, now: float) -> int:
+        """Drop keys with nothing left in the window; returns how many"""
+        first = self._first_bucket(now)
+        idle = [key for key, buckets in self.keys.items() if not buckets or buckets[-1][0] < first]
+        for key in idle:
+            del self.keys[key]
+        return len(idle)
+
+
+class WindowAggregator:
+    """
+    Windowed event counts published as rule facts.
+
+    `observe` counts an ingested event in every window it belongs to and
+    returns the resulting facts for its keys, e.g. {"failed_logins": 6,
+    "time_window": 140.0}; for list-valued keys the largest count wins.
+    State is snapshotted to a JSON file periodically and on shutdown and
+    restored at startup; bucket numbers are absolute, so counts resume
+    where they left off and expired buckets are discarded on restore.
+    """
+
+    def __init__(
+        self,
+        specs: Iterable[WindowSpec] = DEFAULT_WINDOWS,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.time
+    ):
+        self.counters: Dict[str, WindowCounter] = {
+            spec.name: WindowCounter(spec, max_keys) for spec in specs
+        }
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(event: dict, field: str) -> List[str]:
+        value = event.get(field)
+        if value is None or value == "":
+            return []
+        if isinstance(value, (list, tuple)):
+            return [str(v) for v in value]
+        return [str(value)]
+
+    def observe(self, event: dict) -> dict:
+        """Count an event and return the window facts for it"""
+        now = self.clock()
+        facts = {}
+        with self._lock:
+            for counter in self.counters.values():
+                spec = counter.spec
+                keys = self._keys(event, spec.key_field)
+                counted = spec.event_types is None or event.get("type") in spec.event_types
+                best = (0, 0.0)
+                for key in keys:
+                    if counted:
+                        counter.add(key, now)
+                    best = max(best, counter.count(key, now))
+                facts[spec.name] = best[0]
+                if spec.span_fact:
+                    facts[spec.span_fact] = best[1]
+        return facts
+
+    def count(self, name: str, key: str) -> int:
+        with self._lock:
+            return self.counters[name].count(key, self.clock())[0]
+
+    def evict_idle(self) -> int:
+        now = self.clock()
+        with self._lock:
+            return sum(counter.evict_idle(now) for counter in self.counters.values())
+
+    def reset(self):
+        with self._lock:
+            for counter in self.counters.values():
+                counter.keys.clear()
+
+    # ---- Snapshots ----
+
+    def snapshot(self, path: str):
+        """Write the counts to `path` atomically, dropping idle keys first"""
+        self.evict_idle()
+        with self._lock:
+            state = {
+                name: {key: [list(b) for b in buckets] for key, buckets in counter.keys.items()}
+                for name, counter in self.counters.items()
+            }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"saved_at": self.clock(), "windows": state}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def restore(self, path: str) -> int:
+        """Load counts written by `snapshot`; returns the number of keys restored"""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as f:
+                state = json.load(f)["windows"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable window snapshot {path}: {e}")
+            return 0
+
+        now = self.clock()
+        restored = 0
+        with self._lock:
+            for name, keys in state.items():
+                counter = self.counters.get(name)
+                if counter is None:
+                    # Window removed since the snapshot
+                    continue
+                first = counter._first_bucket(now)
+                for key, buckets in keys.items():
+                    live = deque([int(b), int(c)] for b, c in buckets if b >= first)
+                    if live and len(counter.keys) < counter.max_keys:
+                        counter.keys[key] = live
+                        restored += 1
+        return restored
+
+
+# Global window aggregator
+window_aggregator = WindowAggregator(max_keys=settings.WINDOW_MAX_KEYS)
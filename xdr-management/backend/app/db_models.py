@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Enum, JSON
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -69,6 +69,16 @@ class SecurityEvent(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Keyset pagination order for GET /api/events
+        Index("ix_security_events_timestamp_id", "timestamp", "id"),
+        # Filtered event lists, newest first
+        Index("ix_security_events_severity_timestamp", severity, timestamp.desc(), id.desc()),
+        Index("ix_security_events_status_timestamp", status, timestamp.desc(), id.desc()),
+        # resolvedToday on the dashboard
+        Index("ix_security_events_status_updated_at", status, updated_at),
+    )
+
 
 # Incident Model
 class Incident(Base):
@@ -86,6 +96,11 @@ class Incident(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_incidents_created_at", "created_at"),
+        Index("ix_incidents_status_created_at", "status", "created_at"),
+    )
+
 
 # Asset Model
 class Asset(Base):
@@ -104,6 +119,10 @@ class Asset(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_assets_status", "status"),
+    )
+
 
 # Alert Rule Model
 class AlertRule(Base):
@@ -132,3 +151,25 @@ class AuditLog(Base):
     details = Column(JSON)
     ip_address = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp", "timestamp"),
+        Index("ix_audit_logs_resource", "resource_type", "resource_id"),
+    )
+
+
+# Applied schema migrations
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+
+# ID Sequence Model
+class IdSequence(Base):
+    __tablename__ = "id_sequences"
+
+    name = Column(String, primary_key=True)
+    next_value = Column(Integer, nullable=False)
@@ -1,77 +1,104 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import logging
+import random
 import time
-from typing import Callable
 
-from ..core.logging import logger, metrics, get_logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from ..core.config import settings
+from ..core.logging import metrics
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging requests and collecting metrics"""
+# Metrics label of requests that matched no route (404s, probes for random paths)
+UNMATCHED_ROUTE = "<unmatched>"
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Start timing
-        start_time = time.time()
+request_logger = logging.getLogger("xdr.request")
 
-        # Get request info
-        method = request.method
-        path = request.url.path
-        client_ip = request.client.host if request.client else "unknown"
 
-        # Create request logger
-        request_logger = get_logger(
-            "request",
-            method=method,
-            path=path,
-            client_ip=client_ip
-        )
+def route_template(scope: Scope) -> str:
+    """
+    The path template of the route that handled a request, e.g.
+    /api/events/{event_id}, so every event ID shares one metrics key.
+    Only known once routing has run.
+    """
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
 
-        # Log request start
-        request_logger.info(f"Request started: {method} {path}")
 
-        # Process request
-        try:
-            response = await call_next(request)
+class RequestLoggingMiddleware:
+    """
+    Middleware for logging requests and collecting metrics.
+
+    A plain ASGI middleware rather than a BaseHTTPMiddleware: it only wraps
+    `send`, so responses (streaming ones included) pass straight through
+    without an extra task and memory stream per request. X-Response-Time
+    is the time until the response headers are sent; metrics and the
+    completion log use the time until the body is finished. One in
+    `1 / start_log_sample_rate` requests also logs when it starts.
+    """
+
+    def __init__(self, app: ASGIApp, start_log_sample_rate: float = settings.REQUEST_START_LOG_SAMPLE_RATE):
+        self.app = app
+        self.start_log_sample_rate = start_log_sample_rate
 
-            # Calculate duration
-            duration_ms = (time.time() - start_time) * 1000
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-            # Record metrics
-            metrics.record_request(path, response.status_code, duration_ms)
+        start_time = time.perf_counter()
+        status_code = 500
 
-            # Log request completion
+        if self.start_log_sample_rate and random.random() < self.start_log_sample_rate:
             request_logger.info(
-                f"Request completed: {method} {path}",
-                extra={
-                    "extra_data": {
-                        "status_code": response.status_code,
-                        "duration_ms": round(duration_ms, 2)
-                    }
-                }
+                f"Request started: {scope['method']} {scope['path']}",
+                extra={"extra_data": self._request_info(scope)}
             )
 
-            # Add timing header
-            response.headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
-
-            return response
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                MutableHeaders(scope=message).append("X-Response-Time", f"{duration_ms:.2f}ms")
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_with_timing)
         except Exception as e:
-            # Calculate duration
-            duration_ms = (time.time() - start_time) * 1000
-
-            # Record error metrics
-            metrics.record_request(path, 500, duration_ms)
-
-            # Log error
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            route = route_template(scope)
+            metrics.record_request(route, 500, duration_ms)
             request_logger.error(
-                f"Request failed: {method} {path}",
-                extra={
-                    "extra_data": {
-                        "error": str(e),
-                        "duration_ms": round(duration_ms, 2)
-                    }
-                },
+                f"Request failed: {scope['method']} {route}",
+                extra={"extra_data": {
+                    **self._request_info(scope),
+                    "route": route,
+                    "error": str(e),
+                    "duration_ms": round(duration_ms, 2)
+                }},
                 exc_info=True
             )
-
             raise
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        route = route_template(scope)
+        metrics.record_request(route, status_code, duration_ms)
+        if request_logger.isEnabledFor(logging.INFO):
+            request_logger.info(
+                f"Request completed: {scope['method']} {route}",
+                extra={"extra_data": {
+                    **self._request_info(scope),
+                    "route": route,
+                    "status_code": status_code,
+                    "duration_ms": round(duration_ms, 2)
+                }}
+            )
+
+    @staticmethod
+    def _request_info(scope: Scope) -> dict:
+        client = scope.get("client")
+        return {
+            "method": scope["method"],
+            "path": scope["path"],
+            "client_ip": client[0] if client else "unknown"
+        }
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from enum import Enum
 
@@ -35,6 +35,9 @@ class SecurityEvent(BaseModel):
     iocs: List[str]
     mitre: List[str]
 
+class SecurityEventSearchHit(SecurityEvent):
+    score: float
+
 class SecurityEventCreate(BaseModel):
     type: str
     source: str
@@ -44,6 +47,10 @@ class SecurityEventCreate(BaseModel):
     iocs: List[str] = []
     mitre: List[str] = []
 
+class BulkIngestResult(BaseModel):
+    inserted: int
+    ids: List[str]
+
 class SecurityEventUpdate(BaseModel):
     status: Optional[EventStatus] = None
     description: Optional[str] = None
@@ -110,3 +117,12 @@ class DashboardStats(BaseModel):
     compromisedAssets: int
     averageResponseTime: str
     threatLevel: str
+
+class StreamSubscription(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    severity: Optional[List[SeverityLevel]] = None
+    type: Optional[List[str]] = None
+    source: Optional[List[str]] = None
+    asset: Optional[List[str]] = None
+    status: Optional[List[str]] = None
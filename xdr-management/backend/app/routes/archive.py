@@ -0,0 +1,146 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from datetime import date, datetime, timedelta
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+
+from ..core.archive import ARCHIVE_TABLES, ArchiveTable, cold_archive
+from ..core.audit import audit_writer, client_ip
+from ..core.cache import response_cache
+from ..core.config import settings
+from ..core.database import get_db
+from ..core.security import require_admin, require_analyst
+from ..core.stats import dashboard_stats
+
+router = APIRouter(prefix="/api/archive", tags=["Archive"])
+
+# Query parameters of the rows and summary endpoints that are not column filters
+RESERVED_PARAMS = {"start", "end", "fields", "limit", "by"}
+
+
+class ArchiveRunResponse(BaseModel):
+    cutoff: str
+    archived: Dict[str, int]
+
+
+class ArchivePartition(BaseModel):
+    date: str
+    rows: int
+    bytes: int
+
+
+def get_table(table: str) -> ArchiveTable:
+    if not cold_archive.available:
+        raise HTTPException(status_code=503, detail="Archive requires pyarrow")
+    spec = ARCHIVE_TABLES.get(table)
+    if spec is None:
+        raise HTTPException(status_code=404, detail="Unknown archive table")
+    return spec
+
+
+def column_filters(request: Request, spec: ArchiveTable) -> Dict[str, str]:
+    """Equality filters from query parameters named after filterable columns"""
+    filters = {}
+    for name, value in request.query_params.items():
+        if name in RESERVED_PARAMS:
+            continue
+        if name not in spec.filter_columns:
+            raise HTTPException(status_code=400, detail=f"Cannot filter archive on: {name}")
+        filters[name] = value
+    return filters
+
+
+def parse_columns(value: Optional[str], allowed: List[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    columns = [c.strip() for c in value.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown archive columns: {', '.join(unknown)}")
+    return columns
+
+
+@router.post("/run", response_model=ArchiveRunResponse)
+async def run_archive(
+    request: Request,
+    older_than_days: int = Query(settings.ARCHIVE_AFTER_DAYS, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Move events and audit logs older than `older_than_days` to the archive (admin only)"""
+    if not cold_archive.available:
+        raise HTTPException(status_code=503, detail="Archive requires pyarrow")
+
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = await cold_archive.archive(db, cutoff)
+    if archived["security_events"]:
+        response_cache.invalidate("events")
+        await dashboard_stats.reconcile(db)
+
+    await audit_writer.record(
+        current_user, "archive", "archive",
+        details={"cutoff": cutoff.isoformat() + "Z", "archived": archived},
+        ip_address=client_ip(request)
+    )
+
+    return ArchiveRunResponse(cutoff=cutoff.isoformat() + "Z", archived=archived)
+
+
+@router.get("/{table}/partitions", response_model=List[ArchivePartition])
+async def list_partitions(table: str, current_user: dict = Depends(require_analyst)):
+    """Archived days of a table"""
+    get_table(table)
+    return await asyncio.to_thread(cold_archive.partitions, table)
+
+
+@router.get("/{table}/partitions/{day}")
+async def download_partition(table: str, day: date, current_user: dict = Depends(require_analyst)):
+    """Download one archived day as a Parquet file"""
+    get_table(table)
+    path = cold_archive.partition_path(table, day)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Partition not found")
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename=f"{table}-{day.isoformat()}.parquet"
+    )
+
+
+@router.get("/{table}/rows")
+async def query_rows(
+    table: str,
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: dict = Depends(require_analyst)
+) -> List[Dict[str, Any]]:
+    """
+    Archived rows between `start` and `end` (inclusive days), newest first.
+    Other query parameters filter on columns, e.g. `severity=critical`.
+    """
+    spec = get_table(table)
+    filters = column_filters(request, spec)
+    columns = parse_columns(fields, spec.columns)
+    return await asyncio.to_thread(cold_archive.scan, table, start, end, filters, columns, limit)
+
+
+@router.get("/{table}/summary")
+async def summarize(
+    table: str,
+    request: Request,
+    by: str = Query("date", description="Comma-separated grouping columns: date or a filterable column"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: dict = Depends(require_analyst)
+) -> List[Dict[str, Any]]:
+    """Archived row counts grouped by day and/or columns"""
+    spec = get_table(table)
+    filters = column_filters(request, spec)
+    keys = parse_columns(by, ["date", *spec.filter_columns]) or ["date"]
+    return await asyncio.to_thread(cold_archive.summarize, table, keys, start, end, filters)
@@ -1,20 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from datetime import timedelta
+from datetime import datetime, timedelta
 from pydantic import BaseModel
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.security import (
     authenticate_user,
     create_access_token,
     get_current_active_user,
-    get_password_hash,
-    users_db,
+    password_hasher,
+    PasswordHasherBusyError,
     Token,
     UserCreate,
     UserResponse,
     UserRole
 )
 from ..core.config import settings
+from ..core.database import get_db
+from ..core.id_allocator import id_allocator
+from ..core.users import user_store
+from ..db_models import User
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -27,7 +34,7 @@ class LoginRequest(BaseModel):
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Authenticate user and return JWT token"""
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,7 +64,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 @router.post("/login/json", response_model=Token)
 async def login_json(login_data: LoginRequest):
     """Authenticate user with JSON body and return JWT token"""
-    user = authenticate_user(login_data.username, login_data.password)
+    user = await authenticate_user(login_data.username, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -98,34 +105,53 @@ async def get_current_user_info(current_user: dict = Depends(get_current_active_
 
 
 @router.post("/register", response_model=UserResponse)
-async def register_user(user_data: UserCreate):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user (admin only in production)"""
-    if user_data.username in users_db:
+    already_registered = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Username or email already registered"
+    )
+    existing = (await db.execute(
+        select(User.id).where(or_(User.username == user_data.username, User.email == user_data.email))
+    )).first()
+    if existing:
+        raise already_registered
+
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusyError:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, retry shortly",
+            headers={"Retry-After": "1"},
         )
 
-    new_user = {
-        "id": f"USR-{str(len(users_db) + 1).zfill(3)}",
-        "username": user_data.username,
-        "email": user_data.email,
-        "full_name": user_data.full_name,
-        "hashed_password": get_password_hash(user_data.password),
-        "role": user_data.role,
-        "is_active": True,
-        "created_at": "2026-02-05T00:00:00Z"
-    }
-
-    users_db[user_data.username] = new_user
+    new_user = User(
+        id=await id_allocator.next_user_id(db),
+        username=user_data.username,
+        email=user_data.email,
+        full_name=user_data.full_name,
+        hashed_password=hashed_password,
+        role=user_data.role.value,
+        is_active=True,
+        created_at=datetime.utcnow()
+    )
+    db.add(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Registered concurrently by another request
+        await db.rollback()
+        raise already_registered
+    user_store.invalidate()
 
     return UserResponse(
-        id=new_user["id"],
-        username=new_user["username"],
-        email=new_user["email"],
-        full_name=new_user["full_name"],
-        role=new_user["role"],
-        is_active=new_user["is_active"]
+        id=new_user.id,
+        username=new_user.username,
+        email=new_user.email,
+        full_name=new_user.full_name,
+        role=new_user.role,
+        is_active=new_user.is_active
     )
 
 
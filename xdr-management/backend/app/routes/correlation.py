@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ..core.audit import audit_writer, client_ip
+from ..core.correlation import correlator
+from ..core.database import get_db
+from ..core.incidents import open_incident
+from ..core.security import require_analyst, require_viewer
+
+router = APIRouter(prefix="/api/correlation", tags=["Correlation"])
+
+
+class CorrelationCluster(BaseModel):
+    id: str
+    eventIds: List[str]
+    eventCount: int
+    severity: str
+    assets: List[str]
+    iocs: List[str]
+    techniques: List[str]
+    firstSeen: str
+    lastSeen: str
+    incidentId: Optional[str] = None
+
+
+class PromoteResponse(BaseModel):
+    clusterId: str
+    incidentId: str
+
+
+@router.get("/candidates", response_model=List[CorrelationCluster])
+async def get_candidates(
+    min_events: Optional[int] = Query(None, ge=1),
+    include_promoted: bool = False,
+    current_user: dict = Depends(require_viewer)
+):
+    """Open event clusters that look like incidents, most severe first"""
+    return [
+        cluster.to_dict() for cluster in correlator.candidates(min_events)
+        if include_promoted or cluster.incident_id is None
+    ]
+
+
+@router.get("/clusters/{cluster_id}", response_model=CorrelationCluster)
+async def get_cluster(cluster_id: str, current_user: dict = Depends(require_viewer)):
+    """Get one event cluster"""
+    cluster = correlator.get(cluster_id)
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="Cluster not found or expired")
+    return cluster.to_dict()
+
+
+@router.post("/candidates/{cluster_id}/promote", response_model=PromoteResponse)
+async def promote_candidate(
+    cluster_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_analyst)
+):
+    """Open an incident from a candidate cluster, linking its events"""
+    cluster = correlator.get(cluster_id)
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="Cluster not found or expired")
+    if cluster.incident_id is not None:
+        raise HTTPException(status_code=409, detail=f"Already promoted to {cluster.incident_id}")
+    if cluster.promoting:
+        raise HTTPException(status_code=409, detail="Promotion already in progress")
+
+    # Claim the cluster before awaiting; released if opening the incident fails
+    cluster.promoting = True
+    assets = sorted(cluster.assets)
+    try:
+        incident = await open_incident(
+            db,
+            title=f"Correlated activity on {', '.join(assets[:3]) or 'unknown assets'}",
+            severity=cluster.severity,
+            actor=current_user["username"],
+            description=(
+                f"{len(cluster.event_ids)} correlated events; "
+                f"IOCs: {', '.join(sorted(cluster.iocs)) or 'none'}; "
+                f"techniques: {' -> '.join(cluster.techniques) or 'none'}"
+            ),
+            related_events=list(cluster.event_ids),
+            affected_systems=len(assets),
+            created_action=f"Incident created from correlation cluster {cluster.id}"
+        )
+        cluster.incident_id = incident.id
+    finally:
+        cluster.promoting = False
+
+    await audit_writer.record(
+        current_user, "create", "incident", incident.id,
+        {"cluster": cluster.id}, ip_address=client_ip(request)
+    )
+    return PromoteResponse(clusterId=cluster.id, incidentId=incident.id)
@@ -0,0 +1,134 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.database import get_db
+from ..core.iocs import classify_ioc, lookup_iocs, parse_indicator
+from ..core.security import require_viewer
+from ..db_models import SecurityEvent
+from ..models import SecurityEvent as SecurityEventSchema
+
+router = APIRouter(prefix="/api/iocs", tags=["IOCs"])
+
+
+class IocEvents(BaseModel):
+    value: str
+    type: str
+    count: int
+    events: List[SecurityEventSchema]
+
+
+class IocLookupRequest(BaseModel):
+    indicators: List[str]
+    limit: int = 10
+
+
+class IocLookupMatch(BaseModel):
+    indicator: str
+    value: str
+    type: str
+    count: int
+    eventIds: List[str]
+
+
+class IocLookupResponse(BaseModel):
+    checked: int
+    matched: int
+    matches: List[IocLookupMatch]
+
+
+def resolve_indicator(indicator: str) -> Optional[Tuple[str, str]]:
+    """(normalized value, type) of an indicator, None when its type prefix does not fit the value"""
+    expected, value = parse_indicator(indicator)
+    if not value:
+        return None
+    ioc_type = classify_ioc(value)
+    if expected is not None and expected != ioc_type:
+        return None
+    return value, ioc_type
+
+
+@router.get("/{value:path}/events", response_model=IocEvents)
+async def get_ioc_events(
+    value: str,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_viewer)
+):
+    """Events mentioning an IOC, newest first; `value` may carry a type prefix such as `ip:`"""
+    resolved = resolve_indicator(value)
+    if resolved is None:
+        raise HTTPException(status_code=400, detail=f"Not a valid indicator: {value}")
+    value, ioc_type = resolved
+
+    match = (await lookup_iocs(db, [value], limit)).get(value)
+    if match is None:
+        return IocEvents(value=value, type=ioc_type, count=0, events=[])
+
+    events = (await db.execute(
+        select(SecurityEvent).where(SecurityEvent.id.in_(match.event_ids))
+        .order_by(SecurityEvent.timestamp.desc(), SecurityEvent.id.desc())
+    )).scalars().all()
+    return IocEvents(
+        value=value,
+        type=ioc_type,
+        count=match.count,
+        events=[
+            SecurityEventSchema(
+                id=event.id,
+                timestamp=event.timestamp.isoformat() + "Z",
+                severity=event.severity,
+                type=event.type,
+                source=event.source,
+                description=event.description,
+                status=event.status,
+                affectedAssets=event.affected_assets or [],
+                iocs=event.iocs or [],
+                mitre=event.mitre or []
+            )
+            for event in events
+        ]
+    )
+
+
+@router.post("/lookup", response_model=IocLookupResponse)
+async def lookup_indicators(
+    lookup: IocLookupRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_viewer)
+):
+    """
+    Check a batch of indicators (e.g. a threat-intel feed) against stored
+    events. Only indicators mentioned by at least one event are returned,
+    each with up to `limit` of its newest event IDs.
+    """
+    if len(lookup.indicators) > settings.IOC_LOOKUP_MAX_INDICATORS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lookup exceeds {settings.IOC_LOOKUP_MAX_INDICATORS} indicators"
+        )
+    if not 1 <= lookup.limit <= settings.IOC_LOOKUP_EVENTS_PER_INDICATOR:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {settings.IOC_LOOKUP_EVENTS_PER_INDICATOR}"
+        )
+
+    resolved = {}
+    for indicator in lookup.indicators:
+        parsed = resolve_indicator(indicator)
+        if parsed is not None:
+            resolved.setdefault(indicator, parsed)
+
+    found = await lookup_iocs(db, (value for value, _ in resolved.values()), lookup.limit)
+    matches = [
+        IocLookupMatch(
+            indicator=indicator, value=value, type=ioc_type,
+            count=found[value].count, eventIds=found[value].event_ids
+        )
+        for indicator, (value, ioc_type) in resolved.items()
+        if value in found
+    ]
+    return IocLookupResponse(checked=len(lookup.indicators), matched=len(matches), matches=matches)
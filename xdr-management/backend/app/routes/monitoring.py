@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import hmac
 
+from ..core.config import settings
 from ..core.logging import metrics
-from ..core.security import require_admin
+from ..core.security import get_current_active_user, get_current_user, require_admin
 
 router = APIRouter(prefix="/api/monitoring", tags=["Monitoring"])
 
+# Prometheus scrape endpoint, served at the conventional /metrics path
+prometheus_router = APIRouter(tags=["Monitoring"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
 
 class HealthResponse(BaseModel):
     status: str
@@ -16,13 +24,26 @@ class HealthResponse(BaseModel):
     uptime_seconds: float
 
 
+class LatencySummary(BaseModel):
+    count: int
+    avg_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
 class MetricsResponse(BaseModel):
     requests_total: int
     requests_by_endpoint: Dict[str, int]
     requests_by_status: Dict[str, int]
     avg_response_time_ms: float
+    p50_response_time_ms: float
+    p95_response_time_ms: float
+    p99_response_time_ms: float
+    latency_by_endpoint: Dict[str, LatencySummary]
     errors_total: int
     websocket_connections: int
+    workers: int
 
 
 # Track startup time
@@ -50,8 +71,9 @@ async def get_metrics(current_user: dict = Depends(require_admin)):
 
 @router.post("/metrics/reset")
 async def reset_metrics(current_user: dict = Depends(require_admin)):
-    """Reset application metrics (admin only)"""
+    """Reset this worker's application metrics (admin only)"""
     metrics.reset()
+    metrics.flush()
     return {"message": "Metrics reset successfully"}
 
 
@@ -66,3 +88,27 @@ async def readiness_check():
 async def liveness_check():
     """Liveness probe for Kubernetes"""
     return {"status": "alive"}
+
+
+async def require_scrape_access(authorization: Optional[str] = Header(None)):
+    """Accept the configured scrape token or, when none is set, an admin token"""
+    token = settings.METRICS_SCRAPE_TOKEN
+    if token:
+        if not hmac.compare_digest(authorization or "", f"Bearer {token}"):
+            raise HTTPException(status_code=401, detail="Invalid scrape token")
+        return
+
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not credentials:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await require_admin(await get_current_active_user(await get_current_user(credentials)))
+
+
+@prometheus_router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(_: None = Depends(require_scrape_access)):
+    """Application metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,129 @@
+"""
+Per-request overhead of the request logging middleware.
+
+Serves a trivial JSON route through the ASGI interface (no sockets) with
+no middleware, with the previous BaseHTTPMiddleware implementation, and
+with the current pure ASGI middleware, and reports the mean time per
+request. Log lines are formatted as usual and written to /dev/null.
+
+Usage (from the backend directory):
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+from typing import Callable
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.logging import get_logger, logger, metrics
+from app.middleware.logging import RequestLoggingMiddleware, route_template
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation the ASGI middleware replaced"""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        start_time = time.time()
+        method = request.method
+        path = request.url.path
+        client_ip = request.client.host if request.client else "unknown"
+        request_logger = get_logger("request", method=method, path=path, client_ip=client_ip)
+        request_logger.info(f"Request started: {method} {path}")
+
+        response = await call_next(request)
+        duration_ms = (time.time() - start_time) * 1000
+        route = route_template(request.scope)
+        metrics.record_request(route, response.status_code, duration_ms)
+        request_logger.info(
+            f"Request completed: {method} {route}",
+            extra={"extra_data": {
+                "route": route, "status_code": response.status_code, "duration_ms": round(duration_ms, 2)
+            }}
+        )
+        response.headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
+        return response
+
+
+def build_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id, "status": "ok"}
+
+    return app
+
+
+async def serve(app: FastAPI, requests: int) -> float:
+    """Mean seconds per request"""
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(requests):
+        body_sent = False
+
+        async def receive():
+            # Like a server: the body once, then nothing until the client leaves
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Event().wait()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": f"/api/items/ITEM-{i}",
+            "raw_path": f"/api/items/ITEM-{i}".encode(), "root_path": "",
+            "query_string": b"", "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    for handler in logger.handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(devnull)
+
+    variants = {
+        "no middleware": build_app(),
+        "BaseHTTPMiddleware (before)": build_app(LegacyRequestLoggingMiddleware),
+        "pure ASGI (after)": build_app(RequestLoggingMiddleware),
+    }
+
+    async def run():
+        results = {name: [] for name in variants}
+        for name, app in variants.items():
+            # Warm up routing and the middleware stack
+            await serve(app, 200)
+        for _ in range(args.rounds):
+            for name, app in variants.items():
+                results[name].append(await serve(app, args.requests))
+                metrics.reset()
+        return {name: statistics.median(times) for name, times in results.items()}
+
+    results = asyncio.run(run())
+    baseline = results["no middleware"]
+    print(f"{args.requests} requests x {args.rounds} rounds (median round)")
+    print(f"{'variant':<30} {'us/request':>12} {'overhead us':>12}")
+    for name, seconds in results.items():
+        print(f"{name:<30} {seconds * 1e6:>12.1f} {(seconds - baseline) * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
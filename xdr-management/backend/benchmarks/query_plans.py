@@ -0,0 +1,156 @@
+"""
+Query plan and latency benchmark for the hot filter columns.
+
+Builds a synthetic SQLite database without secondary indexes, runs the
+queries behind the list and dashboard endpoints, applies the schema
+migrations, and runs them again.
+
+Usage (from the backend directory):
+    python -m benchmarks.query_plans --events 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from app.core.database import Base
+from app.core.migrations import run_migrations
+import app.db_models  # noqa: F401  (registers tables)
+
+
+QUERIES = {
+    "events page": (
+        "SELECT id FROM security_events "
+        "ORDER BY timestamp DESC, id DESC LIMIT 100"
+    ),
+    "critical events page": (
+        "SELECT id FROM security_events WHERE severity = 'critical' "
+        "ORDER BY timestamp DESC, id DESC LIMIT 100"
+    ),
+    "investigating events page": (
+        "SELECT id FROM security_events WHERE status = 'investigating' "
+        "ORDER BY timestamp DESC, id DESC LIMIT 100"
+    ),
+    "critical events count": (
+        "SELECT COUNT(*) FROM security_events WHERE severity = 'critical'"
+    ),
+    "resolved today count": (
+        "SELECT COUNT(*) FROM security_events "
+        "WHERE status = 'resolved' AND updated_at >= :today"
+    ),
+    "active incidents": (
+        "SELECT id FROM incidents WHERE status = 'in_progress' "
+        "ORDER BY created_at DESC"
+    ),
+    "compromised assets count": (
+        "SELECT COUNT(*) FROM assets WHERE status = 'compromised'"
+    ),
+}
+
+
+def populate(engine, events: int, incidents: int, assets: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    severities = ["critical", "high", "medium", "low"]
+    statuses = ["investigating", "monitoring", "resolved"]
+
+    with engine.begin() as conn:
+        for start in range(0, events, 10000):
+            rows = []
+            for i in range(start, min(start + 10000, events)):
+                ts = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+                rows.append((
+                    f"EVT-{i + 1:07d}", ts, rng.choice(severities), "Port Scan",
+                    f"HOST-{rng.randint(1, 500)}", "synthetic", rng.choice(statuses),
+                    ts, ts + timedelta(minutes=rng.randint(0, 600))
+                ))
+            conn.exec_driver_sql(
+                "INSERT INTO security_events (id, timestamp, severity, type, source, "
+                "description, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        conn.exec_driver_sql(
+            "INSERT INTO incidents (id, title, severity, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (f"INC-{i:06d}", "synthetic", rng.choice(severities),
+                 rng.choice(["in_progress", "monitoring", "resolved"]),
+                 now - timedelta(hours=i), now)
+                for i in range(incidents)
+            ]
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO assets (id, name, type, status) VALUES (?, ?, ?, ?)",
+            [
+                (f"AST-{i:05d}", f"HOST-{i}", "Server",
+                 rng.choice(["healthy", "healthy", "investigating", "compromised"]))
+                for i in range(assets)
+            ]
+        )
+
+
+def drop_secondary_indexes(engine):
+    """Reproduce a deployment created before the indexes existed"""
+    with engine.begin() as conn:
+        names = conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'"
+        ).scalars().all()
+        for name in names:
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+        conn.exec_driver_sql("DELETE FROM schema_migrations")
+
+
+def measure(engine, repeat: int) -> dict:
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    results = {}
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        for name, sql in QUERIES.items():
+            sql = sql.replace(":today", "?")
+            params = (today,) if "?" in sql else ()
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.exec_driver_sql(sql, params).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = (" | ".join(row[-1] for row in plan), statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--incidents", type=int, default=5000)
+    parser.add_argument("--assets", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        drop_secondary_indexes(engine)
+        print(f"Populating {args.events} events, {args.incidents} incidents, {args.assets} assets...")
+        populate(engine, args.events, args.incidents, args.assets)
+
+        before = measure(engine, args.repeat)
+        applied = run_migrations(engine)
+        after = measure(engine, args.repeat)
+        print(f"Applied migrations: {applied}\n")
+
+        for name in QUERIES:
+            plan_before, ms_before = before[name]
+            plan_after, ms_after = after[name]
+            print(f"== {name}")
+            print(f"   before: {ms_before:9.3f} ms  {plan_before}")
+            print(f"   after:  {ms_after:9.3f} ms  {plan_after}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,62 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.status import WS_1008_POLICY_VIOLATION
+from pydantic import TypeAdapter, ValidationError
+from typing import AsyncIterator, List, Optional
+from collections import Counter
 from datetime import datetime
 import asyncio
+import csv
+import io
+import json
 import random
 
 from app.models import (
     SecurityEvent as SecurityEventSchema,
-    SecurityEventCreate, SecurityEventUpdate,
+    SecurityEventSearchHit,
+    SecurityEventCreate, SecurityEventUpdate, BulkIngestResult,
     Incident as IncidentSchema,
     IncidentCreate, IncidentUpdate,
     Asset as AssetSchema,
     AlertRule as AlertRuleSchema,
-    AlertRuleUpdate, DashboardStats
+    AlertRuleUpdate, DashboardStats,
+    StreamSubscription
 )
 from app.db_models import SecurityEvent, Incident, Asset, AlertRule, AuditLog
 from app.routes.auth import router as auth_router
-from app.routes.monitoring import router as monitoring_router
+from app.routes.monitoring import router as monitoring_router, prometheus_router
+from app.routes.archive import router as archive_router
+from app.routes.correlation import router as correlation_router
+from app.routes.iocs import router as iocs_router
 from app.core.security import (
     get_current_active_user,
+    password_hasher,
     require_admin,
     require_analyst,
     require_viewer
 )
 from app.core.config import settings
-from app.core.database import get_db, init_db, SessionLocal
+from app.core.database import (
+    get_db, init_db, connect_async_db, SessionLocal, AsyncSessionLocal, async_engine
+)
 from app.core.init_data import seed_database
+from app.core.audit import audit_writer, client_ip
+from app.core.cache import response_cache
+from app.core.correlation import correlator
+from app.core.id_allocator import id_allocator
+from app.core.incidents import open_incident
 from app.core.logging import logger, metrics
+from app.core.retention import retention
+from app.core.rules import rule_engine
+from app.core.stats import dashboard_stats
+from app.core.subscriptions import FILTER_FIELDS
+from app.core.websocket import manager
+from app.core.windows import window_aggregator
+from app.core.pagination import InvalidCursorError, encode_cursor, keyset_after
+from app.core.search import search_events as rank_events, search_filter
 from app.middleware.logging import RequestLoggingMiddleware
 
 app = FastAPI(
@@ -39,6 +68,10 @@ app = FastAPI(
 # Include routers
 app.include_router(auth_router)
 app.include_router(monitoring_router)
+app.include_router(prometheus_router)
+app.include_router(archive_router)
+app.include_router(correlation_router)
+app.include_router(iocs_router)
 
 # Add request logging middleware
 app.add_middleware(RequestLoggingMiddleware)
@@ -50,54 +83,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
-# WebSocket Connection Manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        metrics.record_websocket_connect()
-        logger.info(f"WebSocket client connected. Total: {len(self.active_connections)}")
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        metrics.record_websocket_disconnect()
-        logger.info(f"WebSocket client disconnected. Total: {len(self.active_connections)}")
-
-    async def broadcast(self, message: dict):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Error sending to client: {e}")
-                disconnected.append(connection)
-        for conn in disconnected:
-            if conn in self.active_connections:
-                self.active_connections.remove(conn)
-
-
-manager = ConnectionManager()
-
-
 # Helper function to log audit
-def log_audit(db: Session, user: dict, action: str, resource_type: str, resource_id: str = None, details: dict = None):
-    audit = AuditLog(
-        user_id=user["id"],
-        username=user["username"],
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        details=details
+async def log_audit(request: Request, user: dict, action: str, resource_type: str, resource_id: str = None, details: dict = None):
+    await audit_writer.record(
+        user, action, resource_type, resource_id, details, ip_address=client_ip(request)
     )
-    db.add(audit)
-    db.commit()
+
+
+# Run detections over newly stored (and broadcast) events
+async def process_ingested(db: AsyncSession, events: List[dict]):
+    correlator.observe_many(events)
+    await rule_engine.process(db, events)
 
 
 # Generate random events periodically
@@ -109,15 +109,13 @@ async def generate_random_events():
     while True:
         await asyncio.sleep(random.randint(10, 30))
 
-        db = SessionLocal()
-        try:
-            event_count = db.query(SecurityEvent).count()
+        async with AsyncSessionLocal() as db:
             event_type = random.choice(event_types)
             source = random.choice(sources)
             severity = random.choice(severities)
 
             new_event = SecurityEvent(
-                id=f"EVT-{str(event_count + 1).zfill(3)}",
+                id=await id_allocator.next_event_id(db),
                 timestamp=datetime.utcnow(),
                 severity=severity,
                 type=event_type,
@@ -130,80 +128,310 @@ async def generate_random_events():
             )
 
             db.add(new_event)
-            db.commit()
-
-            await manager.broadcast({
-                "type": "new_event",
-                "data": {
-                    "id": new_event.id,
-                    "timestamp": new_event.timestamp.isoformat() + "Z",
-                    "severity": new_event.severity,
-                    "type": new_event.type,
-                    "source": new_event.source,
-                    "description": new_event.description,
-                    "status": new_event.status,
-                    "affectedAssets": new_event.affected_assets,
-                    "iocs": new_event.iocs,
-                    "mitre": new_event.mitre
-                }
-            })
+            await db.commit()
+            dashboard_stats.event_created(new_event.severity)
+            response_cache.invalidate("events")
+
+            event_data = {
+                "id": new_event.id,
+                "timestamp": new_event.timestamp.isoformat() + "Z",
+                "severity": new_event.severity,
+                "type": new_event.type,
+                "source": new_event.source,
+                "description": new_event.description,
+                "status": new_event.status,
+                "affectedAssets": new_event.affected_assets,
+                "iocs": new_event.iocs,
+                "mitre": new_event.mitre
+            }
+            await manager.broadcast({"type": "new_event", "data": event_data})
+            await process_ingested(db, [event_data])
 
             print(f"Generated new event: {new_event.id} - {event_type}")
-        finally:
-            db.close()
+
+
+# Periodically recompute dashboard counters to correct drift
+async def reconcile_dashboard_stats():
+    while True:
+        await asyncio.sleep(settings.STATS_RECONCILE_SECONDS)
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await dashboard_stats.reconcile(db)
+        except Exception as e:
+            logger.error(f"Dashboard stats reconciliation failed: {e}")
+
+
+# Periodically snapshot windowed counts so they survive a restart
+async def snapshot_windows():
+    while True:
+        await asyncio.sleep(settings.WINDOW_SNAPSHOT_SECONDS)
+
+        try:
+            await asyncio.to_thread(window_aggregator.snapshot, settings.WINDOW_SNAPSHOT_PATH)
+        except Exception as e:
+            logger.error(f"Window snapshot failed: {e}")
+
+
+# Periodically publish this worker's metrics for multiprocess aggregation
+async def flush_metrics():
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+
+        try:
+            # Snapshot on the event loop, where requests are recorded
+            await asyncio.to_thread(metrics.write_snapshot, metrics.snapshot())
+        except Exception as e:
+            logger.error(f"Metrics flush failed: {e}")
+
+
+# Periodically delete (and optionally archive) rows past their retention TTL
+async def enforce_retention():
+    while True:
+        await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
+
+        try:
+            async with AsyncSessionLocal() as db:
+                report = await retention.run(db)
+            logger.info(f"Retention pass: {report}")
+        except Exception as e:
+            logger.error(f"Retention pass failed: {e}")
 
 
 # ========== Security Events Endpoints ==========
 
+# Page size used when a cursor is sent without an explicit limit
+DEFAULT_EVENT_PAGE_SIZE = 100
+
+# Maps API field names accepted by `fields=` to SecurityEvent column attributes
+EVENT_FIELD_COLUMNS = {
+    "id": "id",
+    "timestamp": "timestamp",
+    "severity": "severity",
+    "type": "type",
+    "source": "source",
+    "description": "description",
+    "status": "status",
+    "affectedAssets": "affected_assets",
+    "iocs": "iocs",
+    "mitre": "mitre"
+}
+
+
+def parse_event_fields(fields: Optional[str]) -> List[str]:
+    """Parse a comma separated `fields=` projection into API field names"""
+    if not fields:
+        return list(EVENT_FIELD_COLUMNS)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in EVENT_FIELD_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def serialize_event_row(row, fields: List[str]) -> dict:
+    """Serialize a (possibly projected) event row into its API representation"""
+    data = {}
+    for field in fields:
+        value = getattr(row, EVENT_FIELD_COLUMNS[field])
+        if field == "timestamp":
+            value = value.isoformat() + "Z"
+        elif field in ("affectedAssets", "iocs", "mitre"):
+            value = value or []
+        data[field] = value
+    return data
+
+
+async def filter_events(
+    db: AsyncSession,
+    query,
+    severity: Optional[str],
+    status: Optional[str],
+    search: Optional[str]
+):
+    """Apply the filters shared by the event list and export endpoints"""
+    if severity:
+        query = query.where(SecurityEvent.severity == severity)
+    if status:
+        query = query.where(SecurityEvent.status == status)
+    if search:
+        query = query.where(await search_filter(db, search))
+    return query
+
+
 @app.get("/api/events", response_model=List[SecurityEventSchema])
 async def get_events(
+    request: Request,
     severity: Optional[str] = None,
     status: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
-    """Get all security events with optional filters"""
-    query = db.query(SecurityEvent)
-
-    if severity:
-        query = query.filter(SecurityEvent.severity == severity)
-    if status:
-        query = query.filter(SecurityEvent.status == status)
-    if search:
-        search_lower = f"%{search.lower()}%"
-        query = query.filter(
-            (SecurityEvent.type.ilike(search_lower)) |
-            (SecurityEvent.source.ilike(search_lower)) |
-            (SecurityEvent.description.ilike(search_lower))
+    """
+    Get security events with optional filters.
+
+    Without `limit` or `cursor` every matching event is returned, as before.
+    Otherwise results are keyset-paginated on (timestamp, id), newest first,
+    and when more rows are available the `X-Next-Cursor` response header
+    carries the cursor for the next page. `fields` restricts the loaded and
+    returned columns.
+    """
+    selected = parse_event_fields(fields)
+    if limit is None and cursor is not None:
+        limit = DEFAULT_EVENT_PAGE_SIZE
+    try:
+        after = keyset_after(SecurityEvent.timestamp, SecurityEvent.id, cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async def load():
+        loaded = dict.fromkeys(["id", "timestamp", *selected])
+        query = select(*[getattr(SecurityEvent, EVENT_FIELD_COLUMNS[f]) for f in loaded])
+        query = await filter_events(db, query, severity, status, search)
+        if after is not None:
+            query = query.where(after)
+
+        query = query.order_by(SecurityEvent.timestamp.desc(), SecurityEvent.id.desc())
+        if limit is not None:
+            query = query.limit(limit + 1)
+        rows = (await db.execute(query)).all()
+
+        headers = {}
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+        if fields:
+            # Projected rows don't satisfy the full response model
+            content = [serialize_event_row(row, selected) for row in rows]
+        else:
+            content = [
+                SecurityEventSchema(**serialize_event_row(row, selected)).model_dump(mode="json")
+                for row in rows
+            ]
+        return JSONResponse(content=content, headers=headers)
+
+    return await response_cache.respond(request, ["events"], current_user["role"], load)
+
+
+@app.get("/api/events/search", response_model=List[SecurityEventSearchHit])
+async def search_events(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_viewer)
+):
+    """
+    Full-text search over event type, source and description, best match first.
+
+    Words match as prefixes (`exfil` finds "Exfiltration"); quoted text
+    matches as a phrase.
+    """
+    async def load():
+        return [
+            SecurityEventSearchHit(
+                id=e.id,
+                timestamp=e.timestamp.isoformat() + "Z",
+                severity=e.severity,
+                type=e.type,
+                source=e.source,
+                description=e.description,
+                status=e.status,
+                affectedAssets=e.affected_assets or [],
+                iocs=e.iocs or [],
+                mitre=e.mitre or [],
+                score=round(score, 4)
+            ) for e, score in await rank_events(db, q, limit)
+        ]
+
+    return await response_cache.respond(request, ["events"], current_user["role"], load)
+
+
+# Export format -> media type
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "sse": "text/event-stream"
+}
+
+
+def format_export_chunk(rows: List[dict], format: str, fields: List[str]) -> str:
+    """Encode a chunk of serialized events in the export format"""
+    if format == "ndjson":
+        return "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+    if format == "sse":
+        return "".join(
+            f"event: event\ndata: {json.dumps(row, separators=(',', ':'))}\n\n" for row in rows
         )
 
-    events = query.order_by(SecurityEvent.timestamp.desc()).all()
-
-    return [
-        SecurityEventSchema(
-            id=e.id,
-            timestamp=e.timestamp.isoformat() + "Z",
-            severity=e.severity,
-            type=e.type,
-            source=e.source,
-            description=e.description,
-            status=e.status,
-            affectedAssets=e.affected_assets or [],
-            iocs=e.iocs or [],
-            mitre=e.mitre or []
-        ) for e in events
-    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            ";".join(value) if isinstance(value, list) else value
+            for value in (row[f] for f in fields)
+        ])
+    return buffer.getvalue()
+
+
+@app.get("/api/events/export")
+async def export_events(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|sse)$"),
+    severity: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(require_viewer)
+):
+    """
+    Stream all matching security events, newest first, as NDJSON, CSV or
+    Server-Sent Events.
+
+    Rows are read through a server-side cursor and written chunk by chunk,
+    so memory use does not grow with the result size. Accepts the same
+    filters as the event list.
+    """
+    selected = parse_event_fields(fields)
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+
+    async def generate() -> AsyncIterator[str]:
+        # The export outlives the request's dependencies, so it owns its session
+        async with AsyncSessionLocal() as db:
+            query = select(*[getattr(SecurityEvent, EVENT_FIELD_COLUMNS[f]) for f in selected])
+            query = await filter_events(db, query, severity, status, search)
+            query = query.order_by(SecurityEvent.timestamp.desc(), SecurityEvent.id.desc())
+
+            if format == "csv":
+                yield ",".join(selected) + "\r\n"
+            count = 0
+            result = await db.stream(query.execution_options(yield_per=chunk_size))
+            async for partition in result.partitions():
+                rows = [serialize_event_row(row, selected) for row in partition]
+                count += len(rows)
+                yield format_export_chunk(rows, format, selected)
+            if format == "sse":
+                yield f"event: end\ndata: {json.dumps({'count': count})}\n\n"
+
+    headers = {}
+    if format != "sse":
+        filename = f"events-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{format}"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(generate(), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
 
 
 @app.get("/api/events/{event_id}", response_model=SecurityEventSchema)
 async def get_event(
     event_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
     """Get a specific security event"""
-    event = db.query(SecurityEvent).filter(SecurityEvent.id == event_id).first()
+    event = await db.get(SecurityEvent, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
@@ -223,13 +451,13 @@ async def get_event(
 
 @app.post("/api/events", response_model=SecurityEventSchema)
 async def create_event(
+    request: Request,
     event: SecurityEventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_analyst)
 ):
     """Create a new security event"""
-    event_count = db.query(SecurityEvent).count()
-    new_id = f"EVT-{str(event_count + 1).zfill(3)}"
+    new_id = await id_allocator.next_event_id(db)
 
     new_event = SecurityEvent(
         id=new_id,
@@ -245,10 +473,12 @@ async def create_event(
     )
 
     db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+    await db.commit()
+    await db.refresh(new_event)
+    dashboard_stats.event_created(new_event.severity)
+    response_cache.invalidate("events")
 
-    log_audit(db, current_user, "create", "event", new_id, {"type": event.type})
+    await log_audit(request, current_user, "create", "event", new_id, {"type": event.type})
 
     event_data = {
         "id": new_event.id,
@@ -264,32 +494,149 @@ async def create_event(
     }
 
     await manager.broadcast({"type": "new_event", "data": event_data})
+    await process_ingested(db, [event_data])
 
     return SecurityEventSchema(**event_data)
 
 
+event_batch_adapter = TypeAdapter(List[SecurityEventCreate])
+
+
+def parse_event_batch(body: bytes, content_type: str) -> List[SecurityEventCreate]:
+    """Validate a JSON array or NDJSON body as a batch of events"""
+    if "ndjson" in content_type:
+        # Join the lines into one array so the batch is validated in a single pass
+        lines = [line for line in body.splitlines() if line.strip()]
+        body = b"[" + b",".join(lines) + b"]"
+    try:
+        return event_batch_adapter.validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=[
+                {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+                for err in e.errors()
+            ]
+        )
+
+
+@app.post("/api/events/bulk", response_model=BulkIngestResult)
+async def create_events_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_analyst)
+):
+    """
+    Create many security events in one call.
+
+    Accepts a JSON array or NDJSON (`Content-Type: application/x-ndjson`).
+    The whole batch is validated before anything is written; events and
+    their audit entries are inserted in a single transaction and announced
+    with one `new_events` broadcast.
+    """
+    events = parse_event_batch(
+        await request.body(),
+        request.headers.get("content-type", "")
+    )
+    if not events:
+        return BulkIngestResult(inserted=0, ids=[])
+    if len(events) > settings.BULK_INGEST_MAX_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.BULK_INGEST_MAX_EVENTS} events"
+        )
+
+    event_ids = await id_allocator.next_event_ids(db, len(events))
+    now = datetime.utcnow()
+
+    rows = [
+        {
+            "id": event_ids[i],
+            "timestamp": now,
+            "severity": event.severity.value,
+            "type": event.type,
+            "source": event.source,
+            "description": event.description,
+            "status": "investigating",
+            "affected_assets": event.affectedAssets,
+            "iocs": event.iocs,
+            "mitre": event.mitre,
+            "created_at": now,
+            "updated_at": now
+        }
+        for i, event in enumerate(events)
+    ]
+    audit_rows = [
+        {
+            "user_id": current_user["id"],
+            "username": current_user["username"],
+            "action": "create",
+            "resource_type": "event",
+            "resource_id": row["id"],
+            "details": {"type": row["type"], "bulk": True},
+            "ip_address": client_ip(request),
+            "timestamp": now
+        }
+        for row in rows
+    ]
+
+    # Core executemany inserts skip per-object ORM bookkeeping
+    await db.execute(SecurityEvent.__table__.insert(), rows)
+    await db.execute(AuditLog.__table__.insert(), audit_rows)
+    await db.commit()
+    for severity, count in Counter(row["severity"] for row in rows).items():
+        dashboard_stats.event_created(severity, count)
+    response_cache.invalidate("events")
+
+    timestamp = now.isoformat() + "Z"
+    event_data = [
+        {
+            "id": row["id"],
+            "timestamp": timestamp,
+            "severity": row["severity"],
+            "type": row["type"],
+            "source": row["source"],
+            "description": row["description"],
+            "status": row["status"],
+            "affectedAssets": row["affected_assets"],
+            "iocs": row["iocs"],
+            "mitre": row["mitre"]
+        }
+        for row in rows
+    ]
+    await manager.broadcast({"type": "new_events", "data": event_data})
+    await process_ingested(db, event_data)
+
+    return BulkIngestResult(inserted=len(rows), ids=[row["id"] for row in rows])
+
+
 @app.put("/api/events/{event_id}", response_model=SecurityEventSchema)
 async def update_event(
+    request: Request,
     event_id: str,
     update: SecurityEventUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_analyst)
 ):
     """Update a security event"""
-    event = db.query(SecurityEvent).filter(SecurityEvent.id == event_id).first()
+    event = await db.get(SecurityEvent, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
+    old_status, old_updated_at = event.status, event.updated_at
+
     if update.status is not None:
         event.status = update.status
     if update.description is not None:
         event.description = update.description
 
     event.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
+    dashboard_stats.event_updated(old_status, old_updated_at, event.status, event.updated_at)
+    response_cache.invalidate("events")
 
-    log_audit(db, current_user, "update", "event", event_id)
+    await log_audit(request, current_user, "update", "event", event_id)
 
     return SecurityEventSchema(
         id=event.id,
@@ -307,19 +654,23 @@ async def update_event(
 
 @app.delete("/api/events/{event_id}")
 async def delete_event(
+    request: Request,
     event_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
     """Delete a security event"""
-    event = db.query(SecurityEvent).filter(SecurityEvent.id == event_id).first()
+    event = await db.get(SecurityEvent, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    db.delete(event)
-    db.commit()
+    deleted = (event.severity, event.status, event.updated_at)
+    await db.delete(event)
+    await db.commit()
+    dashboard_stats.event_deleted(*deleted)
+    response_cache.invalidate("events")
 
-    log_audit(db, current_user, "delete", "event", event_id)
+    await log_audit(request, current_user, "delete", "event", event_id)
 
     return {"message": "Event deleted successfully"}
 
@@ -328,42 +679,46 @@ async def delete_event(
 
 @app.get("/api/incidents", response_model=List[IncidentSchema])
 async def get_incidents(
+    request: Request,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
     """Get all incidents"""
-    query = db.query(Incident)
-    if status:
-        query = query.filter(Incident.status == status)
-
-    incidents = query.order_by(Incident.created_at.desc()).all()
-
-    return [
-        IncidentSchema(
-            id=i.id,
-            title=i.title,
-            severity=i.severity,
-            status=i.status,
-            createdAt=i.created_at.isoformat() + "Z",
-            updatedAt=i.updated_at.isoformat() + "Z",
-            assignee=i.assignee or "",
-            description=i.description or "",
-            affectedSystems=i.affected_systems or 0,
-            relatedEvents=i.related_events or [],
-            timeline=i.timeline or []
-        ) for i in incidents
-    ]
+    async def load():
+        query = select(Incident)
+        if status:
+            query = query.where(Incident.status == status)
+
+        incidents = (await db.execute(query.order_by(Incident.created_at.desc()))).scalars().all()
+
+        return [
+            IncidentSchema(
+                id=i.id,
+                title=i.title,
+                severity=i.severity,
+                status=i.status,
+                createdAt=i.created_at.isoformat() + "Z",
+                updatedAt=i.updated_at.isoformat() + "Z",
+                assignee=i.assignee or "",
+                description=i.description or "",
+                affectedSystems=i.affected_systems or 0,
+                relatedEvents=i.related_events or [],
+                timeline=i.timeline or []
+            ) for i in incidents
+        ]
+
+    return await response_cache.respond(request, ["incidents"], current_user["role"], load)
 
 
 @app.get("/api/incidents/{incident_id}", response_model=IncidentSchema)
 async def get_incident(
     incident_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
     """Get a specific incident"""
-    incident = db.query(Incident).filter(Incident.id == incident_id).first()
+    incident = await db.get(Incident, incident_id)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
 
@@ -384,47 +739,24 @@ async def get_incident(
 
 @app.post("/api/incidents", response_model=IncidentSchema)
 async def create_incident(
+    request: Request,
     incident: IncidentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_analyst)
 ):
     """Create a new incident"""
-    incident_count = db.query(Incident).count()
-    new_id = f"INC-2026-{str(incident_count + 1).zfill(3)}"
-    now = datetime.utcnow()
-
-    new_incident = Incident(
-        id=new_id,
+    new_incident = await open_incident(
+        db,
         title=incident.title,
         severity=incident.severity,
-        status="in_progress",
-        assignee=incident.assignee,
+        actor=current_user["username"],
         description=incident.description,
-        affected_systems=incident.affectedSystems,
         related_events=incident.relatedEvents,
-        timeline=[{
-            "time": now.strftime("%H:%M"),
-            "action": "Incident created",
-            "user": current_user["username"]
-        }],
-        created_at=now,
-        updated_at=now
+        assignee=incident.assignee,
+        affected_systems=incident.affectedSystems
     )
 
-    db.add(new_incident)
-    db.commit()
-    db.refresh(new_incident)
-
-    log_audit(db, current_user, "create", "incident", new_id)
-
-    await manager.broadcast({
-        "type": "new_incident",
-        "data": {
-            "id": new_incident.id,
-            "title": new_incident.title,
-            "severity": new_incident.severity
-        }
-    })
+    await log_audit(request, current_user, "create", "incident", new_incident.id)
 
     return IncidentSchema(
         id=new_incident.id,
@@ -443,18 +775,21 @@ async def create_incident(
 
 @app.put("/api/incidents/{incident_id}", response_model=IncidentSchema)
 async def update_incident(
+    request: Request,
     incident_id: str,
     update: IncidentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_analyst)
 ):
     """Update an incident"""
-    incident = db.query(Incident).filter(Incident.id == incident_id).first()
+    incident = await db.get(Incident, incident_id)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
 
     now = datetime.utcnow()
-    timeline = incident.timeline or []
+    old_status = incident.status
+    # Copy so the JSON column sees a new value and persists the appended entries
+    timeline = list(incident.timeline or [])
 
     if update.status is not None:
         incident.status = update.status
@@ -474,10 +809,12 @@ async def update_incident(
 
     incident.timeline = timeline
     incident.updated_at = now
-    db.commit()
-    db.refresh(incident)
+    await db.commit()
+    await db.refresh(incident)
+    dashboard_stats.incident_updated(incident.id, old_status, incident.status, incident.timeline)
+    response_cache.invalidate("incidents")
 
-    log_audit(db, current_user, "update", "incident", incident_id)
+    await log_audit(request, current_user, "update", "incident", incident_id)
 
     return IncidentSchema(
         id=incident.id,
@@ -498,41 +835,45 @@ async def update_incident(
 
 @app.get("/api/assets", response_model=List[AssetSchema])
 async def get_assets(
+    request: Request,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
     """Get all assets"""
-    query = db.query(Asset)
-    if status:
-        query = query.filter(Asset.status == status)
-
-    assets = query.all()
-
-    return [
-        AssetSchema(
-            id=a.id,
-            name=a.name,
-            type=a.type,
-            os=a.os or "",
-            ip=a.ip or "",
-            status=a.status,
-            lastSeen=a.last_seen.isoformat() + "Z" if a.last_seen else "",
-            owner=a.owner or "",
-            department=a.department or "",
-            riskScore=a.risk_score or 0
-        ) for a in assets
-    ]
+    async def load():
+        query = select(Asset)
+        if status:
+            query = query.where(Asset.status == status)
+
+        assets = (await db.execute(query)).scalars().all()
+
+        return [
+            AssetSchema(
+                id=a.id,
+                name=a.name,
+                type=a.type,
+                os=a.os or "",
+                ip=a.ip or "",
+                status=a.status,
+                lastSeen=a.last_seen.isoformat() + "Z" if a.last_seen else "",
+                owner=a.owner or "",
+                department=a.department or "",
+                riskScore=a.risk_score or 0
+            ) for a in assets
+        ]
+
+    return await response_cache.respond(request, ["assets"], current_user["role"], load)
 
 
 @app.get("/api/assets/{asset_id}", response_model=AssetSchema)
 async def get_asset(
     asset_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
     """Get a specific asset"""
-    asset = db.query(Asset).filter(Asset.id == asset_id).first()
+    asset = await db.get(Asset, asset_id)
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
@@ -554,33 +895,38 @@ async def get_asset(
 
 @app.get("/api/alerts", response_model=List[AlertRuleSchema])
 async def get_alert_rules(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
     """Get all alert rules"""
-    rules = db.query(AlertRule).all()
-
-    return [
-        AlertRuleSchema(
-            id=r.id,
-            name=r.name,
-            severity=r.severity,
-            enabled=r.enabled,
-            conditions=r.conditions or "",
-            actions=r.actions or []
-        ) for r in rules
-    ]
+    async def load():
+        rules = (await db.execute(select(AlertRule))).scalars().all()
+
+        return [
+            AlertRuleSchema(
+                id=r.id,
+                name=r.name,
+                severity=r.severity,
+                enabled=r.enabled,
+                conditions=r.conditions or "",
+                actions=r.actions or []
+            ) for r in rules
+        ]
+
+    return await response_cache.respond(request, ["alerts"], current_user["role"], load)
 
 
 @app.put("/api/alerts/{rule_id}", response_model=AlertRuleSchema)
 async def update_alert_rule(
+    request: Request,
     rule_id: str,
     update: AlertRuleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
     """Update an alert rule"""
-    rule = db.query(AlertRule).filter(AlertRule.id == rule_id).first()
+    rule = await db.get(AlertRule, rule_id)
     if not rule:
         raise HTTPException(status_code=404, detail="Alert rule not found")
 
@@ -588,10 +934,11 @@ async def update_alert_rule(
         rule.enabled = update.enabled
 
     rule.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(rule)
+    await db.commit()
+    await db.refresh(rule)
+    response_cache.invalidate("alerts")
 
-    log_audit(db, current_user, "update", "alert_rule", rule_id, {"enabled": update.enabled})
+    await log_audit(request, current_user, "update", "alert_rule", rule_id, {"enabled": update.enabled})
 
     return AlertRuleSchema(
         id=rule.id,
@@ -607,51 +954,96 @@ async def update_alert_rule(
 
 @app.get("/api/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_viewer)
 ):
-    """Get dashboard statistics"""
-    total_events = db.query(SecurityEvent).count()
-    critical_events = db.query(SecurityEvent).filter(SecurityEvent.severity == "critical").count()
-    active_incidents = db.query(Incident).filter(Incident.status == "in_progress").count()
-    resolved_today = db.query(SecurityEvent).filter(
-        SecurityEvent.status == "resolved",
-        SecurityEvent.updated_at >= datetime.utcnow().replace(hour=0, minute=0, second=0)
-    ).count()
-    assets_monitored = db.query(Asset).count()
-    compromised_assets = db.query(Asset).filter(Asset.status == "compromised").count()
-
-    # Determine threat level
-    threat_level = "low"
-    if critical_events > 3 or compromised_assets > 2:
-        threat_level = "critical"
-    elif critical_events > 1 or compromised_assets > 0:
-        threat_level = "high"
-    elif total_events > 10:
-        threat_level = "medium"
-
-    return DashboardStats(
-        totalEvents=total_events,
-        criticalEvents=critical_events,
-        activeIncidents=active_incidents,
-        resolvedToday=resolved_today,
-        assetsMonitored=assets_monitored,
-        compromisedAssets=compromised_assets,
-        averageResponseTime="15 min",
-        threatLevel=threat_level
+    """Get dashboard statistics from the incrementally maintained counters"""
+    async def load():
+        if not dashboard_stats.initialized:
+            await dashboard_stats.reconcile(db)
+        stats = dashboard_stats.snapshot()
+        total_events = stats["total_events"]
+        critical_events = stats["critical_events"]
+        compromised_assets = stats["compromised_assets"]
+
+        # Determine threat level
+        threat_level = "low"
+        if critical_events > 3 or compromised_assets > 2:
+            threat_level = "critical"
+        elif critical_events > 1 or compromised_assets > 0:
+            threat_level = "high"
+        elif total_events > 10:
+            threat_level = "medium"
+
+        return DashboardStats(
+            totalEvents=total_events,
+            criticalEvents=critical_events,
+            activeIncidents=stats["active_incidents"],
+            resolvedToday=stats["resolved_today"],
+            assetsMonitored=stats["assets_monitored"],
+            compromisedAssets=compromised_assets,
+            averageResponseTime=stats["average_response_time"],
+            threatLevel=threat_level
+        )
+
+    return await response_cache.respond(
+        request, ["events", "incidents", "assets"], current_user["role"], load
     )
 
 
 # ========== WebSocket Endpoint ==========
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time event notifications"""
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, since: Optional[int] = None):
+    """
+    WebSocket endpoint for real-time event notifications.
+
+    Clients narrow the stream by sending
+    `{"type": "subscribe", "filters": {"severity": [...], "asset": [...]}}`
+    with any of severity, type, source, asset and status; every other
+    message is answered with a pong.
+
+    A reconnecting client passes the last `seq` it received as `since` to
+    get the broadcasts it missed, or a `resync_required` message when they
+    are too old to replay. Filters can also be given as query parameters
+    (`/ws?since=42&severity=critical&asset=SERVER-DB-01`); they apply to
+    the replay too, which a later subscribe message cannot.
+    """
+    try:
+        subscription = StreamSubscription.model_validate({
+            dimension: websocket.query_params.getlist(dimension)
+            for dimension in FILTER_FIELDS if dimension in websocket.query_params
+        })
+    except ValidationError:
+        await websocket.close(code=WS_1008_POLICY_VIOLATION)
+        return
+    await manager.connect(
+        websocket, since=since, filters=subscription.model_dump(mode="json", exclude_none=True)
+    )
     try:
         while True:
             data = await websocket.receive_text()
-            await websocket.send_json({"type": "pong", "message": "Connection alive"})
+            try:
+                request = json.loads(data)
+            except ValueError:
+                request = None
+
+            if isinstance(request, dict) and request.get("type") == "subscribe":
+                try:
+                    subscription = StreamSubscription.model_validate(request.get("filters") or {})
+                except ValidationError as e:
+                    error = e.errors()[0]
+                    await manager.send(websocket, {
+                        "type": "error",
+                        "message": f"Invalid filter {'.'.join(map(str, error['loc']))}: {error['msg']}"
+                    })
+                    continue
+                filters = subscription.model_dump(mode="json", exclude_none=True)
+                manager.subscribe(websocket, filters)
+                await manager.send(websocket, {"type": "subscribed", "filters": filters})
+            else:
+                await manager.send(websocket, {"type": "pong", "message": "Connection alive"})
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
@@ -677,6 +1069,7 @@ async def root():
 async def startup_event():
     """Initialize database and start background tasks"""
     print("Initializing database...")
+    # Schema setup and seeding run once on the sync engine before serving requests
     init_db()
 
     # Seed database with initial data
@@ -686,9 +1079,37 @@ async def startup_event():
     finally:
         db.close()
 
+    await connect_async_db()
+    await manager.start()
+    await audit_writer.start()
+    await rule_engine.start()
+    window_aggregator.restore(settings.WINDOW_SNAPSHOT_PATH)
+
     # Start background event generator
-    asyncio.create_task(generate_random_events())
-    print("Background event generator started")
+    if settings.EVENT_GENERATOR_ENABLED:
+        asyncio.create_task(generate_random_events())
+        print("Background event generator started")
+
+    asyncio.create_task(reconcile_dashboard_stats())
+    asyncio.create_task(snapshot_windows())
+
+    if settings.RETENTION_ENABLED:
+        asyncio.create_task(enforce_retention())
+
+    if settings.METRICS_MULTIPROC_DIR:
+        asyncio.create_task(flush_metrics())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close WebSocket clients, run queued rule actions, flush queued audit logs, window counts and metrics, close pooled async database connections"""
+    await rule_engine.stop()
+    await manager.stop()
+    await audit_writer.stop()
+    await asyncio.to_thread(window_aggregator.snapshot, settings.WINDOW_SNAPSHOT_PATH)
+    await asyncio.to_thread(metrics.write_snapshot, metrics.snapshot())
+    await async_engine.dispose()
+    await asyncio.to_thread(password_hasher.shutdown)
 
 
 if __name__ == "__main__":
@@ -1,41 +1,55 @@
+import os
+import shutil
+import tempfile
+
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+
+# Point the app at a throwaway database file before it is imported. A file is
+# needed because the sync seeding engine and the async request engine open
+# separate connections.
+TEST_DB_DIR = tempfile.mkdtemp(prefix="xdr-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
+os.environ["EVENT_GENERATOR_ENABLED"] = "false"
+os.environ["WINDOW_SNAPSHOT_PATH"] = os.path.join(TEST_DB_DIR, "windows.json")
+os.environ["AUDIT_FALLBACK_PATH"] = os.path.join(TEST_DB_DIR, "audit_fallback.jsonl")
 
 from main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, SessionLocal, AsyncSessionLocal, connect_async_db, engine
 from app.core.init_data import seed_database
-
-# Test database URL (in-memory SQLite)
-TEST_DATABASE_URL = "sqlite:///:memory:"
-
-# Create test engine
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
-)
-
-# Test session factory
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from app.core.cache import response_cache
+from app.core.correlation import correlator
+from app.core.id_allocator import id_allocator
+from app.core.rules import rule_engine
+from app.core.stats import dashboard_stats
+from app.core.users import user_store
+from app.core.windows import window_aggregator
 
 
-def override_get_db():
-    """Override database dependency for testing"""
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@pytest.fixture(scope="session", autouse=True)
+def test_database_dir():
+    """Remove the test database once the session ends"""
+    yield TEST_DB_DIR
+    engine.dispose()
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
 
 
 @pytest.fixture(scope="function")
 def db_session():
-    """Create a fresh database session for each test"""
+    """Create a fresh, seeded database for each test"""
+    Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    id_allocator.reset()
+    dashboard_stats.reset()
+    response_cache.clear()
+    rule_engine.reset()
+    correlator.reset()
+    window_aggregator.reset()
+    user_store.reset()
+    if os.path.exists(os.environ["WINDOW_SNAPSHOT_PATH"]):
+        os.remove(os.environ["WINDOW_SNAPSHOT_PATH"])
+    db = SessionLocal()
 
     # Seed test data
     seed_database(db)
@@ -43,19 +57,22 @@ def db_session():
     yield db
 
     db.close()
-    Base.metadata.drop_all(bind=engine)
+
+
+@pytest_asyncio.fixture
+async def async_db(db_session):
+    """Async session on the seeded test database"""
+    await connect_async_db()
+    async with AsyncSessionLocal() as session:
+        yield session
 
 
 @pytest.fixture(scope="function")
 def client(db_session):
-    """Create test client with database override"""
-    app.dependency_overrides[get_db] = override_get_db
-
+    """Create test client on the seeded test database"""
     with TestClient(app) as test_client:
         yield test_client
 
-    app.dependency_overrides.clear()
-
 
 @pytest.fixture
 def auth_headers(client):
@@ -88,3 +105,19 @@ def viewer_headers(client):
     )
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+class FakeClock:
+    """Settable time source"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Settable clock for components that take a `clock` callable"""
+    return FakeClock()
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from app.core import archive
+from app.core.archive import cold_archive
+from app.db_models import AuditLog, SecurityEvent
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    """Point the cold archive at a temporary directory"""
+    monkeypatch.setattr(cold_archive, "root", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def old_rows(db_session):
+    """Events and audit logs from 100 and 101 days ago"""
+    base = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=100)
+    for i, (days, severity) in enumerate([(0, "critical"), (0, "low"), (1, "critical")]):
+        db_session.add(SecurityEvent(
+            id=f"EVT-OLD-{i}", timestamp=base - timedelta(days=days), severity=severity,
+            type="Port Scan", source="HOST-1", description="old", status="resolved",
+            affected_assets=["HOST-1"], iocs=["10.0.0.1"], mitre=["T1046"]
+        ))
+    db_session.add(AuditLog(
+        user_id=1, username="admin", action="delete", resource_type="event",
+        resource_id="EVT-X", details={"reason": "test"}, timestamp=base
+    ))
+    db_session.commit()
+    return base
+
+
+class TestColdArchive:
+    """Test archiving cold rows to Parquet partitions"""
+
+    def test_run_moves_old_rows(self, client, auth_headers, archive_dir, old_rows):
+        """Test old rows leave the database and land in daily partitions"""
+        response = client.post("/api/archive/run", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["archived"] == {"security_events": 3, "audit_logs": 1}
+
+        assert client.get("/api/events/EVT-OLD-0", headers=auth_headers).status_code == 404
+        day = old_rows.date().isoformat()
+        table = pq.read_table(archive_dir / "security_events" / f"date={day}" / "data.parquet")
+        assert sorted(table["id"].to_pylist()) == ["EVT-OLD-0", "EVT-OLD-1"]
+
+        partitions = client.get("/api/archive/security_events/partitions", headers=auth_headers).json()
+        assert [p["rows"] for p in partitions] == [1, 2]
+
+    def test_recent_rows_stay(self, client, auth_headers, archive_dir, old_rows):
+        """Test rows newer than the cutoff are not archived"""
+        before = len(client.get("/api/events?limit=1000", headers=auth_headers).json())
+        client.post("/api/archive/run", headers=auth_headers)
+        after = len(client.get("/api/events?limit=1000", headers=auth_headers).json())
+        assert after == before - 3
+
+    def test_rerun_does_not_duplicate(self, client, auth_headers, archive_dir, old_rows, db_session):
+        """Test archiving the same day twice merges by primary key"""
+        client.post("/api/archive/run", headers=auth_headers)
+        db_session.add(SecurityEvent(
+            id="EVT-OLD-0", timestamp=old_rows, severity="critical", type="Port Scan",
+            source="HOST-1", status="resolved"
+        ))
+        db_session.commit()
+        client.post("/api/archive/run", headers=auth_headers)
+
+        rows = client.get("/api/archive/security_events/rows", headers=auth_headers).json()
+        assert sorted(r["id"] for r in rows) == ["EVT-OLD-0", "EVT-OLD-1", "EVT-OLD-2"]
+
+    def test_query_rows(self, client, auth_headers, archive_dir, old_rows):
+        """Test querying archived rows by date range, column filter and fields"""
+        client.post("/api/archive/run", headers=auth_headers)
+        day = old_rows.date().isoformat()
+        response = client.get(
+            f"/api/archive/security_events/rows?start={day}&end={day}&severity=critical&fields=id,iocs",
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.json() == [{"id": "EVT-OLD-0", "iocs": ["10.0.0.1"]}]
+
+        logs = client.get("/api/archive/audit_logs/rows", headers=auth_headers).json()
+        assert logs[0]["details"] == {"reason": "test"}
+        assert logs[0]["timestamp"].endswith("Z")
+
+    def test_scan_stops_at_limit(self, client, auth_headers, archive_dir, old_rows, monkeypatch):
+        """Test a page of rows is read newest day first without opening older days"""
+        client.post("/api/archive/run", headers=auth_headers)
+        opened = []
+        dataset = archive.ds.dataset
+
+        def spy(source, **kwargs):
+            opened.append(source)
+            return dataset(source, **kwargs)
+
+        monkeypatch.setattr(archive.ds, "dataset", spy)
+        rows = cold_archive.scan("security_events", columns=["id"], limit=2)
+
+        assert rows == [{"id": "EVT-OLD-1"}, {"id": "EVT-OLD-0"}]
+        assert len(opened) == 1 and old_rows.date().isoformat() in opened[0]
+
+    def test_summary(self, client, auth_headers, archive_dir, old_rows):
+        """Test archived counts grouped by severity"""
+        client.post("/api/archive/run", headers=auth_headers)
+        response = client.get("/api/archive/security_events/summary?by=severity", headers=auth_headers)
+        assert response.json() == [
+            {"severity": "critical", "count": 2},
+            {"severity": "low", "count": 1}
+        ]
+
+    def test_download_partition(self, client, auth_headers, archive_dir, old_rows):
+        """Test downloading one day as a Parquet file"""
+        client.post("/api/archive/run", headers=auth_headers)
+        day = old_rows.date().isoformat()
+        response = client.get(f"/api/archive/security_events/partitions/{day}", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.content[:4] == b"PAR1"
+
+        missing = client.get("/api/archive/security_events/partitions/2000-01-01", headers=auth_headers)
+        assert missing.status_code == 404
+
+    def test_invalid_requests(self, client, auth_headers, analyst_headers, archive_dir):
+        """Test unknown tables, filters and non-admin runs are rejected"""
+        assert client.get("/api/archive/users/partitions", headers=auth_headers).status_code == 404
+        assert client.get(
+            "/api/archive/security_events/rows?description=x", headers=auth_headers
+        ).status_code == 400
+        assert client.post("/api/archive/run", headers=analyst_headers).status_code == 403
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.audit import AuditWriter
+from app.db_models import AuditLog
+
+USER = {"id": "1", "username": "admin"}
+
+
+async def audit_count(db, **criteria):
+    return await db.scalar(select(func.count()).select_from(AuditLog).filter_by(**criteria))
+
+
+class TestAuditWriter:
+    """Test batched audit log writes"""
+
+    @pytest.mark.asyncio
+    async def test_flushes_full_batch(self, async_db):
+        """Test a full batch is written without waiting for the flush interval"""
+        writer = AuditWriter(batch_size=3, flush_seconds=60)
+        await writer.start()
+        for i in range(3):
+            await writer.record(USER, "update", "event", f"EVT-{i}")
+        for _ in range(50):
+            if await audit_count(async_db, action="update") == 3:
+                break
+            await asyncio.sleep(0.02)
+        assert await audit_count(async_db, action="update") == 3
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_flushes_after_interval(self, async_db):
+        """Test a partial batch is written once the flush interval passes"""
+        writer = AuditWriter(batch_size=100, flush_seconds=0.05)
+        await writer.start()
+        await writer.record(USER, "update", "event", "EVT-1")
+        assert await audit_count(async_db, action="update") == 0
+
+        await asyncio.sleep(0.3)
+        assert await audit_count(async_db, action="update") == 1
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_queue(self, async_db):
+        """Test rows still queued at shutdown are written"""
+        writer = AuditWriter(batch_size=2, flush_seconds=60)
+        await writer.start()
+        for i in range(5):
+            await writer.record(USER, "create", "event", f"EVT-{i}")
+        await writer.stop()
+
+        assert await audit_count(async_db, action="create") == 5
+        assert not writer.running
+
+    @pytest.mark.asyncio
+    async def test_durable_actions_commit_immediately(self, async_db):
+        """Test durable actions are committed before record returns"""
+        writer = AuditWriter(flush_seconds=60, durable_actions=["delete"])
+        await writer.start()
+        await writer.record(USER, "delete", "event", "EVT-1", ip_address="10.1.2.3")
+        await writer.record(USER, "update", "event", "EVT-1", durable=True)
+
+        assert await audit_count(async_db, action="delete", ip_address="10.1.2.3") == 1
+        assert await audit_count(async_db, action="update") == 1
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, async_db):
+        """Test a batch whose insert fails is retried rather than dropped"""
+        writer = AuditWriter(batch_size=2, flush_seconds=60, retry_seconds=0.01)
+        write, failures = writer.write, []
+
+        async def flaky(rows):
+            if len(failures) < 2:
+                failures.append(rows)
+                raise RuntimeError("database is locked")
+            await write(rows)
+
+        writer.write = flaky
+        await writer.start()
+        for i in range(2):
+            await writer.record(USER, "update", "event", f"EVT-{i}")
+        await writer.stop()
+
+        assert len(failures) == 2
+        assert await audit_count(async_db, action="update") == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_saved_and_recovered(self, async_db, tmp_path):
+        """Test a batch failing every retry goes to the fallback file and is inserted on the next start"""
+        fallback = tmp_path / "audit.jsonl"
+        writer = AuditWriter(batch_size=2, flush_seconds=60, max_retries=1,
+                             retry_seconds=0.01, fallback_path=str(fallback))
+        write = writer.write
+
+        async def broken(rows):
+            raise RuntimeError("disk I/O error")
+
+        writer.write = broken
+        await writer.start()
+        for i in range(2):
+            await writer.record(USER, "update", "event", f"EVT-{i}")
+        await writer.stop()
+        assert len(fallback.read_text().splitlines()) == 2
+        assert await audit_count(async_db, action="update") == 0
+
+        writer.write = write
+        await writer.start()
+        await writer.stop()
+        assert not fallback.exists()
+        assert await audit_count(async_db, action="update") == 2
+
+    def test_endpoint_records_client_ip(self, client, auth_headers, db_session):
+        """Test audited requests capture the client address"""
+        event_id = client.get("/api/events", headers=auth_headers).json()[0]["id"]
+        response = client.delete(f"/api/events/{event_id}", headers=auth_headers)
+        assert response.status_code == 200
+
+        row = db_session.query(AuditLog).filter_by(action="delete", resource_id=event_id).one()
+        assert row.ip_address == "testclient"
+        assert row.username == "admin"
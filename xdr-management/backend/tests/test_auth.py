@@ -1,5 +1,18 @@
+import asyncio
+import threading
+
 import pytest
 
+from app.core.security import (
+    SEED_PASSWORD_HASHES,
+    PasswordHasher,
+    PasswordHasherBusyError,
+    password_hasher,
+    pwd_context,
+)
+from app.core.users import UserStore
+from app.db_models import User
+
 
 class TestAuthentication:
     """Test authentication endpoints"""
@@ -69,3 +82,162 @@ class TestAuthentication:
             )
             assert response.status_code == 200
             assert response.json()["user"]["role"] == expected_role
+
+
+class BlockingContext:
+    """Password context whose hashing waits until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password):
+        self.release.wait(5)
+        return f"hashed:{password}"
+
+
+class TestPasswordHasher:
+    """Test bcrypt runs off the event loop with bounded concurrency"""
+
+    def test_seed_hashes_match_default_passwords(self):
+        """Test the precomputed seed hashes verify the default passwords"""
+        for username, hashed in SEED_PASSWORD_HASHES.items():
+            assert pwd_context.verify(f"{username}123", hashed)
+
+    @pytest.mark.asyncio
+    async def test_hashing_does_not_block_event_loop(self):
+        """Test other coroutines keep running while a hash is computed"""
+        context = BlockingContext()
+        hasher = PasswordHasher(context, workers=1, max_pending=4)
+        try:
+            pending = asyncio.ensure_future(hasher.hash("secret"))
+            await asyncio.sleep(0.05)
+            assert not pending.done()
+            context.release.set()
+            assert await pending == "hashed:secret"
+        finally:
+            context.release.set()
+            hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejects_beyond_max_pending(self):
+        """Test calls beyond max_pending fail fast instead of queueing"""
+        context = BlockingContext()
+        hasher = PasswordHasher(context, workers=1, max_pending=2)
+        try:
+            queued = [asyncio.ensure_future(hasher.hash(str(i))) for i in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(PasswordHasherBusyError):
+                await hasher.hash("third")
+            context.release.set()
+            assert await asyncio.gather(*queued) == ["hashed:0", "hashed:1"]
+            assert await hasher.hash("again") == "hashed:again"
+        finally:
+            context.release.set()
+            hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_holds_slot_until_done(self):
+        """Test a cancelled caller's slot stays taken while its hash still runs"""
+        context = BlockingContext()
+        hasher = PasswordHasher(context, workers=1, max_pending=1)
+        try:
+            pending = asyncio.ensure_future(hasher.hash("cancelled"))
+            await asyncio.sleep(0.05)
+            pending.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await pending
+            with pytest.raises(PasswordHasherBusyError):
+                await hasher.hash("while running")
+
+            context.release.set()
+            await asyncio.to_thread(hasher.shutdown)
+            assert await hasher.hash("after") == "hashed:after"
+        finally:
+            context.release.set()
+            hasher.shutdown()
+
+    def test_login_storm_gets_503(self, client, monkeypatch):
+        """Test logins are refused with Retry-After when the hasher is saturated"""
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        monkeypatch.setattr(password_hasher, "_slots", slots)
+
+        response = client.post("/api/auth/login", data={"username": "admin", "password": "admin123"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+class TestUserStore:
+    """Test users are read from the database through a cache"""
+
+    def test_registration_is_persisted(self, client, db_session):
+        """Test a registered user is stored in the database and can log in"""
+        response = client.post("/api/auth/register", json={
+            "username": "hunter", "email": "hunter@xdr.local", "full_name": "Threat Hunter",
+            "role": "analyst", "password": "hunter123"
+        })
+        assert response.status_code == 200
+        assert response.json()["id"] == "USR-004"
+        assert db_session.query(User).filter(User.username == "hunter").one().role == "analyst"
+
+        response = client.post("/api/auth/login", data={"username": "hunter", "password": "hunter123"})
+        assert response.status_code == 200
+        assert response.json()["user"]["role"] == "analyst"
+
+    def test_registration_ids_do_not_collide(self, client, db_session):
+        """Test user IDs come from the allocator, not the current user count"""
+        db_session.query(User).filter(User.id == "USR-002").delete()
+        db_session.commit()
+
+        ids = []
+        for name in ("first", "second"):
+            response = client.post("/api/auth/register", json={
+                "username": name, "email": f"{name}@xdr.local", "full_name": name,
+                "role": "viewer", "password": "secret123"
+            })
+            assert response.status_code == 200
+            ids.append(response.json()["id"])
+        assert ids == ["USR-004", "USR-005"]
+
+    def test_duplicate_registration(self, client):
+        """Test usernames and emails already in the database are rejected"""
+        for username, email in [("admin", "new@xdr.local"), ("newuser", "admin@xdr.local")]:
+            response = client.post("/api/auth/register", json={
+                "username": username, "email": email, "full_name": "Dup",
+                "role": "viewer", "password": "secret123"
+            })
+            assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_read_through_cache_and_invalidation(self, async_db, db_session, clock):
+        """Test lookups are cached until the TTL passes or the store is invalidated"""
+        store = UserStore(ttl_seconds=60, clock=clock)
+        assert (await store.get("viewer"))["role"] == "viewer"
+
+        db_session.query(User).filter(User.username == "viewer").update({"role": "analyst"})
+        db_session.commit()
+        assert (await store.get("viewer"))["role"] == "viewer"
+
+        clock.now += 61
+        assert (await store.get("viewer"))["role"] == "analyst"
+        assert await store.get("ghost") is None
+
+        db_session.add(User(
+            id="USR-009", username="ghost", email="ghost@xdr.local", full_name="Ghost",
+            hashed_password="x", role="viewer"
+        ))
+        db_session.commit()
+        assert await store.get("ghost") is None
+        store.invalidate()
+        assert (await store.get("ghost"))["id"] == "USR-009"
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers(self, async_db, db_session):
+        """Test invalidating one store drops users cached by others sharing the backend"""
+        worker_a, worker_b = UserStore(), UserStore()
+        assert (await worker_b.get("viewer"))["is_active"]
+
+        db_session.query(User).filter(User.username == "viewer").update({"is_active": False})
+        db_session.commit()
+        worker_a.invalidate()
+        assert not (await worker_b.get("viewer"))["is_active"]
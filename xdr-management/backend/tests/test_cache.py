@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from app.core.cache import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend
+
+
+class TestResponseCache:
+    """Test cached read endpoints"""
+
+    def test_second_read_is_cache_hit(self, client, auth_headers):
+        """Test that repeating a request is served from the cache"""
+        first = client.get("/api/incidents", headers=auth_headers)
+        second = client.get("/api/incidents", headers=auth_headers)
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert first.json() == second.json()
+
+    def test_if_none_match_returns_304(self, client, auth_headers):
+        """Test conditional requests on unchanged lists"""
+        first = client.get("/api/assets", headers=auth_headers)
+        etag = first.headers["ETag"]
+        response = client.get("/api/assets", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_write_invalidates_cached_list(self, client, auth_headers):
+        """Test that a write bumps the resource version"""
+        first = client.get("/api/events?limit=1000", headers=auth_headers)
+        etag = first.headers["ETag"]
+
+        client.delete("/api/events/EVT-003", headers=auth_headers)
+
+        response = client.get(
+            "/api/events?limit=1000",
+            headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["X-Cache"] == "MISS"
+        assert "EVT-003" not in [e["id"] for e in response.json()]
+
+    def test_query_parameters_are_part_of_key(self, client, auth_headers):
+        """Test that different filters are cached separately"""
+        client.get("/api/incidents", headers=auth_headers)
+        response = client.get("/api/incidents?status=monitoring", headers=auth_headers)
+        assert response.headers["X-Cache"] == "MISS"
+        for incident in response.json():
+            assert incident["status"] == "monitoring"
+
+
+class TestCacheBackends:
+    """Test cache backend implementations"""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def backend(self, request, tmp_path):
+        """Each backend under test"""
+        if request.param == "sqlite":
+            return SQLiteCacheBackend(str(tmp_path / "cache.db"))
+        return MemoryCacheBackend(max_entries=2)
+
+    def test_entry_round_trip(self, backend):
+        """Test storing and reading an entry"""
+        entry = (b"[]", {"x-next-cursor": "abc"}, '"etag"')
+        backend.set("key", entry, ttl=60)
+        assert backend.get("key") == entry
+
+    def test_expired_entry_is_dropped(self, backend):
+        """Test that expired entries are not returned"""
+        backend.set("key", (b"[]", {}, '"etag"'), ttl=-1)
+        assert backend.get("key") is None
+
+    def test_version_bump(self, backend):
+        """Test resource version counters"""
+        assert backend.get_version("events") == 0
+        assert backend.bump_version("events") == 1
+        assert backend.get_version("events") == 1
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        """Test LRU eviction when the memory backend is full"""
+        backend = MemoryCacheBackend(max_entries=2)
+        for key in ("a", "b"):
+            backend.set(key, (b"", {}, key), ttl=60)
+        backend.get("a")
+        backend.set("c", (b"", {}, "c"), ttl=60)
+        assert backend.get("b") is None
+        assert backend.get("a") is not None
+
+    def test_backend_interface_is_abstract(self):
+        """Test a backend missing methods cannot be instantiated"""
+        class Partial(CacheBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            Partial()
+
+    def test_sqlite_versions_shared_between_workers(self, tmp_path):
+        """Test another worker sees a version bump once its cached version expires"""
+        path = str(tmp_path / "cache.db")
+        writer = SQLiteCacheBackend(path)
+        reader = SQLiteCacheBackend(path, version_ttl=0.05)
+        assert reader.get_version("events") == 0
+
+        writer.bump_version("events")
+        assert writer.get_version("events") == 1
+        assert reader.get_version("events") == 0
+
+        time.sleep(0.1)
+        assert reader.get_version("events") == 1
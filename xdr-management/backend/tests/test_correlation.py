@@ -0,0 +1,166 @@
+import asyncio
+
+import httpx
+
+from app.core.correlation import Correlator
+from app.db_models import Incident
+from main import app
+
+
+def event(event_id, source, assets=(), iocs=(), mitre=(), severity="medium"):
+    return {
+        "id": event_id, "source": source, "severity": severity,
+        "affectedAssets": list(assets), "iocs": list(iocs), "mitre": list(mitre)
+    }
+
+
+class TestCorrelator:
+    """Test grouping events into clusters"""
+
+    def test_shared_asset_and_ioc_join_cluster(self, clock):
+        """Test events sharing an asset or IOC land in the same cluster"""
+        correlator = Correlator(clock=clock)
+        first = correlator.observe(event("E1", "HOST-1", iocs=["185.220.101.45"]))
+        second = correlator.observe(event("E2", "HOST-2", iocs=["185.220.101.45 "]))
+        third = correlator.observe(event("E3", "HOST-2", severity="critical"))
+        unrelated = correlator.observe(event("E4", "HOST-9"))
+
+        assert first is second is third
+        assert first.event_ids == ["E1", "E2", "E3"]
+        assert first.severity == "critical"
+        assert unrelated is not first
+
+    def test_bridging_event_merges_clusters(self, clock):
+        """Test an event linking two clusters merges them and re-points their keys"""
+        correlator = Correlator(clock=clock)
+        a = correlator.observe(event("E1", "HOST-1"))
+        correlator.observe(event("E2", "HOST-1"))
+        b = correlator.observe(event("E3", "HOST-2"))
+        merged = correlator.observe(event("E4", "HOST-1", assets=["HOST-2"]))
+
+        assert merged is a
+        assert correlator.get(b.id) is None
+        assert sorted(merged.event_ids) == ["E1", "E2", "E3", "E4"]
+        assert correlator.index["asset:HOST-2"][0] == a.id
+
+    def test_time_proximity(self, clock):
+        """Test links expire after the window, and MITRE links after their shorter window"""
+        correlator = Correlator(window_seconds=3600, mitre_window_seconds=300, clock=clock)
+        first = correlator.observe(event("E1", "HOST-1", mitre=["T1059"]))
+
+        clock.now += 200
+        chained = correlator.observe(event("E2", "HOST-2", mitre=["T1059", "T1021"]))
+        assert chained is first
+        assert first.techniques == ["T1059", "T1021"]
+
+        clock.now += 1000
+        assert correlator.observe(event("E3", "HOST-3", mitre=["T1021"])) is not first
+
+        clock.now += 4000
+        assert correlator.observe(event("E4", "HOST-1")) is not first
+
+    def test_candidates_and_bounds(self, clock):
+        """Test only multi-event clusters are candidates and the cluster count is bounded"""
+        correlator = Correlator(max_clusters=3, clock=clock)
+        correlator.observe(event("E1", "HOST-1"))
+        correlator.observe(event("E2", "HOST-1", severity="high"))
+        for i in range(5):
+            correlator.observe(event(f"S{i}", f"SOLO-{i}"))
+
+        assert len(correlator.clusters) == 3
+        assert correlator.candidates() == []
+
+        correlator.observe(event("S5", "SOLO-4", severity="critical"))
+        assert [c.event_ids for c in correlator.candidates()] == [["S4", "S5"]]
+
+        clock.now += 4000
+        assert correlator.expire() == 3
+        assert correlator.index == {}
+
+    def test_full_cluster_stops_growing(self, clock):
+        """Test a cluster at its event or span limit is closed and related events start a new one"""
+        correlator = Correlator(max_cluster_events=3, clock=clock)
+        clusters = [correlator.observe(event(f"E{i}", "HOST-1")) for i in range(5)]
+        assert clusters[0].event_ids == ["E0", "E1", "E2"]
+        assert clusters[3] is clusters[4] is not clusters[0]
+
+        correlator = Correlator(max_cluster_span_seconds=600, clock=clock)
+        first = correlator.observe(event("E0", "HOST-1"))
+        clock.now += 599
+        assert correlator.observe(event("E1", "HOST-1")) is first
+        clock.now += 1
+        assert correlator.observe(event("E2", "HOST-1")) is not first
+        assert first.event_ids == ["E0", "E1"]
+
+    def test_merge_respects_limit(self, clock):
+        """Test a bridging event does not merge clusters past the event limit"""
+        correlator = Correlator(max_cluster_events=4, clock=clock)
+        a = correlator.observe(event("E1", "HOST-1"))
+        correlator.observe(event("E2", "HOST-1"))
+        b = correlator.observe(event("E3", "HOST-2"))
+        correlator.observe(event("E4", "HOST-2"))
+
+        bridge = correlator.observe(event("E5", "HOST-1", assets=["HOST-2"]))
+        assert correlator.get(a.id) is not None and correlator.get(b.id) is not None
+        assert len(bridge.event_ids) == 3
+
+    def test_cluster_ids_unique_per_worker(self, clock):
+        """Test two correlators (workers) never hand out the same cluster ID"""
+        first = Correlator(clock=clock).observe(event("E1", "HOST-1"))
+        second = Correlator(clock=clock).observe(event("E1", "HOST-1"))
+        assert first.id != second.id
+
+
+class TestCorrelationEndpoints:
+    """Test candidate incident endpoints"""
+
+    def create_event(self, client, headers, source, iocs):
+        return client.post("/api/events", headers=headers, json={
+            "type": "Port Scan", "source": source, "description": "scan",
+            "severity": "high", "iocs": iocs
+        }).json()["id"]
+
+    def test_candidates_and_promote(self, client, auth_headers, db_session):
+        """Test ingested events form a candidate that can be promoted to an incident"""
+        first = self.create_event(client, auth_headers, "HOST-A", ["198.51.100.7"])
+        second = self.create_event(client, auth_headers, "HOST-B", ["198.51.100.7"])
+
+        candidates = client.get("/api/correlation/candidates", headers=auth_headers).json()
+        assert len(candidates) == 1
+        cluster = candidates[0]
+        assert cluster["eventIds"] == [first, second]
+        assert cluster["assets"] == ["HOST-A", "HOST-B"]
+
+        response = client.post(f"/api/correlation/candidates/{cluster['id']}/promote", headers=auth_headers)
+        assert response.status_code == 200
+        incident = db_session.get(Incident, response.json()["incidentId"])
+        assert incident.related_events == [first, second]
+
+        again = client.post(f"/api/correlation/candidates/{cluster['id']}/promote", headers=auth_headers)
+        assert again.status_code == 409
+        assert client.get("/api/correlation/candidates", headers=auth_headers).json() == []
+
+    def test_concurrent_promotes_open_one_incident(self, client, auth_headers, db_session):
+        """Test two simultaneous promotes of one cluster open exactly one incident"""
+        self.create_event(client, auth_headers, "HOST-A", ["198.51.100.7"])
+        self.create_event(client, auth_headers, "HOST-B", ["198.51.100.7"])
+        cluster_id = client.get("/api/correlation/candidates", headers=auth_headers).json()[0]["id"]
+        before = db_session.query(Incident).count()
+
+        async def promote_twice():
+            async with httpx.AsyncClient(app=app, base_url="http://testserver") as http:
+                return await asyncio.gather(*(
+                    http.post(f"/api/correlation/candidates/{cluster_id}/promote", headers=auth_headers)
+                    for _ in range(2)
+                ))
+
+        responses = client.portal.call(promote_twice)
+        assert sorted(r.status_code for r in responses) == [200, 409]
+        db_session.expire_all()
+        assert db_session.query(Incident).count() == before + 1
+
+    def test_unknown_cluster_and_permissions(self, client, auth_headers, viewer_headers):
+        """Test unknown clusters return 404 and viewers cannot promote"""
+        assert client.get("/api/correlation/clusters/CL-0-999999", headers=auth_headers).status_code == 404
+        response = client.post("/api/correlation/candidates/CL-0-000001/promote", headers=viewer_headers)
+        assert response.status_code == 403
@@ -88,3 +88,46 @@ class TestAlertRules:
             headers=analyst_headers
         )
         assert response.status_code == 403
+
+
+class TestDashboardCounters:
+    """Test incrementally maintained dashboard counters"""
+
+    def _stats(self, client, headers):
+        return client.get("/api/dashboard/stats", headers=headers).json()
+
+    def test_counters_follow_event_writes(self, client, auth_headers):
+        """Test that create, resolve and delete are reflected without reconciling"""
+        before = self._stats(client, auth_headers)
+
+        created = client.post("/api/events", json={
+            "type": "Test Event",
+            "source": "TEST-SERVER",
+            "description": "Counter test",
+            "severity": "critical"
+        }, headers=auth_headers).json()
+        stats = self._stats(client, auth_headers)
+        assert stats["totalEvents"] == before["totalEvents"] + 1
+        assert stats["criticalEvents"] == before["criticalEvents"] + 1
+
+        client.put(f"/api/events/{created['id']}", json={"status": "resolved"}, headers=auth_headers)
+        stats = self._stats(client, auth_headers)
+        assert stats["resolvedToday"] == before["resolvedToday"] + 1
+
+        client.delete(f"/api/events/{created['id']}", headers=auth_headers)
+        stats = self._stats(client, auth_headers)
+        assert stats["totalEvents"] == before["totalEvents"]
+        assert stats["criticalEvents"] == before["criticalEvents"]
+        assert stats["resolvedToday"] == before["resolvedToday"]
+
+    def test_counters_follow_incident_status(self, client, auth_headers):
+        """Test active incident count tracks status changes"""
+        before = self._stats(client, auth_headers)
+        client.put("/api/incidents/INC-2026-001", json={"status": "resolved"}, headers=auth_headers)
+        stats = self._stats(client, auth_headers)
+        assert stats["activeIncidents"] == before["activeIncidents"] - 1
+
+    def test_average_response_time_from_timelines(self, client, auth_headers):
+        """Test average response time is computed from seeded incident timelines"""
+        # Seeded first responses: 5, 15 and 30 minutes
+        assert self._stats(client, auth_headers)["averageResponseTime"] == "17 min"
@@ -1,5 +1,11 @@
+import csv
+import io
+import json
+
 import pytest
 
+from app.core.database import engine
+
 
 class TestSecurityEvents:
     """Test security events endpoints"""
@@ -99,3 +105,243 @@ class TestSecurityEvents:
         """Test that analyst cannot delete events"""
         response = client.delete("/api/events/EVT-001", headers=analyst_headers)
         assert response.status_code == 403
+
+
+class TestEventPagination:
+    """Test keyset pagination and field projection on the events list"""
+
+    def test_paginate_with_cursor(self, client, auth_headers):
+        """Test walking all events page by page"""
+        full = client.get("/api/events", headers=auth_headers).json()
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/events", params=params, headers=auth_headers)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 2
+            seen.extend(e["id"] for e in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert seen == [e["id"] for e in full]
+
+    def test_last_page_has_no_cursor(self, client, auth_headers):
+        """Test that a page covering the remaining rows has no next cursor"""
+        response = client.get("/api/events?limit=1000", headers=auth_headers)
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_unpaginated_without_limit_or_cursor(self, client, auth_headers):
+        """Test that omitting limit and cursor returns every event without a cursor"""
+        for i in range(110):
+            response = client.post("/api/events", json={
+                "type": "Port Scan",
+                "source": f"SCANNER-{i}",
+                "description": f"Scan {i}",
+                "severity": "low",
+                "affectedAssets": ["WEB-01"]
+            }, headers=auth_headers)
+            assert response.status_code == 200
+
+        response = client.get("/api/events", headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()) > 110
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_cursor_without_limit_uses_default_page(self, client, auth_headers):
+        """Test that a cursor alone pages with the default page size"""
+        first = client.get("/api/events?limit=1", headers=auth_headers)
+        cursor = first.headers["X-Next-Cursor"]
+
+        response = client.get("/api/events", params={"cursor": cursor}, headers=auth_headers)
+        assert response.status_code == 200
+        assert first.json()[0]["id"] not in [e["id"] for e in response.json()]
+
+    def test_invalid_cursor(self, client, auth_headers):
+        """Test that a malformed cursor is rejected"""
+        response = client.get("/api/events?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_field_projection(self, client, auth_headers):
+        """Test that only requested fields are returned"""
+        response = client.get("/api/events?fields=id,severity", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) > 0
+        for event in data:
+            assert set(event) == {"id", "severity"}
+
+    def test_unknown_field_rejected(self, client, auth_headers):
+        """Test that unknown projection fields are rejected"""
+        response = client.get("/api/events?fields=id,password", headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestBulkIngestion:
+    """Test bulk event ingestion"""
+
+    @staticmethod
+    def _event(i):
+        return {
+            "type": "Port Scan",
+            "source": f"SENSOR-{i}",
+            "description": f"Bulk event {i}",
+            "severity": "low",
+            "affectedAssets": [f"SENSOR-{i}"],
+            "iocs": [],
+            "mitre": ["T1046"]
+        }
+
+    def test_bulk_json_array(self, client, analyst_headers):
+        """Test ingesting a JSON array of events"""
+        batch = [self._event(i) for i in range(25)]
+        response = client.post("/api/events/bulk", json=batch, headers=analyst_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["inserted"] == 25
+        assert len(set(data["ids"])) == 25
+
+        event = client.get(f"/api/events/{data['ids'][0]}", headers=analyst_headers).json()
+        assert event["source"] == "SENSOR-0"
+
+    def test_bulk_ndjson(self, client, analyst_headers):
+        """Test ingesting newline-delimited JSON"""
+        import json
+        body = "\n".join(json.dumps(self._event(i)) for i in range(3)) + "\n"
+        response = client.post(
+            "/api/events/bulk",
+            content=body,
+            headers={**analyst_headers, "Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.json()["inserted"] == 3
+
+    def test_bulk_rejects_whole_batch_on_invalid_item(self, client, analyst_headers):
+        """Test that one invalid event rejects the entire batch"""
+        before = len(client.get("/api/events?limit=1000", headers=analyst_headers).json())
+        batch = [self._event(0), {**self._event(1), "severity": "catastrophic"}]
+        response = client.post("/api/events/bulk", json=batch, headers=analyst_headers)
+        assert response.status_code == 422
+        after = len(client.get("/api/events?limit=1000", headers=analyst_headers).json())
+        assert after == before
+
+    def test_bulk_as_viewer_forbidden(self, client, viewer_headers):
+        """Test that viewer cannot ingest events"""
+        response = client.post("/api/events/bulk", json=[self._event(0)], headers=viewer_headers)
+        assert response.status_code == 403
+
+
+class TestEventSearch:
+    """Test full-text event search"""
+
+    def test_prefix_search(self, client, auth_headers):
+        """Test that words match as prefixes"""
+        response = client.get("/api/events?search=ransom", headers=auth_headers)
+        assert response.status_code == 200
+        assert [e["id"] for e in response.json()] == ["EVT-001"]
+
+    def test_phrase_search(self, client, auth_headers):
+        """Test quoted phrases match adjacent words only"""
+        response = client.get('/api/events?search="port scanning"', headers=auth_headers)
+        assert [e["id"] for e in response.json()] == ["EVT-003"]
+
+        response = client.get('/api/events?search="scanning port"', headers=auth_headers)
+        assert response.json() == []
+
+    def test_search_without_text_matches_nothing(self, client, auth_headers):
+        """Test a query with no searchable text does not drop the filter"""
+        response = client.get('/api/events?search="', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_index_survives_rowid_renumbering(self, client, auth_headers):
+        """Test hits still point at the right events after their rowids change"""
+        # VACUUM may renumber rowids of tables without an INTEGER PRIMARY KEY
+        with engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE security_events SET rowid = rowid + 1000")
+
+        response = client.get('/api/events?search="port scanning"', headers=auth_headers)
+        assert [e["id"] for e in response.json()] == ["EVT-003"]
+        response = client.get("/api/events/search?q=scanning", headers=auth_headers)
+        assert [hit["id"] for hit in response.json()] == ["EVT-003"]
+
+    def test_ranked_search(self, client, auth_headers):
+        """Test the ranked search endpoint orders hits by score"""
+        response = client.get("/api/events/search?q=detected", headers=auth_headers)
+        assert response.status_code == 200
+        hits = response.json()
+        assert len(hits) > 1
+        scores = [hit["score"] for hit in hits]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_index_follows_updates_and_deletes(self, client, auth_headers):
+        """Test the index stays in sync with event writes"""
+        client.put(
+            "/api/events/EVT-005",
+            json={"description": "Kernel exploit observed"},
+            headers=auth_headers
+        )
+        response = client.get("/api/events/search?q=kernel", headers=auth_headers)
+        assert [hit["id"] for hit in response.json()] == ["EVT-005"]
+        response = client.get("/api/events/search?q=unexpected", headers=auth_headers)
+        assert response.json() == []
+
+        client.delete("/api/events/EVT-005", headers=auth_headers)
+        response = client.get("/api/events/search?q=kernel", headers=auth_headers)
+        assert response.json() == []
+
+
+class TestEventExport:
+    """Test streaming event export"""
+
+    def test_export_ndjson(self, client, auth_headers):
+        """Test that every event is streamed as one JSON line"""
+        response = client.get("/api/events/export", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "attachment" in response.headers["content-disposition"]
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        listed = client.get("/api/events", headers=auth_headers).json()
+        assert lines == listed
+
+    def test_export_applies_filters(self, client, auth_headers):
+        """Test that the list filters and field projection apply to exports"""
+        response = client.get(
+            "/api/events/export?severity=critical&fields=id,severity",
+            headers=auth_headers
+        )
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines
+        assert all(line.keys() == {"id", "severity"} for line in lines)
+        assert all(line["severity"] == "critical" for line in lines)
+
+    def test_export_csv(self, client, auth_headers):
+        """Test CSV export with a header row and joined list values"""
+        response = client.get(
+            "/api/events/export?format=csv&fields=id,affectedAssets",
+            headers=auth_headers
+        )
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert response.headers["content-type"].startswith("text/csv")
+        assert rows[0] == ["id", "affectedAssets"]
+        assert len(rows) == 6
+
+    def test_export_sse(self, client, auth_headers):
+        """Test Server-Sent Events export ending with a count"""
+        response = client.get("/api/events/export?format=sse", headers=auth_headers)
+        frames = [frame for frame in response.text.split("\n\n") if frame]
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert all(frame.startswith("event: event\ndata: ") for frame in frames[:-1])
+        assert frames[-1] == 'event: end\ndata: {"count": 5}'
+
+    def test_export_rejects_unknown_format(self, client, auth_headers):
+        """Test that unsupported formats are rejected"""
+        response = client.get("/api/events/export?format=xml", headers=auth_headers)
+        assert response.status_code == 422
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.core.id_allocator import IdAllocator
+
+
+class TestIdAllocator:
+    """Test block-reserved ID allocation"""
+
+    @pytest.mark.asyncio
+    async def test_continues_after_seeded_ids(self, async_db):
+        """Test that a new sequence starts after the highest existing ID"""
+        allocator = IdAllocator(block_size=10)
+        assert await allocator.next_event_id(async_db) == "EVT-006"
+
+    @pytest.mark.asyncio
+    async def test_workers_get_disjoint_blocks(self, async_db):
+        """Test that two allocators sharing a database never collide"""
+        worker_a = IdAllocator(block_size=3)
+        worker_b = IdAllocator(block_size=3)
+
+        ids = []
+        for _ in range(10):
+            ids.append(await worker_a.next_event_id(async_db))
+            ids.append(await worker_b.next_event_id(async_db))
+
+        assert len(set(ids)) == len(ids)
+
+    @pytest.mark.asyncio
+    async def test_batch_spanning_blocks(self, async_db):
+        """Test allocating more IDs than one block holds"""
+        allocator = IdAllocator(block_size=4)
+        ids = await allocator.next_event_ids(async_db, 10)
+        assert len(set(ids)) == 10
+        assert await allocator.next_event_id(async_db) not in ids
+
+    @pytest.mark.asyncio
+    async def test_incident_ids_keep_prefix(self, async_db):
+        """Test incident IDs use the yearly INC prefix"""
+        allocator = IdAllocator()
+        new_id = await allocator.next_incident_id(async_db)
+        assert new_id.startswith("INC-")
+        assert new_id.count("-") == 2
+
+    def test_deleted_ids_are_not_reused(self, client, auth_headers):
+        """Test that deleting the newest event does not free its ID"""
+        event_data = {
+            "type": "Test Event",
+            "source": "TEST-SERVER",
+            "description": "Test event description",
+            "severity": "low"
+        }
+        first = client.post("/api/events", json=event_data, headers=auth_headers).json()["id"]
+        client.delete(f"/api/events/{first}", headers=auth_headers)
+        second = client.post("/api/events", json=event_data, headers=auth_headers).json()["id"]
+        assert second != first
+
+    @pytest.mark.asyncio
+    async def test_concurrent_allocations_are_disjoint(self, async_db):
+        """Test that coroutines allocating at the same time never share an ID"""
+        allocator = IdAllocator(block_size=2)
+        batches = await asyncio.gather(
+            *[allocator.next_event_ids(async_db, 3) for _ in range(5)]
+        )
+        ids = [i for batch in batches for i in batch]
+        assert len(set(ids)) == 15
@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import delete, update
+
+from app.core.database import engine
+from app.core.iocs import IOC_TABLE, classify_ioc, lookup_iocs, parse_indicator
+from app.db_models import SecurityEvent
+
+
+class TestIocParsing:
+    """Test indicator normalization and classification"""
+
+    def test_classify(self):
+        """Test common indicator types are recognized"""
+        assert classify_ioc("185.220.101.45") == "ip"
+        assert classify_ioc("2001:db8::1") == "ip"
+        assert classify_ioc("d41d8cd98f00b204e9800998ecf8427e") == "hash"
+        assert classify_ioc("http://evil-domain.com/payload") == "url"
+        assert classify_ioc("attacker@evil-domain.com") == "email"
+        assert classify_ioc("malware.exe") == "file"
+        assert classify_ioc("evil-domain.com") == "domain"
+        assert classify_ioc("not an ioc") == "other"
+
+    def test_type_prefix(self):
+        """Test type prefixes are split off and URLs are left intact"""
+        assert parse_indicator("ip:185.220.101.45") == ("ip", "185.220.101.45")
+        assert parse_indicator(" Evil-Domain.COM ") == (None, "evil-domain.com")
+        assert parse_indicator("https://x.io/a") == (None, "https://x.io/a")
+
+
+class TestIocIndex:
+    """Test the inverted index follows event writes"""
+
+    @pytest.mark.asyncio
+    async def test_index_tracks_inserts_updates_and_deletes(self, async_db):
+        """Test the index is maintained for every write path"""
+        assert (await lookup_iocs(async_db, ["185.220.101.45"]))["185.220.101.45"].count == 1
+
+        await async_db.execute(
+            update(SecurityEvent).where(SecurityEvent.iocs.is_not(None))
+            .values(iocs=["New-Indicator.org"])
+        )
+        await async_db.commit()
+        assert await lookup_iocs(async_db, ["185.220.101.45"]) == {}
+        assert (await lookup_iocs(async_db, ["new-indicator.org"]))["new-indicator.org"].count == 5
+
+        await async_db.execute(delete(SecurityEvent))
+        await async_db.commit()
+        assert await lookup_iocs(async_db, ["new-indicator.org"]) == {}
+
+    def test_lookup_uses_index(self, db_session):
+        """Test value lookups are served by the index's primary key"""
+        with engine.connect() as conn:
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN SELECT event_id FROM {IOC_TABLE} WHERE value IN ('a', 'b')"
+            ).all()
+        assert "USING PRIMARY KEY" in plan[0][-1]
+
+
+class TestIocApi:
+    """Test the IOC lookup endpoints"""
+
+    def test_events_for_ioc(self, client, auth_headers):
+        """Test events are found by value, case-insensitively and with a type prefix"""
+        for value in ["ip:185.220.101.45", "185.220.101.45", "EVIL-DOMAIN.com"]:
+            response = client.get(f"/api/iocs/{value}/events", headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["count"] == 1
+            assert len(data["events"]) == 1
+
+        data = client.get("/api/iocs/ip:185.220.101.45/events", headers=auth_headers).json()
+        assert data["type"] == "ip"
+        assert "185.220.101.45" in data["events"][0]["iocs"]
+
+    def test_new_event_is_indexed(self, client, auth_headers):
+        """Test an event created through the API is immediately searchable by IOC"""
+        event_id = client.post("/api/events", headers=auth_headers, json={
+            "type": "Malware Detection", "source": "WORKSTATION-9", "description": "Dropper",
+            "severity": "low", "iocs": ["http://evil-domain.com/stage2"]
+        }).json()["id"]
+
+        response = client.get("/api/iocs/http://evil-domain.com/stage2/events", headers=auth_headers)
+        assert response.status_code == 200
+        assert [e["id"] for e in response.json()["events"]] == [event_id]
+
+    def test_prefixed_iocs_are_indexed_without_prefix(self, client, auth_headers):
+        """Test IOCs stored with a type prefix are found by value, with or without one"""
+        event_id = client.post("/api/events", headers=auth_headers, json={
+            "type": "Malware Detection", "source": "WORKSTATION-9", "description": "Beacon",
+            "severity": "low", "iocs": ["ip:185.220.101.45", "IP:10.0.0.9"]
+        }).json()["id"]
+
+        data = client.get("/api/iocs/ip:185.220.101.45/events", headers=auth_headers).json()
+        assert data["count"] == 2 and event_id in [e["id"] for e in data["events"]]
+        for value in ["ip:10.0.0.9", "10.0.0.9"]:
+            data = client.get(f"/api/iocs/{value}/events", headers=auth_headers).json()
+            assert [e["id"] for e in data["events"]] == [event_id]
+
+        response = client.post("/api/iocs/lookup", headers=auth_headers, json={"indicators": ["10.0.0.9"]})
+        assert [m["eventIds"] for m in response.json()["matches"]] == [[event_id]]
+
+    def test_type_mismatch_and_unknown(self, client, auth_headers):
+        """Test a prefix contradicting the value is rejected and unknown values are empty"""
+        response = client.get("/api/iocs/ip:evil-domain.com/events", headers=auth_headers)
+        assert response.status_code == 400
+
+        data = client.get("/api/iocs/203.0.113.7/events", headers=auth_headers).json()
+        assert data["count"] == 0 and data["events"] == []
+
+    def test_bulk_lookup(self, client, auth_headers):
+        """Test thousands of indicators are checked in one call, returning only matches"""
+        feed = [f"198.51.{i // 256}.{i % 256}" for i in range(3000)]
+        feed += ["ip:185.220.101.45", "Malware.EXE", "domain:45.33.32.156"]
+
+        response = client.post("/api/iocs/lookup", headers=auth_headers, json={"indicators": feed})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["checked"] == 3003
+        assert {m["indicator"]: m["type"] for m in data["matches"]} == {
+            "ip:185.220.101.45": "ip", "Malware.EXE": "file"
+        }
+        assert all(m["count"] == len(m["eventIds"]) == 1 for m in data["matches"])
+
+    def test_bulk_lookup_limits(self, client, auth_headers, monkeypatch):
+        """Test oversized lookups are rejected"""
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "IOC_LOOKUP_MAX_INDICATORS", 2)
+        response = client.post(
+            "/api/iocs/lookup", headers=auth_headers, json={"indicators": ["a", "b", "c"]}
+        )
+        assert response.status_code == 413
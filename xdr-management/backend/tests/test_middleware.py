@@ -0,0 +1,64 @@
+import logging
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.logging import metrics
+from app.middleware.logging import RequestLoggingMiddleware
+
+
+def started_lines(caplog):
+    return [r for r in caplog.records if r.name == "xdr.request" and "started" in r.getMessage()]
+
+
+class TestRequestLoggingMiddleware:
+    """Test the ASGI request logging middleware"""
+
+    def test_timing_header_and_metrics(self, client, auth_headers):
+        """Test responses carry X-Response-Time and are recorded by route template"""
+        metrics.reset()
+        response = client.get("/api/events/EVT-001", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["X-Response-Time"].endswith("ms")
+        assert metrics.get_metrics()["requests_by_endpoint"]["/api/events/{event_id}"] == 1
+
+    def test_streaming_response_passes_through(self, client, auth_headers):
+        """Test a streamed export is delivered whole with the timing header"""
+        response = client.get("/api/events/export?format=csv", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["X-Response-Time"].endswith("ms")
+        assert len(response.text.strip().splitlines()) > 1
+
+    def test_start_logs_are_sampled(self, client, caplog, monkeypatch):
+        """Test start lines are logged for the sampled fraction of requests only"""
+        caplog.set_level(logging.INFO, logger="xdr.request")
+
+        monkeypatch.setattr(random, "random", lambda: 0.999)
+        client.get("/api/monitoring/health")
+        assert started_lines(caplog) == []
+
+        monkeypatch.setattr(random, "random", lambda: 0.0)
+        client.get("/api/monitoring/health")
+        assert len(started_lines(caplog)) == 1
+        completed = [r for r in caplog.records if "completed" in r.getMessage()]
+        assert completed[-1].extra_data["route"] == "/api/monitoring/health"
+
+    def test_unhandled_error_is_recorded(self):
+        """Test a failing request is recorded as a 500 under its route template"""
+        api = FastAPI()
+        api.add_middleware(RequestLoggingMiddleware, start_log_sample_rate=0)
+
+        @api.get("/boom/{item}")
+        async def boom(item: str):
+            raise RuntimeError("boom")
+
+        metrics.reset()
+        with TestClient(api, raise_server_exceptions=False) as test_client:
+            assert test_client.get("/boom/1").status_code == 500
+
+        data = metrics.get_metrics()
+        assert data["requests_by_endpoint"] == {"/boom/{item}": 1}
+        assert data["errors_total"] == 1
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.database import Base
+from app.core.iocs import IOC_TABLE
+from app.core.migrations import MIGRATIONS, applied_versions, run_migrations
+from app.core.search import FTS_KEYS_TABLE, FTS_TABLE
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A database created before the secondary indexes existed"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'"
+        ).scalars().all():
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+        for name in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        ).scalars().all():
+            conn.exec_driver_sql(f"DROP TRIGGER {name}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_KEYS_TABLE}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {IOC_TABLE}")
+    yield engine
+    engine.dispose()
+
+
+class TestMigrations:
+    """Test versioned schema migrations"""
+
+    def test_migrations_add_indexes(self, legacy_engine):
+        """Test that pending migrations create the composite indexes"""
+        applied = run_migrations(legacy_engine)
+        assert applied == [m.version for m in MIGRATIONS]
+
+        with legacy_engine.connect() as conn:
+            indexes = set(conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            ).scalars())
+        assert "ix_security_events_severity_timestamp" in indexes
+        assert "ix_security_events_status_updated_at" in indexes
+
+    def test_ioc_index_backfills_existing_events(self, legacy_engine):
+        """Test the IOC migration indexes events written before it existed"""
+        with legacy_engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO security_events (id, timestamp, severity, type, source, description, "
+                "status, iocs) VALUES ('EVT-001', '2026-01-01', 'high', 't', 's', 'd', 'new', "
+                "'[\" Evil-Domain.com\", \"malware.exe\", \"IP: 10.0.0.9\"]')"
+            )
+        run_migrations(legacy_engine)
+
+        with legacy_engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"SELECT value, event_id FROM {IOC_TABLE} ORDER BY value").all()
+        assert rows == [("10.0.0.9", "EVT-001"), ("evil-domain.com", "EVT-001"), ("malware.exe", "EVT-001")]
+
+    def test_search_index_rekeyed_from_rowids(self, legacy_engine):
+        """Test an index on security_events rowids is replaced by one on stable keys"""
+        with legacy_engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "type, source, description, content='security_events')"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO security_events (id, timestamp, severity, type, source, description, "
+                "status) VALUES ('EVT-001', '2026-01-01', 'high', 't', 's', 'Beacon to C2', 'new')"
+            )
+        run_migrations(legacy_engine)
+
+        with legacy_engine.connect() as conn:
+            sql = conn.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE name = ?", (FTS_TABLE,)
+            ).scalar()
+            hits = conn.exec_driver_sql(
+                f"SELECT k.event_id FROM {FTS_TABLE} JOIN {FTS_KEYS_TABLE} k "
+                f"ON k.rowid = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH 'beacon'"
+            ).scalars().all()
+        assert "content=''" in sql
+        assert hits == ["EVT-001"]
+
+    def test_migrations_are_applied_once(self, legacy_engine):
+        """Test that a second run is a no-op"""
+        run_migrations(legacy_engine)
+        assert run_migrations(legacy_engine) == []
+        assert applied_versions(legacy_engine) == [m.version for m in MIGRATIONS]
+
+    def test_resolved_today_uses_index(self, legacy_engine):
+        """Test the dashboard query plan after migrating"""
+        run_migrations(legacy_engine)
+        with legacy_engine.connect() as conn:
+            plan = conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM security_events "
+                "WHERE status = 'resolved' AND updated_at >= '2026-01-01'"
+            ).all()
+        assert "ix_security_events_status_updated_at" in plan[0][-1]
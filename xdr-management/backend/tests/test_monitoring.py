@@ -0,0 +1,148 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.core.config import settings
+from app.core.logging import OVERFLOW_ENDPOINT, Histogram, MetricsCollector, metrics
+from app.middleware.logging import UNMATCHED_ROUTE
+
+
+def exited_pid():
+    """PID of a process that has already exited"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class TestHistogram:
+    """Test fixed-bucket latency histograms"""
+
+    def test_quantiles(self):
+        """Test quantiles are interpolated within their bucket"""
+        histogram = Histogram()
+        for value in [3] * 50 + [40] * 45 + [400] * 5:
+            histogram.observe(value)
+
+        assert histogram.count == 100
+        assert histogram.quantile(0.5) == 5.0
+        assert 25 < histogram.quantile(0.95) <= 50
+        assert 250 < histogram.quantile(0.99) <= 500
+
+    def test_overflow_and_empty(self):
+        """Test values beyond the last bucket and empty histograms"""
+        histogram = Histogram()
+        assert histogram.quantile(0.99) == 0.0
+        histogram.observe(60000)
+        assert histogram.quantile(0.99) == 10000
+
+
+class TestMetricsCollector:
+    """Test request metrics and multiprocess aggregation"""
+
+    def test_per_endpoint_percentiles(self):
+        """Test latency summaries per endpoint and overall"""
+        collector = MetricsCollector()
+        for _ in range(99):
+            collector.record_request("/api/events", 200, 4)
+        collector.record_request("/api/events", 500, 900)
+        collector.record_request("/api/incidents", 404, 20)
+
+        data = collector.get_metrics()
+        assert data["requests_total"] == 101
+        assert data["requests_by_endpoint"] == {"/api/events": 100, "/api/incidents": 1}
+        assert data["requests_by_status"] == {"2xx": 99, "5xx": 1, "4xx": 1}
+        assert data["errors_total"] == 1
+        events = data["latency_by_endpoint"]["/api/events"]
+        assert events["p50_ms"] <= 5 and events["p99_ms"] <= 5
+        assert data["p99_response_time_ms"] > 5
+
+    def test_endpoint_cardinality_limit(self):
+        """Test endpoints beyond the limit share the overflow bucket"""
+        collector = MetricsCollector(max_endpoints=2)
+        for i in range(10):
+            collector.record_request(f"/api/things/{i}", 200, 4)
+        collector.record_request("/api/things/0", 200, 4)
+
+        assert collector.get_metrics()["requests_by_endpoint"] == {
+            "/api/things/0": 2, "/api/things/1": 1, OVERFLOW_ENDPOINT: 8
+        }
+
+    def test_multiprocess_aggregation(self, tmp_path):
+        """Test snapshots of all workers are added up, without gauges of exited workers"""
+        collector = MetricsCollector(multiproc_dir=str(tmp_path))
+        collector.record_request("/api/events", 200, 4)
+        collector.record_websocket_connect()
+        collector.flush()
+
+        for pid, connections in [(os.getppid(), 2), (exited_pid(), 5)]:
+            worker = MetricsCollector()
+            worker.record_request("/api/events", 200, 4)
+            worker.record_request("/api/assets", 503, 30)
+            snapshot = worker.snapshot()
+            snapshot.update(pid=pid, websocket_connections=connections)
+            (tmp_path / f"metrics_{pid}.json").write_text(json.dumps(snapshot))
+
+        # The live state of this worker wins over its own (stale) file
+        collector.record_request("/api/events", 200, 4)
+        data = collector.get_metrics()
+        assert data["workers"] == 3
+        assert data["requests_by_endpoint"] == {"/api/events": 4, "/api/assets": 2}
+        assert data["errors_total"] == 2
+        assert data["websocket_connections"] == 3
+
+
+class TestMetricsEndpoints:
+    """Test the metrics endpoints"""
+
+    def test_prometheus_exposition(self, client, auth_headers):
+        """Test /metrics serves cumulative histogram buckets in the text format"""
+        metrics.reset()
+        client.get("/api/monitoring/health")
+        response = client.get("/metrics", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = response.text.splitlines()
+        assert "# TYPE xdr_http_request_duration_seconds histogram" in lines
+        assert 'xdr_http_requests_total{status="2xx"} 1' in lines
+        buckets = [
+            int(line.rsplit(" ", 1)[1]) for line in lines
+            if line.startswith('xdr_http_request_duration_seconds_bucket{endpoint="/api/monitoring/health"')
+        ]
+        assert buckets == sorted(buckets) and buckets[-1] == 1
+
+    def test_metrics_not_public_by_default(self, client, viewer_headers):
+        """Test /metrics needs an admin token when no scrape token is configured"""
+        assert settings.METRICS_SCRAPE_TOKEN == ""
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 401
+        assert client.get("/metrics", headers=viewer_headers).status_code == 403
+
+    def test_scrape_token(self, client, monkeypatch):
+        """Test a configured scrape token is required"""
+        monkeypatch.setattr(settings, "METRICS_SCRAPE_TOKEN", "scrape-secret")
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        assert response.status_code == 200
+
+    def test_json_metrics_include_percentiles(self, client, auth_headers):
+        """Test the admin metrics endpoint reports latency percentiles"""
+        response = client.get("/api/monitoring/metrics", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["workers"] == 1
+        assert data["p50_response_time_ms"] <= data["p99_response_time_ms"]
+        assert "/api/auth/login" in data["latency_by_endpoint"]
+
+    def test_requests_keyed_by_route_template(self, client, auth_headers):
+        """Test requests for different IDs share their route template's metrics"""
+        metrics.reset()
+        for event_id in ["EVT-001", "EVT-002", "EVT-404"]:
+            client.get(f"/api/events/{event_id}", headers=auth_headers)
+        client.get("/no/such/path")
+
+        by_endpoint = metrics.get_metrics()["requests_by_endpoint"]
+        assert by_endpoint["/api/events/{event_id}"] == 3
+        assert by_endpoint[UNMATCHED_ROUTE] == 1
+        assert not any("EVT-" in endpoint for endpoint in by_endpoint)
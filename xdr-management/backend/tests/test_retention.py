@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.core.archive import cold_archive
+from app.core.config import settings
+from app.core.retention import RetentionManager
+from app.db_models import AuditLog, SecurityEvent
+
+
+def add_event(db, event_id, severity, age_days, description="old"):
+    db.add(SecurityEvent(
+        id=event_id, timestamp=datetime.utcnow() - timedelta(days=age_days), severity=severity,
+        type="Port Scan", source="HOST-1", description=description, status="resolved"
+    ))
+
+
+async def count(db, model, *criteria):
+    return await db.scalar(select(func.count()).select_from(model).where(*criteria))
+
+
+class TestRetention:
+    """Test TTL-based deletion of old rows"""
+
+    @pytest.mark.asyncio
+    async def test_per_severity_ttl(self, db_session, async_db):
+        """Test each severity is purged after its own TTL"""
+        add_event(db_session, "EVT-LOW-OLD", "low", 40)
+        add_event(db_session, "EVT-CRIT-OLD", "critical", 40)
+        add_event(db_session, "EVT-LOW-NEW", "low", 10)
+        db_session.commit()
+
+        manager = RetentionManager({"critical": 365, "low": 30}, audit_days=0)
+        deleted = await manager.purge(async_db)
+
+        assert deleted["security_events"] == 1
+        assert await async_db.get(SecurityEvent, "EVT-LOW-OLD") is None
+        assert await async_db.get(SecurityEvent, "EVT-CRIT-OLD") is not None
+        assert await async_db.get(SecurityEvent, "EVT-LOW-NEW") is not None
+
+    @pytest.mark.asyncio
+    async def test_deletes_in_batches(self, db_session, async_db):
+        """Test a purge larger than the batch size deletes every expired row"""
+        for i in range(7):
+            add_event(db_session, f"EVT-BATCH-{i}", "medium", 100)
+        db_session.commit()
+
+        manager = RetentionManager({"medium": 90}, audit_days=0, batch_size=2)
+        deleted = await manager.purge(async_db)
+
+        assert deleted["security_events"] == 7
+        assert await count(async_db, SecurityEvent, SecurityEvent.id.like("EVT-BATCH-%")) == 0
+
+    @pytest.mark.asyncio
+    async def test_audit_log_ttl_and_zero_keeps_forever(self, db_session, async_db):
+        """Test audit logs expire by their TTL and a TTL of 0 disables purging"""
+        old = datetime.utcnow() - timedelta(days=400)
+        db_session.add(AuditLog(user_id="1", username="admin", action="delete", resource_type="event", timestamp=old))
+        add_event(db_session, "EVT-KEEP", "high", 400)
+        db_session.commit()
+
+        manager = RetentionManager({"high": 0}, audit_days=365)
+        deleted = await manager.purge(async_db)
+
+        assert deleted == {"security_events": 0, "audit_logs": 1}
+        assert await async_db.get(SecurityEvent, "EVT-KEEP") is not None
+
+    @pytest.mark.asyncio
+    async def test_incremental_vacuum_frees_pages(self, db_session, async_db):
+        """Test deleted pages are returned to the filesystem"""
+        for i in range(200):
+            add_event(db_session, f"EVT-BIG-{i}", "low", 60, description="x" * 2000)
+        db_session.commit()
+
+        manager = RetentionManager({"low": 30}, audit_days=0, vacuum_pages=10)
+        report = await manager.run(async_db)
+
+        assert report["deleted"]["security_events"] == 200
+        assert report["pages_freed"] > 10
+        assert (await async_db.execute(text("PRAGMA freelist_count"))).scalar() == 0
+
+    @pytest.mark.asyncio
+    async def test_run_archives_before_purging(self, db_session, async_db, tmp_path, monkeypatch):
+        """Test rows past ARCHIVE_AFTER_DAYS are archived when RETENTION_ARCHIVE is on"""
+        pytest.importorskip("pyarrow")
+        monkeypatch.setattr(cold_archive, "root", str(tmp_path))
+        monkeypatch.setattr(settings, "RETENTION_ARCHIVE", True)
+        monkeypatch.setattr(settings, "ARCHIVE_AFTER_DAYS", 90)
+        add_event(db_session, "EVT-ARCHIVED", "critical", 100)
+        db_session.commit()
+
+        report = await RetentionManager({"critical": 365}, audit_days=0).run(async_db)
+
+        assert report["archived"]["security_events"] == 1
+        assert await async_db.get(SecurityEvent, "EVT-ARCHIVED") is None
+        assert [row["id"] for row in cold_archive.scan("security_events")] == ["EVT-ARCHIVED"]
@@ -0,0 +1,243 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache import response_cache
+from app.core.rules import (
+    ACTIONS,
+    Atom,
+    RuleCompiler,
+    RuleEngine,
+    RuleSyntaxError,
+    parse_condition,
+    parse_number,
+    register_action,
+    rule_engine,
+)
+from app.db_models import Incident
+
+
+def rule(rule_id, conditions, actions=(), enabled=True, severity="high"):
+    return SimpleNamespace(
+        id=rule_id, name=f"Rule {rule_id}", severity=severity, enabled=enabled,
+        conditions=conditions, actions=list(actions)
+    )
+
+
+def evaluate(conditions, facts):
+    compiler = RuleCompiler()
+    return compiler.compile(parse_condition(conditions))(facts, {})
+
+
+class CountingFacts(dict):
+    """Facts that count how often each one is read"""
+
+    def __init__(self, **facts):
+        super().__init__(**facts)
+        self.reads = Counter()
+
+    def get(self, key, default=None):
+        self.reads[key] += 1
+        return super().get(key, default)
+
+
+class TestConditionParser:
+    """Test parsing and compiling alert rule conditions"""
+
+    def test_units(self):
+        """Test durations and sizes are normalized to seconds and bytes"""
+        assert parse_number("5min") == 300
+        assert parse_number("1GB") == 1024 ** 3
+        assert parse_number("7") == 7
+        assert parse_number("external") is None
+
+    def test_seeded_conditions(self):
+        """Test the seeded rule conditions parse and evaluate"""
+        assert evaluate("failed_logins > 5 AND time_window < 5min", {"failed_logins": 6, "time_window": 120})
+        assert not evaluate("failed_logins > 5 AND time_window < 5min", {"failed_logins": 6, "time_window": "10min"})
+        assert evaluate("data_transfer > 1GB AND destination=external", {"data_transfer": "2GB", "destination": "External"})
+        assert evaluate("privilege_change AND user!=admin", {"privilege_change": True, "user": "bob"})
+        assert not evaluate("privilege_change AND user!=admin", {"privilege_change": True, "user": "admin"})
+
+    def test_precedence_and_grouping(self):
+        """Test NOT binds tighter than AND, which binds tighter than OR"""
+        assert evaluate("a OR b AND c", {"a": True})
+        assert not evaluate("(a OR b) AND c", {"a": True})
+        assert evaluate("NOT a AND severity='critical'", {"severity": "critical"})
+
+    def test_missing_fact_never_matches(self):
+        """Test comparisons against absent facts are false, including !="""
+        assert not evaluate("user!=admin", {})
+        assert not evaluate("failed_logins > 5", {})
+
+    def test_syntax_errors(self):
+        """Test malformed conditions are rejected"""
+        for conditions in ["", "a AND", "(a OR b", "severity > critical", "= x", "a b"]:
+            with pytest.raises(RuleSyntaxError):
+                parse_condition(conditions)
+
+    def test_atoms_are_shared(self):
+        """Test an atom used by several rules is compiled and evaluated once per event"""
+        compiler = RuleCompiler()
+        first = compiler.compile(parse_condition("severity=critical AND a"))
+        second = compiler.compile(parse_condition("severity=critical AND b"))
+        assert list(compiler.atoms) == [Atom("severity", "=", "critical"), Atom("a"), Atom("b")]
+
+        facts = CountingFacts(severity="critical", a=True, b=True)
+        memo = {}
+        assert first(facts, memo) and second(facts, memo)
+        assert facts.reads["severity"] == 1
+
+
+class TestRuleEngine:
+    """Test rule indexing, matching and actions"""
+
+    def test_index_limits_candidates(self):
+        """Test an event is only evaluated against rules its indexed conjunct allows"""
+        engine = RuleEngine()
+        engine.load([rule(f"R-{i}", f"source=HOST-{i} AND severity=critical") for i in range(500)]
+                    + [rule("R-FLAG", "malware_detected"), rule("R-ANY", "failed_logins > 5")])
+
+        facts = {"source": "HOST-7", "severity": "critical"}
+        assert [engine.rules[i].id for i in engine.candidates(facts)] == ["R-7", "R-ANY"]
+        matched = engine.match({"source": "HOST-7", "severity": "critical", "type": "Malware Detection"})
+        assert [r.id for r in matched] == ["R-7", "R-FLAG"]
+
+    def test_disabled_and_invalid_rules_are_skipped(self):
+        """Test disabled rules are not loaded and syntax errors are reported"""
+        engine = RuleEngine()
+        engine.load([rule("R-OFF", "a", enabled=False), rule("R-BAD", "a AND"), rule("R-OK", "a")])
+        assert [r.id for r in engine.rules] == ["R-OK"]
+        assert "R-BAD" in engine.errors
+
+    @pytest.mark.asyncio
+    async def test_runs_registered_actions(self, async_db):
+        """Test matching rules run their actions and failures do not stop others"""
+        seen = []
+
+        @register_action("test_record")
+        async def record(context):
+            seen.append((context.rule.id, context.event["id"]))
+
+        @register_action("test_fail")
+        async def fail(context):
+            raise RuntimeError("boom")
+
+        try:
+            engine = RuleEngine()
+            engine.load([rule("R-1", "severity=low", ["test_fail", "test_record"])])
+            # Mark the loaded rules current so process() does not reload from the database
+            engine._version = response_cache.version("alerts")
+            matches = await engine.process(
+                async_db, [{"id": "EVT-1", "severity": "low"}, {"id": "EVT-2", "severity": "high"}]
+            )
+        finally:
+            ACTIONS.pop("test_record")
+            ACTIONS.pop("test_fail")
+
+        assert [m.event["id"] for m in matches] == ["EVT-1"]
+        assert seen == [("R-1", "EVT-1")]
+
+
+    @pytest.mark.asyncio
+    async def test_cooldown_per_rule_and_source(self, async_db, clock):
+        """Test a rule fires once per source within its cooldown"""
+        engine = RuleEngine(cooldown_seconds=300, clock=clock)
+        engine.load([rule("R-1", "severity=critical")])
+        engine._version = response_cache.version("alerts")
+
+        def events(*sources):
+            return [{"id": f"EVT-{i}", "severity": "critical", "source": s} for i, s in enumerate(sources)]
+
+        fired = await engine.process(async_db, events("HOST-1", "HOST-1", "HOST-2", "HOST-1"))
+        assert [m.event["source"] for m in fired] == ["HOST-1", "HOST-2"]
+        assert engine.suppressed == 2
+
+        clock.now += 299
+        assert await engine.process(async_db, events("HOST-1")) == []
+        clock.now += 1
+        assert len(await engine.process(async_db, events("HOST-1"))) == 1
+
+    @pytest.mark.asyncio
+    async def test_running_engine_queues_actions(self, async_db):
+        """Test actions of a running engine run in the background, off the ingest path"""
+        seen = []
+        release = asyncio.Event()
+
+        @register_action("test_slow")
+        async def slow(context):
+            await release.wait()
+            seen.append(context.event["id"])
+
+        engine = RuleEngine()
+        await engine.start()
+        try:
+            engine.load([rule("R-1", "severity=low", ["test_slow"])])
+            engine._version = response_cache.version("alerts")
+            fired = await asyncio.wait_for(engine.process(async_db, [{"id": "EVT-1", "severity": "low"}]), 1)
+            assert len(fired) == 1 and seen == []
+
+            release.set()
+            await engine.join()
+            assert seen == ["EVT-1"]
+        finally:
+            await engine.stop()
+            ACTIONS.pop("test_slow")
+
+
+class TestRuleIngest:
+    """Test rules evaluated on event ingest"""
+
+    def create_malware_event(self, client, headers, severity="critical"):
+        response = client.post("/api/events", headers=headers, json={
+            "type": "Malware Detection", "source": "WORKSTATION-9",
+            "description": "Trojan found", "severity": severity
+        })
+        # Rule actions run in the background; wait for them
+        client.portal.call(rule_engine.join)
+        return response
+
+    def test_matching_event_creates_incident(self, client, auth_headers, db_session):
+        """Test the seeded malware rule opens an incident for a critical malware event"""
+        event_id = self.create_malware_event(client, auth_headers).json()["id"]
+
+        incidents = db_session.query(Incident).all()
+        created = [i for i in incidents if i.related_events == [event_id]]
+        assert len(created) == 1
+        assert created[0].title.startswith("Critical Malware Detection")
+
+    def test_non_matching_event_creates_no_incident(self, client, auth_headers, db_session):
+        """Test events that do not satisfy a rule trigger nothing"""
+        before = db_session.query(Incident).count()
+        self.create_malware_event(client, auth_headers, severity="low")
+        assert db_session.query(Incident).count() == before
+
+    def test_toggle_hot_reloads_rules(self, client, auth_headers, db_session):
+        """Test disabling a rule takes effect on the next event without a restart"""
+        self.create_malware_event(client, auth_headers)
+        before = db_session.query(Incident).count()
+
+        response = client.put("/api/alerts/RULE-001", headers=auth_headers, json={"enabled": False})
+        assert response.status_code == 200
+        self.create_malware_event(client, auth_headers)
+        assert db_session.query(Incident).count() == before
+
+        client.put("/api/alerts/RULE-001", headers=auth_headers, json={"enabled": True})
+        self.create_malware_event(client, auth_headers)
+        assert db_session.query(Incident).count() == before + 1
+
+    def test_bulk_burst_opens_one_incident(self, client, auth_headers, db_session):
+        """Test a burst of matching events from one source fires the rule once"""
+        before = db_session.query(Incident).count()
+        events = [{
+            "type": "Malware Detection", "source": "WORKSTATION-9",
+            "description": f"Trojan {i}", "severity": "critical"
+        } for i in range(200)]
+        response = client.post("/api/events/bulk", headers=auth_headers, json=events)
+        assert response.status_code == 200
+        client.portal.call(rule_engine.join)
+
+        assert db_session.query(Incident).count() == before + 1
+        assert rule_engine.suppressed == 199
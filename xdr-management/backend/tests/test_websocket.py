@@ -0,0 +1,407 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.backplane import MemoryBackplane, SQLiteBackplane
+from app.core.subscriptions import SubscriptionIndex
+from app.core.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    """Records sent frames; sends block until `release` is called"""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self._open = asyncio.Event()
+        if not blocked:
+            self._open.set()
+
+    def release(self):
+        self._open.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await self._open.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int):
+        self.closed_with = code
+
+
+def collector(inbox: list):
+    """Backplane subscriber that records delivered messages"""
+    async def deliver(message: dict):
+        inbox.append(message)
+    return deliver
+
+
+async def drain():
+    """Let writer tasks run until their queues are empty"""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestConnectionManager:
+    """Test the queued WebSocket fan-out"""
+
+    @pytest.mark.asyncio
+    async def test_deliver_serializes_once(self):
+        """Test that every client is sent the same serialized text"""
+        manager = ConnectionManager(queue_size=8)
+        clients = [FakeWebSocket() for _ in range(3)]
+        for ws in clients:
+            await manager.connect(ws)
+
+        assert await manager.deliver({"type": "new_event", "data": {"id": "EVT-001"}}) == 3
+        await drain()
+
+        texts = [ws.sent[0] for ws in clients]
+        assert texts[0] == '{"type":"new_event","data":{"id":"EVT-001"}}'
+        assert all(text is texts[0] for text in texts)
+        await manager.close_all()
+
+    @pytest.mark.asyncio
+    async def test_slow_client_drops_oldest(self):
+        """Test that a stalled client keeps the newest messages and doesn't delay others"""
+        manager = ConnectionManager(queue_size=2, slow_client_policy="drop_oldest")
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        await manager.connect(slow)
+        await manager.connect(fast)
+
+        for n in range(5):
+            await manager.deliver({"n": n})
+            await drain()
+
+        assert fast.sent == [f'{{"n":{n}}}' for n in range(5)]
+        assert manager.connections[slow].dropped == 2
+
+        slow.release()
+        await drain()
+        assert slow.sent == ['{"n":0}', '{"n":3}', '{"n":4}']
+        await manager.close_all()
+
+    @pytest.mark.asyncio
+    async def test_slow_client_disconnected(self):
+        """Test that the disconnect policy closes a client whose queue is full"""
+        manager = ConnectionManager(queue_size=1, slow_client_policy="disconnect")
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        await manager.connect(slow)
+        await manager.connect(fast)
+
+        for n in range(3):
+            await manager.deliver({"n": n})
+            await drain()
+
+        assert slow not in manager.connections
+        assert slow.closed_with == 1013
+        assert len(fast.sent) == 3
+        await manager.close_all()
+
+    def test_unknown_policy_rejected(self):
+        """Test that an invalid slow client policy fails fast"""
+        with pytest.raises(ValueError):
+            ConnectionManager(slow_client_policy="block")
+
+
+class TestSubscriptionIndex:
+    """Test subscription filter matching"""
+
+    EVENT = {
+        "severity": "critical",
+        "type": "Malware Detection",
+        "source": "WORKSTATION-101",
+        "status": "investigating",
+        "affectedAssets": ["WORKSTATION-101", "SERVER-DB-01"]
+    }
+
+    def test_all_filtered_dimensions_must_match(self):
+        """Test that a client matches only when every filtered dimension accepts the event"""
+        index = SubscriptionIndex()
+        index.add("everything")
+        index.add("critical", {"severity": ["critical", "high"]})
+        index.add("critical-db", {"severity": ["critical"], "asset": ["SERVER-DB-01"]})
+        index.add("low-db", {"severity": ["low"], "asset": ["SERVER-DB-01"]})
+        index.add("web", {"asset": ["SERVER-WEB-01"]})
+
+        assert index.match(self.EVENT) == {"everything", "critical", "critical-db"}
+        assert index.match(self.EVENT, include_unfiltered=False) == {"critical", "critical-db"}
+
+    def test_payload_without_filtered_field(self):
+        """Test that a payload lacking a filtered field doesn't match that filter"""
+        index = SubscriptionIndex()
+        index.add("critical", {"severity": ["critical"]})
+        index.add("db", {"asset": ["SERVER-DB-01"]})
+
+        assert index.match({"id": "INC-2026-001", "severity": "critical"}) == {"critical"}
+
+    def test_replace_and_remove(self):
+        """Test that resubscribing replaces filters and removal drops the client"""
+        index = SubscriptionIndex()
+        index.add("client", {"severity": ["low"]})
+        index.add("client", {"severity": ["critical"]})
+        assert index.match(self.EVENT) == {"client"}
+
+        index.remove("client")
+        assert index.match(self.EVENT) == set()
+        assert len(index) == 0
+
+    def test_unknown_dimension_rejected(self):
+        """Test that filters on unknown dimensions are rejected"""
+        with pytest.raises(ValueError):
+            SubscriptionIndex().add("client", {"priority": ["p1"]})
+
+    @pytest.mark.asyncio
+    async def test_batch_split_by_subscription(self):
+        """Test that filtered clients only receive the matching part of a batch"""
+        manager = ConnectionManager(queue_size=8)
+        everything, critical = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(everything)
+        await manager.connect(critical)
+        manager.subscribe(critical, {"severity": ["critical"]})
+
+        await manager.deliver({"type": "new_events", "data": [
+            {"id": "EVT-010", "severity": "low"},
+            {"id": "EVT-011", "severity": "critical"}
+        ]})
+        await drain()
+
+        assert len(json.loads(everything.sent[0])["data"]) == 2
+        assert [e["id"] for e in json.loads(critical.sent[0])["data"]] == ["EVT-011"]
+        await manager.close_all()
+
+
+class TestReplayBuffer:
+    """Test replaying missed broadcasts to reconnecting clients"""
+
+    @staticmethod
+    async def manager_with_history(count: int, replay_size: int) -> ConnectionManager:
+        manager = ConnectionManager(replay_size=replay_size)
+        for seq in range(1, count + 1):
+            await manager.deliver({"type": "new_event", "data": {"n": seq}, "seq": seq})
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_replays_only_missed_messages(self):
+        """Test that replay returns the buffered messages after `since`, oldest first"""
+        manager = await self.manager_with_history(5, replay_size=3)
+
+        assert [json.loads(t)["seq"] for t in manager.replay(2)] == [3, 4, 5]
+        assert [json.loads(t)["seq"] for t in manager.replay(3)] == [4, 5]
+        assert manager.replay(5) == []
+
+    @pytest.mark.asyncio
+    async def test_gap_beyond_buffer_needs_resync(self):
+        """Test that missed messages no longer buffered, or an unknown seq, require a resync"""
+        manager = await self.manager_with_history(5, replay_size=3)
+
+        assert manager.replay(1) is None
+        assert manager.replay(9) is None
+
+    @pytest.mark.asyncio
+    async def test_reconnect_receives_replay_before_live(self):
+        """Test that replayed messages are queued ahead of new broadcasts"""
+        manager = await self.manager_with_history(4, replay_size=10)
+        ws = FakeWebSocket()
+        await manager.connect(ws, since=2)
+        await manager.deliver({"type": "new_event", "data": {"n": 5}, "seq": 5})
+        await drain()
+
+        assert [json.loads(t)["seq"] for t in ws.sent] == [3, 4, 5]
+        await manager.close_all()
+
+    @pytest.mark.asyncio
+    async def test_reconnect_after_large_gap(self):
+        """Test that a client too far behind is told to resync"""
+        manager = await self.manager_with_history(5, replay_size=2)
+        ws = FakeWebSocket()
+        await manager.connect(ws, since=1)
+        await drain()
+
+        assert json.loads(ws.sent[0]) == {"type": "resync_required", "seq": 5}
+        await manager.close_all()
+
+
+    @pytest.mark.asyncio
+    async def test_replay_honours_connect_filters(self):
+        """Test a filtered client reconnecting is replayed only what its filters accept"""
+        manager = ConnectionManager(replay_size=10)
+        critical = {"severity": "critical", "source": "HOST-1"}
+        low = {"severity": "low", "source": "HOST-2"}
+        await manager.deliver({"type": "new_event", "data": low, "seq": 1})
+        await manager.deliver({"type": "new_event", "data": critical, "seq": 2})
+        await manager.deliver({"type": "new_events", "data": [low, critical], "seq": 3})
+        await manager.deliver({"type": "new_events", "data": [low], "seq": 4})
+        await manager.deliver({"type": "stats_update", "data": {}, "seq": 5})
+
+        ws = FakeWebSocket()
+        await manager.connect(ws, since=0, filters={"severity": ["critical"]})
+        await drain()
+
+        replayed = [json.loads(t) for t in ws.sent]
+        assert [m["seq"] for m in replayed] == [2, 3, 5]
+        assert replayed[1]["data"] == [critical]
+        await manager.close_all()
+
+    def test_invalid_handshake_filters_rejected(self, client):
+        """Test the WebSocket endpoint refuses unknown filter values in the query"""
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/ws?severity=bogus") as ws:
+                ws.receive_text()
+
+        with client.websocket_connect("/ws?severity=critical") as ws:
+            ws.send_text("ping")
+            assert json.loads(ws.receive_text())["type"] == "pong"
+
+
+class TestBackplane:
+    """Test cross-worker broadcast backplanes"""
+
+    @pytest.mark.asyncio
+    async def test_memory_backplane_numbers_messages(self):
+        """Test that broadcasts reach local clients with increasing sequence numbers"""
+        manager = ConnectionManager(MemoryBackplane())
+        ws = FakeWebSocket()
+        await manager.connect(ws)
+
+        assert await manager.broadcast({"type": "a"}) == 1
+        assert await manager.broadcast({"type": "b"}) == 2
+        await drain()
+
+        assert ws.sent == ['{"type":"a","seq":1}', '{"type":"b","seq":2}']
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backplane_reaches_every_worker(self, tmp_path):
+        """Test that a broadcast on one worker is delivered on all of them in order"""
+        path = str(tmp_path / "broadcast.db")
+        workers = [SQLiteBackplane(path) for _ in range(2)]
+        received = [[], []]
+        for worker, inbox in zip(workers, received):
+            worker.subscribe(collector(inbox))
+            await worker.start()
+
+        first = await workers[0].publish({"type": "new_event"})
+        second = await workers[1].publish({"type": "new_incident"})
+        for worker in workers:
+            await worker.poll_once()
+            await worker.stop()
+
+        expected = [{"type": "new_event", "seq": first}, {"type": "new_incident", "seq": second}]
+        assert second == first + 1
+        assert received == [expected, expected]
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backplane_skips_history(self, tmp_path):
+        """Test that a starting worker only delivers messages published after it started"""
+        path = str(tmp_path / "broadcast.db")
+        await SQLiteBackplane(path).publish({"type": "old"})
+
+        received = []
+        backplane = SQLiteBackplane(path)
+        backplane.subscribe(collector(received))
+        await backplane.start()
+        await backplane.publish({"type": "new"})
+        await backplane.poll_once()
+        await backplane.stop()
+
+        assert [m["type"] for m in received] == ["new"]
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backplane_reuses_connection(self, tmp_path):
+        """Test that publishing and polling share one connection, closed on stop"""
+        backplane = SQLiteBackplane(str(tmp_path / "broadcast.db"))
+        await backplane.start()
+        conn = backplane._conn
+        await backplane.publish({"type": "a"})
+        await backplane.poll_once()
+        await backplane.poll_once()
+        assert backplane._conn is conn
+
+        await backplane.stop()
+        assert backplane._conn is None
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+class TestWebSocketEndpoint:
+    """Test the /ws endpoint"""
+
+    def test_ping_pong(self, client):
+        """Test that any client message is answered with a pong"""
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text("ping")
+            assert ws.receive_json()["type"] == "pong"
+
+    def test_receives_new_events(self, client, auth_headers):
+        """Test that created events are pushed to connected clients"""
+        with client.websocket_connect("/ws") as ws:
+            response = client.post("/api/events", json={
+                "type": "Test Event",
+                "source": "TEST-SERVER",
+                "description": "Test event description",
+                "severity": "high"
+            }, headers=auth_headers)
+            message = ws.receive_json()
+
+        assert message["type"] == "new_event"
+        assert message["data"]["id"] == response.json()["id"]
+        assert isinstance(message["seq"], int)
+
+    def test_subscription_filters_stream(self, client, auth_headers):
+        """Test that a subscribed client only receives matching events"""
+        event = {
+            "type": "Test Event",
+            "source": "TEST-SERVER",
+            "description": "Test event description",
+            "severity": "low"
+        }
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "subscribe", "filters": {"severity": ["critical"]}})
+            assert ws.receive_json() == {"type": "subscribed", "filters": {"severity": ["critical"]}}
+
+            client.post("/api/events", json=event, headers=auth_headers)
+            critical = client.post(
+                "/api/events", json={**event, "severity": "critical"}, headers=auth_headers
+            ).json()
+            message = ws.receive_json()
+
+        assert message["data"]["id"] == critical["id"]
+
+    def test_invalid_subscription(self, client):
+        """Test that invalid filters are reported without closing the connection"""
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "subscribe", "filters": {"severity": ["urgent"]}})
+            assert ws.receive_json()["type"] == "error"
+            ws.send_text("ping")
+            assert ws.receive_json()["type"] == "pong"
+
+    def test_resume_with_since(self, client, auth_headers):
+        """Test that reconnecting with `since` replays the broadcasts missed meanwhile"""
+        event = {
+            "type": "Test Event",
+            "source": "TEST-SERVER",
+            "description": "Test event description",
+            "severity": "low"
+        }
+        with client.websocket_connect("/ws") as ws:
+            client.post("/api/events", json=event, headers=auth_headers)
+            last_seen = ws.receive_json()["seq"]
+
+        missed = client.post("/api/events", json=event, headers=auth_headers).json()
+
+        with client.websocket_connect(f"/ws?since={last_seen}") as ws:
+            message = ws.receive_json()
+
+        assert message["seq"] == last_seen + 1
+        assert message["data"]["id"] == missed["id"]
+
+    def test_resume_from_unknown_seq(self, client):
+        """Test that an unknown `since` asks the client to resync"""
+        with client.websocket_connect("/ws?since=1000000") as ws:
+            assert ws.receive_json()["type"] == "resync_required"
@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+
+from app.core.rules import RuleEngine
+from app.core.windows import WindowAggregator, WindowCounter, WindowSpec
+
+
+def brute_force(source="HOST-1"):
+    return {"id": "EVT-X", "type": "Brute Force Attack", "source": source, "severity": "high"}
+
+
+class TestWindowCounter:
+    """Test bucketed window counts"""
+
+    def test_sliding_window_expires_old_buckets(self):
+        """Test counts leave a sliding window once their bucket is older than it"""
+        counter = WindowCounter(WindowSpec("n", "source", window_seconds=60, bucket_seconds=10))
+        counter.add("a", 1000)
+        counter.add("a", 1030)
+        assert counter.count("a", 1035)[0] == 2
+        assert counter.count("a", 1065)[0] == 1
+        assert counter.count("a", 1095)[0] == 0
+
+    def test_tumbling_window_resets_at_boundary(self):
+        """Test a tumbling window restarts at each aligned boundary"""
+        counter = WindowCounter(WindowSpec("n", "source", window_seconds=60, bucket_seconds=10, kind="tumbling"))
+        counter.add("a", 1150)
+        counter.add("a", 1175)
+        assert counter.count("a", 1179)[0] == 2
+        counter.add("a", 1201)
+        assert counter.count("a", 1201)[0] == 1
+
+    def test_least_recently_updated_key_is_evicted(self):
+        """Test memory stays bounded by evicting the stalest key"""
+        counter = WindowCounter(WindowSpec("n", "source", window_seconds=60), max_keys=2)
+        counter.add("a", 1000)
+        counter.add("b", 1000)
+        counter.add("a", 1001)
+        counter.add("c", 1002)
+        assert list(counter.keys) == ["a", "c"]
+
+    def test_evict_idle_keys(self):
+        """Test keys with nothing left in the window are dropped"""
+        counter = WindowCounter(WindowSpec("n", "source", window_seconds=60))
+        counter.add("old", 1000)
+        counter.add("new", 1100)
+        assert counter.evict_idle(1110) == 1
+        assert list(counter.keys) == ["new"]
+
+
+class TestWindowAggregator:
+    """Test windowed facts and snapshots"""
+
+    def test_observe_returns_count_and_span(self, clock):
+        """Test matching events are counted per key and report the span they cover"""
+        aggregator = WindowAggregator(clock=clock)
+        for _ in range(3):
+            facts = aggregator.observe(brute_force())
+            clock.now += 30
+        assert facts["failed_logins"] == 3
+        assert 60 <= facts["time_window"] < 80
+
+        other = aggregator.observe({"type": "Port Scan", "source": "HOST-1"})
+        assert other["failed_logins"] == 3
+        assert aggregator.observe(brute_force("HOST-2"))["failed_logins"] == 1
+
+    def test_list_keys_count_each_value(self, clock):
+        """Test list-valued key fields count once per value"""
+        aggregator = WindowAggregator(clock=clock)
+        aggregator.observe({"type": "Port Scan", "affectedAssets": ["A", "B"]})
+        facts = aggregator.observe({"type": "Port Scan", "affectedAssets": ["B"]})
+        assert facts["asset_events_hour"] == 2
+        assert aggregator.count("asset_events_hour", "A") == 1
+
+    def test_snapshot_round_trip(self, tmp_path, clock):
+        """Test counts survive a restart and expired buckets are discarded"""
+        path = str(tmp_path / "windows.json")
+        aggregator = WindowAggregator(clock=clock)
+        aggregator.observe(brute_force("HOST-1"))
+        clock.now += 600
+        aggregator.observe(brute_force("HOST-2"))
+        aggregator.snapshot(path)
+
+        clock.now += 200
+        restored = WindowAggregator(clock=clock)
+        assert restored.restore(path) > 0
+        assert restored.count("failed_logins", "HOST-1") == 0
+        assert restored.count("failed_logins", "HOST-2") == 1
+
+    def test_unreadable_snapshot_is_ignored(self, tmp_path):
+        """Test a corrupt snapshot starts from empty state"""
+        path = tmp_path / "windows.json"
+        path.write_text("{not json")
+        assert WindowAggregator().restore(str(path)) == 0
+
+
+class TestThresholdRules:
+    """Test threshold rules over windowed facts"""
+
+    def test_brute_force_rule_fires_on_burst(self, clock):
+        """Test the seeded brute force rule needs more than 5 attempts within 5 minutes"""
+        engine = RuleEngine(WindowAggregator(clock=clock))
+        engine.load([SimpleNamespace(
+            id="RULE-002", name="Brute Force Attack", severity="high", enabled=True,
+            conditions="failed_logins > 5", actions=[]
+        )])
+
+        def ingest(event):
+            return [r.id for r in engine.match(event, engine.windows.observe(event))]
+
+        # Six attempts spread over ten minutes are not a burst
+        for _ in range(6):
+            assert ingest(brute_force("SLOW")) == []
+            clock.now += 120
+
+        for _ in range(5):
+            assert ingest(brute_force("FAST")) == []
+            clock.now += 10
+        assert ingest(brute_force("FAST")) == ["RULE-002"]
+
+    def test_attempts_spread_past_window_do_not_fire(self, clock):
+        """Test that six attempts whose first-to-last span exceeds 5 minutes do not fire"""
+        engine = RuleEngine(WindowAggregator(clock=clock))
+        engine.load([SimpleNamespace(
+            id="RULE-002", name="Brute Force Attack", severity="high", enabled=True,
+            conditions="failed_logins > 5", actions=[]
+        )])
+
+        fired = []
+        for _ in range(6):
+            event = brute_force()
+            fired += [r.id for r in engine.match(event, engine.windows.observe(event))]
+            clock.now += 61
+
+        # The sixth attempt lands 305 seconds after the first, which has expired
+        assert fired == []
+
+    def test_old_attempt_does_not_hide_burst(self, clock):
+        """Test an attempt ten minutes before a burst does not keep the rule from firing"""
+        engine = RuleEngine(WindowAggregator(clock=clock))
+        engine.load([SimpleNamespace(
+            id="RULE-002", name="Brute Force Attack", severity="high", enabled=True,
+            conditions="failed_logins > 5", actions=[]
+        )])
+
+        engine.windows.observe(brute_force())
+        clock.now += 600
+        fired = []
+        for _ in range(20):
+            event = brute_force()
+            fired += [r.id for r in engine.match(event, engine.windows.observe(event))]
+            clock.now += 1
+
+        assert fired and set(fired) == {"RULE-002"}
+        facts = engine.windows.observe(brute_force())
+        assert facts["failed_logins"] == 21 and facts["time_window"] < 300
@@ -7,15 +7,39 @@ export function useWebSocket(url) {
   const maxReconnectAttempts = 5
   const reconnectDelay = 3000
   const listeners = new Map()
+  // Subscription filters; every (re)connect carries them in the URL so the
+  // replay of missed messages is already filtered
+  let filters = null
+  // Filters encoded in the URL of the current socket
+  let socketFilters = null
+  // Sequence number of the last broadcast received; reconnects resume from it
+  let lastSeq = null
+
+  const connectUrl = () => {
+    const params = new URLSearchParams()
+    if (lastSeq !== null) params.append('since', lastSeq)
+    Object.entries(filters || {}).forEach(([dimension, values]) => {
+      values.forEach(value => params.append(dimension, value))
+    })
+    const query = params.toString()
+    if (!query) return url
+    return `${url}${url.includes('?') ? '&' : '?'}${query}`
+  }
 
   const connect = () => {
     try {
-      socket.value = new WebSocket(url)
+      socket.value = new WebSocket(connectUrl())
+      socketFilters = filters
 
       socket.value.onopen = () => {
         console.log('WebSocket connected')
         isConnected.value = true
         reconnectAttempts.value = 0
+        // Filters changed while the socket was connecting
+        if (filters !== socketFilters) {
+          socketFilters = filters
+          socket.value.send(JSON.stringify({ type: 'subscribe', filters: filters || {} }))
+        }
       }
 
       socket.value.onmessage = (event) => {
@@ -23,6 +47,12 @@ export function useWebSocket(url) {
           const message = JSON.parse(event.data)
           console.log('WebSocket message received:', message)
 
+          // Missed messages are replayed on reconnect; `resync_required` means
+          // the gap was too large and listeners must reload their data
+          if (typeof message.seq === 'number') {
+            lastSeq = message.seq
+          }
+
           // Notify all listeners for this message type
           const typeListeners = listeners.get(message.type) || []
           typeListeners.forEach(callback => callback(message.data))
@@ -72,6 +102,16 @@ export function useWebSocket(url) {
     }
   }
 
+  // Only receive events/incidents matching the filters,
+  // e.g. { severity: ['critical'], asset: ['SERVER-DB-01'] }; null receives everything
+  const subscribe = (newFilters) => {
+    filters = newFilters
+    if (socket.value && isConnected.value) {
+      socketFilters = filters
+      send({ type: 'subscribe', filters: filters || {} })
+    }
+  }
+
   const on = (type, callback) => {
     if (!listeners.has(type)) {
       listeners.set(type, [])
@@ -100,6 +140,7 @@ export function useWebSocket(url) {
   return {
     isConnected,
     send,
+    subscribe,
     on,
     off,
     connect,
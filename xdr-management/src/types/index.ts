@@ -167,7 +167,8 @@ export interface Toast {
 // ========== WebSocket ==========
 
 export interface WebSocketMessage {
-  type: 'new_event' | 'new_incident' | 'event_updated' | 'pong'
-  data?: SecurityEvent | Incident | Record<string, unknown>
+  type: 'new_event' | 'new_events' | 'new_incident' | 'event_updated' | 'alert' | 'subscribed' | 'resync_required' | 'error' | 'pong'
+  data?: SecurityEvent | SecurityEvent[] | Incident | Record<string, unknown>
   message?: string
+  seq?: number
 }